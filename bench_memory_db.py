@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+Offline load test: realtime_firebase_pipeline against the in-memory RTDB (module2/rtdb.py).
+
+A writer thread pushes synthetic sensor samples at --rate Hz (0 = as fast as possible) to
+sensors/latest, or to users/{uid}/sensor for --vests uids with --mode fleet. The pipeline's own
+``main()`` runs unchanged in a background thread — listeners or polling, profile store, batched
+reads, write-behind queue — reading and writing through the same client with injected latency.
+Reports samples/s, decisions/s, database operations and the per-stage latency table. The same
+--seed gives the same sample stream and the same injected latencies.
+
+Usage (from project root; needs the scaler / model files the pipeline loads):
+  python bench_memory_db.py
+  python bench_memory_db.py --latency-ms 30 --jitter-ms 10 --samples 500 --rate 20
+  python bench_memory_db.py --mode fleet --vests 50 --rate 5
+  python bench_memory_db.py --mode staged --poll
+  MODULE2_INFERENCE_BACKEND=numpy python bench_memory_db.py
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import random
+import sys
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+
+def _seed_tree(vests: int, rng: random.Random) -> dict:
+    users = {}
+    for i in range(vests):
+        users["bench%03d" % i] = {
+            "age": rng.randint(18, 70),
+            "height": rng.randint(150, 195),
+            "weight": rng.randint(50, 110),
+            "gender": rng.choice(["male", "female"]),
+        }
+    return {"meta": {"current_user": {"uid": "bench000"}}, "users": users}
+
+
+def _sample(rng: random.Random) -> dict:
+    return {
+        "temp": round(36.5 + rng.gauss(0.0, 0.6), 3),
+        "pulse": round(75.0 + rng.gauss(0.0, 10.0), 1),
+        "motion": round(rng.random(), 2),
+    }
+
+
+def _writer(mem, args, rng: random.Random, done: threading.Event) -> None:
+    period = 1.0 / args.rate if args.rate > 0 else 0.0
+    uids = ["bench%03d" % i for i in range(args.vests)]
+    t_next = time.monotonic()
+    for _ in range(args.samples):
+        if args.mode == "fleet":
+            mem.reference("users").update({"%s/sensor" % uid: _sample(rng) for uid in uids})
+        else:
+            mem.reference("sensors/latest").set(_sample(rng))
+        if period:
+            t_next += period
+            delay = t_next - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+    done.set()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--mode", choices=("single", "fleet", "staged"), default="single")
+    ap.add_argument("--vests", type=int, default=1, help="uids written per tick (fleet)")
+    ap.add_argument("--samples", type=int, default=300, help="sensor writes (fleet: per uid)")
+    ap.add_argument("--rate", type=float, default=20.0, help="sensor writes per second; 0 = flat out")
+    ap.add_argument("--poll", action="store_true", help="PIPELINE_EVENT_MODE=0 (poll instead of listen)")
+    ap.add_argument("--latency-ms", type=float, default=0.0, help="per get/set/update")
+    ap.add_argument("--jitter-ms", type=float, default=0.0)
+    ap.add_argument("--event-latency-ms", type=float, default=0.0, help="per delivered listener event")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--drain-sec", type=float, default=2.0, help="stop once no decision for this long")
+    args = ap.parse_args()
+    if args.mode != "fleet":
+        args.vests = 1
+
+    os.environ["PIPELINE_FLEET_MODE"] = "1" if args.mode == "fleet" else "0"
+    os.environ["PIPELINE_ASYNC"] = "1" if args.mode == "staged" else "0"
+    os.environ["PIPELINE_EVENT_MODE"] = "0" if args.poll else "1"
+    # Unchanged samples (re-polled, or woken by our own heating writes) are not decisions.
+    os.environ.setdefault("PIPELINE_DEDUPE_SENSOR_READS", "1")
+    os.environ.setdefault("MODULE2_LOG_LEVEL", "WARNING")
+    os.environ.setdefault("MODULE2_TIMING_DUMP_SEC", "0")
+    os.environ.setdefault("PIPELINE_TIMING_DUMP_SEC", "0")
+
+    from module2.rtdb import InMemoryRTDB, set_db
+
+    rng = random.Random(args.seed)
+    mem = set_db(
+        InMemoryRTDB(
+            _seed_tree(args.vests, rng),
+            latency_ms=args.latency_ms,
+            jitter_ms=args.jitter_ms,
+            event_latency_ms=args.event_latency_ms,
+            seed=args.seed,
+        )
+    )
+
+    import realtime_firebase_pipeline as rp
+    from module2.metrics import METRICS
+    from module2.stage_timing import TIMINGS, dump
+
+    threading.Thread(target=rp.main, name="pipeline", daemon=True).start()
+    # One priming sample: wait until the pipeline made a decision (model loaded, listeners up),
+    # then measure from a clean slate.
+    mem.reference("users/bench000/sensor").set(_sample(random.Random(-1)))
+    deadline = time.monotonic() + 60.0
+    while METRICS.total("decisions_total") < 1:
+        if time.monotonic() > deadline:
+            raise SystemExit("pipeline made no decision within 60 s")
+        time.sleep(0.05)
+    time.sleep(0.2)
+    base = METRICS.total("decisions_total")
+    base_writes = METRICS.total("writes_total")
+    base_ops = mem.stats()
+    TIMINGS.reset()
+
+    done = threading.Event()
+    t0 = time.monotonic()
+    threading.Thread(target=_writer, args=(mem, args, rng, done), daemon=True).start()
+    last, last_change = 0.0, time.monotonic()
+    done_at = None
+    while True:
+        time.sleep(0.05)
+        n = METRICS.total("decisions_total") - base
+        now = time.monotonic()
+        if n != last:
+            last, last_change = n, now
+        if done.is_set():
+            done_at = done_at or now
+            if now - last_change >= args.drain_sec or now - done_at >= 10 * args.drain_sec:
+                break
+    wall = last_change - t0
+
+    st = {k: v - base_ops[k] for k, v in mem.stats().items()}
+    sent = args.samples * args.vests
+    print("mode=%s ingest=%s vests=%d latency=%.1f±%.1fms event_latency=%.1fms" % (
+        args.mode, "poll" if args.poll else "stream", args.vests,
+        args.latency_ms, args.jitter_ms, args.event_latency_ms,
+    ))
+    span = (done_at or time.monotonic()) - t0
+    print("samples written   %8d   (%.1f/s)" % (sent, sent / span if span > 0 else 0.0))
+    print("decisions         %8d   (%.1f/s over %.2fs)" % (last, last / wall if wall > 0 else 0.0, wall))
+    print("heating writes    %8d" % (METRICS.total("writes_total") - base_writes))
+    print("db reads / writes / events  %d / %d / %d" % (st["reads"], st["writes"], st["events"]))
+    print(dump())
+
+
+if __name__ == "__main__":
+    main()
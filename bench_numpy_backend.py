@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+NumPy vs TFLite serving backends: parity, startup, per-call latency and process memory.
+
+Parity (checked): NumPy probabilities vs the Keras model (--keras, the float reference) over
+random windows, single + batched, with ``np.testing.assert_allclose(atol=--atol, default 1e-5)``;
+the script fails on a mismatch. Export the .npz from the .keras model for this check.
+
+TFLite difference (informational): max |p_numpy - p_tflite|. tflite_convert's Optimize.DEFAULT
+model has int8 weights and runs hybrid kernels (activations quantized on the fly), so expect
+differences of order 1e-2 in probabilities (observed ~1.5e-2 single, ~3e-2 batched); only a float
+.tflite without optimizations matches to ~1e-6.
+
+Startup / memory run each backend in a fresh subprocess (before this process imports
+tensorflow): import + load + one prediction, reporting wall time and peak RSS (VmHWM).
+
+Usage (from project root):
+  python bench_numpy_backend.py
+  python bench_numpy_backend.py --tflite models/pad_level_classifier.tflite --npz models/pad_level_classifier.npz
+  python bench_numpy_backend.py --keras ''      # skip the Keras parity check
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+_CHILD = r"""
+import json, os, resource, sys, time
+t0 = time.perf_counter()
+sys.path.insert(0, %(root)r)
+import numpy as np
+from module2.inference_utils import load_pad_level_predictor
+from module2 import config
+m = load_pad_level_predictor(%(backend)r, %(path)r)
+m.predict_proba_timed(np.zeros((1, config.SEQ_LENGTH, config.FEATURE_DIM_SEQ), np.float32))
+dt = time.perf_counter() - t0
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+try:
+    with open("/proc/self/status") as f:
+        rss = int(next(l for l in f if l.startswith("VmHWM:")).split()[1])
+except (OSError, StopIteration):
+    pass  # ru_maxrss (may include the parent's pre-exec high-water mark)
+print(json.dumps({"startup_s": dt, "max_rss_kb": rss, "tensorflow": "tensorflow" in sys.modules}))
+"""
+
+
+def _startup(backend: str, path: str) -> dict:
+    code = _CHILD % {"root": ROOT, "backend": backend, "path": path}
+    out = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def _latency_ms(fn, x, reps: int) -> float:
+    fn(x)
+    t0 = time.perf_counter()
+    for _ in range(reps):
+        fn(x)
+    return (time.perf_counter() - t0) * 1000.0 / reps
+
+
+def _keras_parity(keras_path: str, npy, xb, atol: float) -> None:
+    """assert_allclose of NumPy vs Keras probabilities (batch and 32 single windows)."""
+    import numpy as np
+    import tensorflow as tf
+
+    try:
+        model = tf.keras.models.load_model(keras_path, compile=False, safe_mode=False)
+    except TypeError:
+        model = tf.keras.models.load_model(keras_path, compile=False)
+    p_ref = np.asarray(model(xb, training=False), dtype=np.float64)
+    p_npy, _ = npy.predict_proba_batch(xb)
+    np.testing.assert_allclose(p_npy, p_ref, rtol=0, atol=atol, err_msg="batch vs Keras")
+    for i in range(min(32, len(xb))):
+        np.testing.assert_allclose(
+            npy.predict_proba(xb[i : i + 1]), p_ref[i], rtol=0, atol=atol,
+            err_msg="single window %d vs Keras" % i,
+        )
+    print("Parity vs Keras (%s): OK, max |dp| batch=%.2e <= atol=%.0e" % (
+        os.path.basename(keras_path), float(np.max(np.abs(p_npy - p_ref))), atol
+    ))
+
+
+def main() -> None:
+    import numpy as np
+
+    from module2 import config
+
+    parser = argparse.ArgumentParser(description="NumPy vs TFLite backend comparison")
+    parser.add_argument("--tflite", default=config.TFLITE_MODEL_PATH)
+    parser.add_argument("--npz", default=config.NUMPY_WEIGHTS_PATH)
+    parser.add_argument(
+        "--keras", default=config.CLASSIFIER_MODEL_PATH, help="float reference; '' skips parity"
+    )
+    parser.add_argument("--atol", type=float, default=1e-5, help="parity tolerance vs Keras")
+    parser.add_argument("--reps", type=int, default=2000)
+    parser.add_argument("--batch", type=int, default=256)
+    args = parser.parse_args()
+
+    for p in (args.tflite, args.npz) + ((args.keras,) if args.keras else ()):
+        if not os.path.isfile(p):
+            raise SystemExit(
+                "Missing %s — run pad_classifier / tflite_convert.py / numpy_export.py first" % p
+            )
+
+    print("Startup + memory (fresh process: import, load, one prediction):")
+    for name, path in (("tflite", args.tflite), ("numpy", args.npz)):
+        r = _startup(name, path)
+        print("  %-6s startup=%.2fs peak_rss=%.1f MB tensorflow_imported=%s" % (
+            name, r["startup_s"], r["max_rss_kb"] / 1024.0, r["tensorflow"]
+        ))
+
+    from module2.numpy_pad_inference import NumpyPadClassifier
+    from module2.tflite_pad_inference import PadLevelTfliteInterpreter
+
+    tfl = PadLevelTfliteInterpreter(args.tflite)
+    npy = NumpyPadClassifier(args.npz)
+    rng = np.random.default_rng(config.SHUFFLE_SEED)
+    shape = (config.SEQ_LENGTH, config.FEATURE_DIM_SEQ)
+
+    xb = rng.standard_normal((args.batch,) + shape).astype(np.float32)
+    p_tfl, _ = tfl.predict_proba_batch(xb)
+    p_npy, _ = npy.predict_proba_batch(xb)
+    single = max(
+        float(np.max(np.abs(npy.predict_proba(xb[i : i + 1]) - tfl.predict_proba(xb[i : i + 1]))))
+        for i in range(min(32, args.batch))
+    )
+    if args.keras:
+        _keras_parity(args.keras, npy, xb, args.atol)
+    print("vs TFLite (informational): max |dp| single=%.2e batch=%.2e | argmax agreement %.4f" % (
+        single,
+        float(np.max(np.abs(p_npy - p_tfl))),
+        float(np.mean(np.argmax(p_npy, 1) == np.argmax(p_tfl, 1))),
+    ))
+
+    x1 = xb[:1]
+    print("Latency (ms/call, %d reps):" % args.reps)
+    for name, m in (("tflite", tfl), ("numpy", npy)):
+        one = _latency_ms(m.predict_proba_timed, x1, args.reps)
+        bat = _latency_ms(m.predict_proba_batch, xb, max(1, args.reps // 20))
+        print("  %-6s single=%.4f  batch[%d]=%.4f (%.5f/window)" % (
+            name, one, args.batch, bat, bat / args.batch
+        ))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark: RollingFeatureBuffer backends (deque vs preallocated ring).
+
+Measures one realtime tick = push_observation + raw_window on a full buffer, plus bytes
+allocated per tick (tracemalloc; NumPy reports its buffers there). With ``--scaled`` the tick
+is push_observation + scaled_window (deque: sklearn transform; ring: fused per-row scaling).
+
+Usage (from project root):
+  python bench_rolling_buffer.py
+  python bench_rolling_buffer.py --ticks 200000
+  python bench_rolling_buffer.py --scaled          # data/scaler_features.pkl if present
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+
+def _tick_inputs(n: int):
+    import numpy as np
+
+    rng = np.random.default_rng(0)
+    temps = 36.5 + rng.normal(0.0, 0.4, size=n)
+    pulses = 75.0 + rng.normal(0.0, 8.0, size=n)
+    motions = rng.random(n)
+    return [(float(t), float(p), float(m)) for t, p, m in zip(temps, pulses, motions)]
+
+
+def _load_or_fit_scaler():
+    """Saved training scaler when available, else a StandardScaler fit on synthetic rows."""
+    import numpy as np
+
+    from module2 import config
+    from module2.inference_utils import load_scaler_features_only
+
+    if os.path.isfile(config.SCALER_FEATURES_PATH):
+        return load_scaler_features_only()
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(1)
+    loc = np.array([36.5, 0.0, 75.0, 0.5, 30.0, 170.0, 70.0, 0.5, 0.0, 0.0])
+    spread = np.array([0.5, 0.5, 10.0, 0.5, 10.0, 10.0, 10.0, 0.5, 0.2, 3.0])
+    return StandardScaler().fit(loc + spread * rng.standard_normal((2000, loc.size)))
+
+
+def _bench(backend: str, inputs, scaler=None) -> tuple:
+    from module2.rolling_buffer import make_feature_buffer
+
+    buf = make_feature_buffer(backend=backend)
+    for t, p, m in inputs[: buf.seq_len]:
+        buf.push_observation(t, p, m, 30.0, 170.0, 70.0, 1.0)
+    if scaler is not None:
+        read = lambda: buf.scaled_window(scaler)  # noqa: E731
+    else:
+        read = buf.raw_window
+    read()
+
+    t0 = time.perf_counter()
+    for t, p, m in inputs:
+        buf.push_observation(t, p, m, 30.0, 170.0, 70.0, 1.0)
+        read()
+    per_tick_us = (time.perf_counter() - t0) * 1e6 / len(inputs)
+
+    sample = inputs[:1000]
+    # Fresh tracing cycle per backend: stop() clears traces, so the peak starts at 0 here.
+    if tracemalloc.is_tracing():
+        tracemalloc.stop()
+    tracemalloc.start()
+    base, _ = tracemalloc.get_traced_memory()
+    for t, p, m in sample:
+        buf.push_observation(t, p, m, 30.0, 170.0, 70.0, 1.0)
+        read()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return per_tick_us, max(peak - base, 0)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Rolling buffer push+window microbenchmark")
+    parser.add_argument("--ticks", type=int, default=50000, help="Timed ticks per backend")
+    parser.add_argument(
+        "--scaled", action="store_true", help="Time push + scaled_window instead of raw_window"
+    )
+    args = parser.parse_args()
+
+    from module2 import config
+
+    inputs = _tick_inputs(max(args.ticks, config.SEQ_LENGTH))
+    print("SEQ_LENGTH=%s FEATURE_DIM_SEQ=%s ticks=%s" % (config.SEQ_LENGTH, config.FEATURE_DIM_SEQ, len(inputs)))
+    scaler = _load_or_fit_scaler() if args.scaled else None
+    what = "push+scaled" if args.scaled else "push+window"
+    results = {}
+    for backend in ("deque", "ring"):
+        us, peak = _bench(backend, inputs, scaler)
+        results[backend] = us
+        print(
+            "  %-6s %s: %8.2f us/tick | peak alloc over 1000 ticks: %8d B"
+            % (backend, what, us, peak)
+        )
+    if results["ring"] > 0:
+        print("  speedup ring vs deque: %.2fx" % (results["deque"] / results["ring"]))
+
+
+if __name__ == "__main__":
+    main()
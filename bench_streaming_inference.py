@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""
+Streaming (incremental) Conv1D inference vs full-window recompute, one realtime tick at a time.
+
+Drives a RollingFeatureBuffer with synthetic observations and feeds each scaled window to
+NumpyPadClassifier (full recompute) and StreamingPadClassifier (new conv columns only), checking
+max |dp| between the two and reporting multiply-adds and latency per tick. With ``--tflite`` the
+TFLite interpreter is timed on the same windows.
+
+Usage (from project root):
+  python bench_streaming_inference.py
+  python bench_streaming_inference.py --npz models/pad_level_classifier.npz --ticks 20000
+  python bench_streaming_inference.py --tflite models/pad_level_classifier.tflite
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "3")
+
+
+def _scaled_windows(n: int, scaler):
+    """Per-tick scaled windows (copies) from a ring buffer fed with synthetic vest readings."""
+    import numpy as np
+
+    from bench_rolling_buffer import _tick_inputs
+    from module2.rolling_buffer import make_feature_buffer
+
+    buf = make_feature_buffer(backend="ring")
+    inputs = _tick_inputs(n + buf.seq_len)
+    out = []
+    for i, (t, p, m) in enumerate(inputs):
+        buf.push_observation(t, p, m, 30.0, 170.0, 70.0, 1.0)
+        if i >= buf.seq_len - 1:
+            out.append(np.array(buf.model_input(scaler), dtype=np.float32))
+    return out[:n]
+
+
+def _time_ticks(fn, windows) -> float:
+    t0 = time.perf_counter()
+    for x in windows:
+        fn(x)
+    return (time.perf_counter() - t0) * 1000.0 / len(windows)
+
+
+def main() -> None:
+    import numpy as np
+
+    from bench_rolling_buffer import _load_or_fit_scaler
+    from module2 import config
+    from module2.numpy_pad_inference import (
+        NumpyPadClassifier,
+        StreamingPadClassifier,
+        conv_head_flops,
+    )
+
+    parser = argparse.ArgumentParser(description="Streaming vs full-window Conv1D inference")
+    parser.add_argument("--npz", default=config.NUMPY_WEIGHTS_PATH)
+    parser.add_argument("--tflite", default=None, help="Also time this .tflite on the same windows")
+    parser.add_argument("--ticks", type=int, default=5000)
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.npz):
+        raise SystemExit("Missing %s — run numpy_export.py first" % args.npz)
+
+    full = NumpyPadClassifier(args.npz)
+    stream = StreamingPadClassifier(args.npz)
+    windows = _scaled_windows(args.ticks, _load_or_fit_scaler())
+
+    diff = 0.0
+    for x in windows:
+        diff = max(diff, float(np.max(np.abs(stream.predict_proba(x) - full.predict_proba(x)))))
+    print("Parity over %d ticks: max |p_stream - p_full| = %.2e (full recomputes=%d, incremental=%d)" % (
+        len(windows), diff, stream.full_recomputes, stream.incremental_steps
+    ))
+
+    flops = conv_head_flops(full)
+    print("Multiply-adds per tick: full=%d incremental=%d (%.1fx fewer)" % (
+        flops["full"], flops["incremental"], flops["full"] / float(flops["incremental"])
+    ))
+
+    stream.reset()
+    print("Latency (ms/tick, predict_proba_timed incl. validation):")
+    results = [
+        ("numpy-full", _time_ticks(full.predict_proba_timed, windows)),
+        ("stream", _time_ticks(stream.predict_proba_timed, windows)),
+    ]
+    if args.tflite:
+        from module2.tflite_pad_inference import PadLevelTfliteInterpreter
+
+        tfl = PadLevelTfliteInterpreter(args.tflite)
+        results.append(("tflite", _time_ticks(tfl.predict_proba_timed, windows)))
+    for name, ms in results:
+        print("  %-10s %.4f" % (name, ms))
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,7 @@ if (hasConfig) {
 export async function setCurrentUser(uid) {
   if (!db || !uid) return false
   await set(ref(db, 'meta/current_user'), { uid, updated_at: Date.now() })
+  await set(ref(db, `meta/user_index/${uid}`), true)
   return true
 }
 
@@ -154,6 +155,7 @@ export async function saveUserProfile(uid, profile) {
   if (!db || !uid) return false
   const payload = { ...profile, updated_at: Date.now() }
   await set(ref(db, `users/${uid}/profile`), payload)
+  await set(ref(db, `meta/user_index/${uid}`), true)
   return true
 }
 
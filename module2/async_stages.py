@@ -0,0 +1,109 @@
+"""
+Bounded hand-off queues between asyncio pipeline stages, with depth metrics.
+
+``StageQueue.put_nowait`` never blocks the producer: when the queue is full the oldest item is
+dropped (counted), so a slow consumer sees the freshest work instead of a growing backlog. Use it
+only for work that a later item supersedes (sensor samples).
+
+``KeyedStageQueue`` is for work that must not be lost (writes): it holds at most one item per
+key, and a newer item for a queued key replaces it in place (counted as coalesced). Nothing is
+dropped; its depth is bounded by the number of distinct keys.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Dict, Hashable, Tuple
+
+
+class StageQueue:
+    """``asyncio.Queue`` (create inside the running loop) + put/get/drop counters and depth high-water mark."""
+
+    def __init__(self, name: str, maxsize: int = 64) -> None:
+        self.name = name
+        self.maxsize = max(1, int(maxsize))
+        self._q: "asyncio.Queue[Any]" = asyncio.Queue(self.maxsize)
+        self.put_count = 0
+        self.get_count = 0
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put_nowait(self, item: Any) -> None:
+        if self._q.full():
+            self._q.get_nowait()
+            self.dropped += 1
+        self._q.put_nowait(item)
+        self.put_count += 1
+        self.max_depth = max(self.max_depth, self._q.qsize())
+
+    async def get(self) -> Any:
+        item = await self._q.get()
+        self.get_count += 1
+        return item
+
+    def depth(self) -> int:
+        return self._q.qsize()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._q.qsize(),
+            "max_depth": self.max_depth,
+            "put": self.put_count,
+            "get": self.get_count,
+            "dropped": self.dropped,
+        }
+
+    def summary(self) -> str:
+        return "%s=%d/%d(max %d) drop=%d" % (
+            self.name,
+            self._q.qsize(),
+            self.maxsize,
+            self.max_depth,
+            self.dropped,
+        )
+
+
+class KeyedStageQueue:
+    """Latest item per key in first-queued order; ``put_nowait`` coalesces instead of dropping."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._keys: "asyncio.Queue[Hashable]" = asyncio.Queue()
+        self._items: Dict[Hashable, Any] = {}
+        self.put_count = 0
+        self.get_count = 0
+        self.coalesced = 0
+        self.max_depth = 0
+
+    def put_nowait(self, key: Hashable, item: Any) -> None:
+        if key in self._items:
+            self.coalesced += 1
+        else:
+            self._keys.put_nowait(key)
+        self._items[key] = item
+        self.put_count += 1
+        self.max_depth = max(self.max_depth, len(self._items))
+
+    async def get(self) -> Tuple[Hashable, Any]:
+        key = await self._keys.get()
+        self.get_count += 1
+        return key, self._items.pop(key)
+
+    def depth(self) -> int:
+        return len(self._items)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "put": self.put_count,
+            "get": self.get_count,
+            "coalesced": self.coalesced,
+        }
+
+    def summary(self) -> str:
+        return "%s=%d(max %d) coalesced=%d" % (
+            self.name,
+            len(self._items),
+            self.max_depth,
+            self.coalesced,
+        )
@@ -79,9 +79,22 @@ FEATURE_COLS = [
 ]
 # Sequence model: base features + consecutive-step Δtemp / Δpulse (clipped in data_prep)
 FEATURE_COLS_SEQ = FEATURE_COLS + [COL_TEMP_STEP, COL_PULSE_STEP]
+# Raw-input TFLite export (tflite_convert.py --raw-inputs): per-timestep sensor/profile fields;
+# derived features + StandardScaler run inside the graph. One extra leading row carries the
+# previous observation so temp_step / pulse_step match the rolling buffer exactly.
+RAW_INPUT_COLS = [
+    COL_TEMP,
+    COL_PULSE,
+    COL_MOTION,
+    COL_AGE,
+    COL_HEIGHT_CM,
+    COL_WEIGHT_KG,
+    COL_GENDER,
+]
 FEATURE_INDEX = {name: i for i, name in enumerate(FEATURE_COLS)}
 FEATURE_DIM = len(FEATURE_COLS)
 FEATURE_DIM_SEQ = len(FEATURE_COLS_SEQ)
+RAW_INPUT_DIM = len(RAW_INPUT_COLS)
 
 PAD_LEVEL_CLASSES = ("OFF", "LOW", "MEDIUM", "HIGH")
 NUM_PAD_CLASSES = len(PAD_LEVEL_CLASSES)
@@ -89,8 +102,12 @@ NUM_PAD_CLASSES = len(PAD_LEVEL_CLASSES)
 SHUFFLE_SEED = 42
 
 SEQ_LENGTH = 24
+RAW_INPUT_SEQ_LENGTH = SEQ_LENGTH + 1
 EPOCHS_CLASSIFIER = 80
 BATCH_SIZE_CLASSIFIER = 32
+# Class balancing of sequence windows: "materialize" writes oversampled X_seq_pad.npy (N, 24, 10);
+# "index" keeps only window endpoints and pad_classifier draws a balanced index schedule per epoch
+BALANCE_MODE = os.environ.get("MODULE2_BALANCE_MODE", "materialize").strip().lower()
 
 # ---------- THRESHOLDS (safety & control) ----------
 TEMP_MIN_SAFE_C = 35.0
@@ -107,6 +124,8 @@ PWM_MIN_SAFE = 0.0
 
 # Real-time pad_level smoothing (majority of last N predictions after safety)
 PREDICTION_SMOOTH_WINDOW = 3
+# "mean" (running-sum average of the last window) or "ema" (alpha = 2 / (window + 1))
+PREDICTION_SMOOTH_MODE = os.environ.get("MODULE2_SMOOTH_MODE", "mean").strip().lower()
 
 # Sensor ranges for inference (before scaling); outside → fallback (not model)
 SENSOR_TEMP_MIN_C = 20.0
@@ -130,10 +149,56 @@ MODEL_CONFIDENCE_MIN = 0.5
 # Reset rolling buffer if no new samples for this many seconds
 BUFFER_STALE_SECONDS = 5.0
 
+# Rolling buffer storage: "ring" (preallocated, in-place) or "deque" (reference)
+ROLLING_BUFFER_BACKEND = os.environ.get("MODULE2_BUFFER_BACKEND", "ring").strip().lower()
+
 SCALER_FEATURES_PATH = os.path.join(DATA_DIR, "scaler_features.pkl")
 SCALER_TARGET_PATH = os.path.join(DATA_DIR, "scaler_target.pkl")
 CLASSIFIER_MODEL_PATH = os.path.join(MODELS_DIR, "pad_level_classifier.keras")
 TFLITE_MODEL_PATH = os.path.join(MODELS_DIR, "pad_level_classifier.tflite")
+TFLITE_RAW_MODEL_PATH = os.path.join(MODELS_DIR, "pad_level_classifier_raw.tflite")
+TFLITE_INT8_MODEL_PATH = os.path.join(MODELS_DIR, "pad_level_classifier_int8.tflite")
+# Full-integer export: windows drawn from the training split for activation-range calibration
+TFLITE_INT8_CALIBRATION_SAMPLES = 500
+NUMPY_WEIGHTS_PATH = os.path.join(MODELS_DIR, "pad_level_classifier.npz")
+
+# Serving backend: "tflite" (tf.lite.Interpreter), "numpy" (NUMPY_WEIGHTS_PATH; no tensorflow import)
+# or "stream" (NumPy weights; conv activations reused across one-step window slides)
+INFERENCE_BACKEND = os.environ.get("MODULE2_INFERENCE_BACKEND", "tflite").strip().lower()
+
+# Per-stage latency histograms (module2/stage_timing.py): fetch, buffer, tflite, smooth, write, ...
+STAGE_TIMING = os.environ.get("MODULE2_STAGE_TIMING", "1").strip().lower() in ("1", "true", "yes")
+STAGE_TIMING_DUMP_SEC = float(os.environ.get("MODULE2_TIMING_DUMP_SEC", "60"))  # 0 = on demand only (SIGUSR1)
+
+# Local Prometheus endpoint (module2/metrics.py): /metrics + /healthz; port 0 = disabled
+METRICS_PORT = int(os.environ.get("MODULE2_METRICS_PORT", "0"))
+METRICS_HOST = os.environ.get("MODULE2_METRICS_HOST", "127.0.0.1").strip() or "127.0.0.1"
+METRICS_HEALTH_STALE_SEC = float(os.environ.get("MODULE2_METRICS_HEALTH_STALE_SEC", "60"))
+
+# Logging (module2/log.py): level for stdout/stderr, minimum interval for per-tick lines
+# (prediction, warmup, payload skips), and the in-memory ring of recent messages
+LOG_LEVEL = os.environ.get("MODULE2_LOG_LEVEL", "INFO").strip().upper()
+LOG_EVERY_SEC = float(os.environ.get("MODULE2_LOG_EVERY_SEC", "5"))
+LOG_RING_SIZE = int(os.environ.get("MODULE2_LOG_RING_SIZE", "2048"))
+LOG_RING_LEVEL = os.environ.get("MODULE2_LOG_RING_LEVEL", "INFO").strip().upper()
+# Rate-limit keys remembered per logger (LRU); DEBUG per-tick lines are logged 1 in LOG_DEBUG_SAMPLE
+LOG_RATE_KEYS = int(os.environ.get("MODULE2_LOG_RATE_KEYS", "4096"))
+LOG_DEBUG_SAMPLE = max(1, int(os.environ.get("MODULE2_LOG_DEBUG_SAMPLE", "10")))
+
+# Serve the raw-input model (no scaler_features.pkl / sklearn in the serving process)
+USE_RAW_INPUT_MODEL = os.environ.get("MODULE2_RAW_INPUT_MODEL", "0").strip().lower() in (
+    "1",
+    "true",
+    "yes",
+)
+
+# Realtime Database client (module2/rtdb.py): "firebase" (firebase_admin) or "memory" (in-process
+# stand-in for offline load tests, optionally seeded from a JSON export, with injected latency)
+DB_BACKEND = os.environ.get("MODULE2_DB_BACKEND", "firebase").strip().lower()
+MEMORY_DB_JSON = os.environ.get("MODULE2_MEMORY_DB_JSON", "").strip()
+MEMORY_DB_LATENCY_MS = float(os.environ.get("MODULE2_MEMORY_DB_LATENCY_MS", "0"))
+MEMORY_DB_JITTER_MS = float(os.environ.get("MODULE2_MEMORY_DB_JITTER_MS", "0"))
+MEMORY_DB_EVENT_LATENCY_MS = float(os.environ.get("MODULE2_MEMORY_DB_EVENT_LATENCY_MS", "0"))
 
 FIREBASE_PATH_SENSORS = "sensors/latest"
 FIREBASE_PATH_COMMAND = "heating/command"
@@ -144,6 +209,12 @@ FIREBASE_PATH_USER_PROFILE = "user/profile"
 # - users/{uid}/ -> profile fields
 FIREBASE_PATH_META_CURRENT_USER = "meta/current_user"
 FIREBASE_PATH_USERS = "users"
+# - meta/user_index/{uid}: true -> key-only uid index (registered by the dashboard, backfilled
+#   from a shallow users read); fallback uid lookup reads one key instead of the users tree
+FIREBASE_PATH_USER_INDEX = "meta/user_index"
+# Profile read cache (user_profile): seconds a users/{uid} read is reused, and how many uids to keep
+USER_PROFILE_CACHE_TTL_SEC = float(os.environ.get("MODULE2_PROFILE_CACHE_TTL_SEC", "5"))
+USER_PROFILE_CACHE_MAX = int(os.environ.get("MODULE2_PROFILE_CACHE_MAX", "64"))
 
 DEFAULT_AGE_YEARS = 28.0
 DEFAULT_HEIGHT_CM = 170.0
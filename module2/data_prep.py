@@ -5,16 +5,21 @@ Phase 1 — Data preparation (continuous time-series, no session_id).
 - temp_step = diff(temp), pulse_step = diff(pulse), clip & fill NaN
 - StandardScaler fit on all raw timestep rows (FEATURE_COLS_SEQ), then sliding windows
   on the scaled matrix (matches inference: raw buffer → scale → (1, SEQ_LENGTH, 10))
+- Windows are strided views / endpoint indices into X_scaled_timeseries, not per-window copies
+  (SequenceWindowDataset: O(N) memory instead of O(N * SEQ_LENGTH))
+- Class balance: oversampled X_seq_pad.npy, or (MODULE2_BALANCE_MODE=index) only a balanced
+  index schedule drawn per epoch at training time
 """
 
 from __future__ import annotations
 
 import os
 import pickle
-from typing import Optional, Tuple
+from typing import Iterator, Optional, Tuple
 
 import numpy as np
 import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
 from sklearn.preprocessing import MinMaxScaler, StandardScaler
 
 from . import config
@@ -100,14 +105,10 @@ def _clip_and_report_body_temperature(df):
     return df
 
 
-def balance_sequence_windows(
-    X_seq: np.ndarray,
-    y_seq: np.ndarray,
-    seed: Optional[int] = None,
-) -> Tuple[np.ndarray, np.ndarray]:
+def balanced_indices(y_seq: np.ndarray, seed: Optional[int] = None) -> np.ndarray:
     """
-    Oversample per-class so each class has the same count (max class frequency).
-    Shuffles the combined set (IID batches, not pure chronological).
+    Positions into ``y_seq`` with every class drawn max-class-count times (minority classes with
+    replacement), shuffled — the oversampling schedule, without touching any window data.
     """
     rng = np.random.RandomState(seed if seed is not None else config.SHUFFLE_SEED)
     n_classes = config.NUM_PAD_CLASSES
@@ -120,8 +121,7 @@ def balance_sequence_windows(
             % missing
         )
     n_target = int(counts.max())
-    parts_X: list = []
-    parts_y: list = []
+    parts: list = []
     for c in range(n_classes):
         idx = np.where(y_seq == c)[0]
         if len(idx) < n_target:
@@ -130,12 +130,29 @@ def balance_sequence_windows(
         else:
             idx = rng.choice(idx, size=n_target, replace=False)
         rng.shuffle(idx)
-        parts_X.append(X_seq[idx])
-        parts_y.append(y_seq[idx])
-    X_bal = np.vstack(parts_X)
-    y_bal = np.concatenate(parts_y)
-    perm = rng.permutation(len(y_bal))
-    return X_bal[perm].astype(np.float32), y_bal[perm].astype(np.int32)
+        parts.append(idx)
+    idx = np.concatenate(parts)
+    return idx[rng.permutation(len(idx))]
+
+
+def balanced_epoch_indices(y_seq: np.ndarray, epoch: int, seed: Optional[int] = None) -> np.ndarray:
+    """``balanced_indices`` with a fresh draw per epoch (epoch 0 = the materialized set's draw)."""
+    base = seed if seed is not None else config.SHUFFLE_SEED
+    return balanced_indices(y_seq, seed=base + int(epoch))
+
+
+def balance_sequence_windows(
+    X_seq: np.ndarray,
+    y_seq: np.ndarray,
+    seed: Optional[int] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Oversample per-class so each class has the same count (max class frequency).
+    Shuffles the combined set (IID batches, not pure chronological). One gather of
+    ``balanced_indices``; X_seq may be a window view.
+    """
+    idx = balanced_indices(y_seq, seed)
+    return np.asarray(X_seq[idx], dtype=np.float32), np.asarray(y_seq[idx], dtype=np.int32)
 
 
 def _read_tabular(path):
@@ -235,15 +252,90 @@ def add_time_step_derivatives(df):
 add_session_time_derivatives = add_time_step_derivatives
 
 
+def window_view(X, seq_len):
+    """
+    Read-only (N - seq_len + 1, seq_len, F) strided view of X (N, F): window k is
+    X[k : k + seq_len]. Shares X's memory (works on np.load(..., mmap_mode="r") too).
+    """
+    return sliding_window_view(X, int(seq_len), axis=0).swapaxes(1, 2)
+
+
 def sliding_windows(X, y, seq_len):
-    X_list, y_list = [], []
-    n = len(X)
-    if n < seq_len:
+    """
+    Every window ending at t >= seq_len - 1:
+    X_seq[k] = X[k : k + seq_len], y_seq[k] = y[k + seq_len - 1].
+
+    X_seq is a read-only view on X (float32), so this costs no memory per window; gathering
+    (X_seq[idx]) or np.array(X_seq) copies only what is asked for.
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    if len(X) < seq_len:
         raise ValueError("Not enough data for sequence")
-    for t in range(seq_len - 1, n):
-        X_list.append(X[t - seq_len + 1 : t + 1])
-        y_list.append(y[t])
-    return np.array(X_list, dtype=np.float32), np.array(y_list, dtype=np.int32)
+    return window_view(X, seq_len), np.asarray(y[seq_len - 1 :], dtype=np.int32)
+
+
+class SequenceWindowDataset:
+    """
+    Sequence samples as endpoint indices into the scaled timeseries X (N, F): sample k is
+    X[ends[k] - seq_len + 1 : ends[k] + 1] with label y[ends[k]].
+
+    Only X, y and the int64 endpoints are held; windows are gathered per batch (``windows``,
+    ``batches``), so a subset / reordering / oversampling is just another ``ends`` array.
+    """
+
+    def __init__(self, X, y, seq_len=None, ends=None):
+        self.seq_len = int(seq_len or config.SEQ_LENGTH)
+        if len(X) < self.seq_len:
+            raise ValueError("Not enough data for sequence")
+        self.X = X
+        self.y = np.asarray(y, dtype=np.int32)
+        if ends is None:
+            ends = np.arange(self.seq_len - 1, len(X), dtype=np.int64)
+        self.ends = np.asarray(ends, dtype=np.int64)
+        self._view = window_view(X, self.seq_len)
+
+    def __len__(self):
+        return len(self.ends)
+
+    def __getitem__(self, positions) -> np.ndarray:
+        return self.windows(positions)
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.y[self.ends]
+
+    def subset(self, positions) -> "SequenceWindowDataset":
+        """Same timeseries, samples ``ends[positions]`` (any int index array, repeats allowed)."""
+        return SequenceWindowDataset(self.X, self.y, self.seq_len, self.ends[positions])
+
+    def windows(self, positions) -> np.ndarray:
+        """Gather samples ``positions`` into an owned float32 (len, seq_len, F) array."""
+        starts = self.ends[positions] - (self.seq_len - 1)
+        return np.asarray(self._view[starts], dtype=np.float32)
+
+    def batches(self, batch_size: int, positions=None) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        """(X_batch, y_batch) over ``positions`` (default: all samples in order)."""
+        positions = np.arange(len(self)) if positions is None else np.asarray(positions)
+        for i in range(0, len(positions), int(batch_size)):
+            pos = positions[i : i + int(batch_size)]
+            yield self.windows(pos), self.y[self.ends[pos]]
+
+    def materialize(self) -> Tuple[np.ndarray, np.ndarray]:
+        """(X_seq, y_seq) as owned arrays — O(len * seq_len) memory; for small sets / export."""
+        return self.windows(slice(None)), self.labels
+
+
+def load_sequence_dataset(data_dir=None, mmap: bool = True) -> SequenceWindowDataset:
+    """
+    Dataset over the arrays saved by ``run()`` (X_scaled_timeseries.npy, y_pad_class_ordered.npy,
+    seq_end_idx.npy). With ``mmap`` the timeseries stays on disk and pages in as windows are read.
+    """
+    data_dir = data_dir or config.DATA_DIR
+    X = np.load(os.path.join(data_dir, "X_scaled_timeseries.npy"), mmap_mode="r" if mmap else None)
+    y = np.load(os.path.join(data_dir, "y_pad_class_ordered.npy"))
+    ends_path = os.path.join(data_dir, "seq_end_idx.npy")
+    ends = np.load(ends_path) if os.path.isfile(ends_path) else None
+    return SequenceWindowDataset(X, y, config.SEQ_LENGTH, ends)
 
 
 def run():
@@ -286,20 +378,37 @@ def run():
         n_i = int(np.sum(y_seq == i))
         print("  %s: %s (%.2f%%)" % (name, n_i, 100.0 * n_i / max(len(y_seq), 1)))
 
-    X_seq, y_seq = balance_sequence_windows(X_seq, y_seq, seed=config.SHUFFLE_SEED)
-    print("Sequence tensors (class-balanced):", X_seq.shape, y_seq.shape)
+    if config.BALANCE_MODE == "index":
+        # No oversampled copy: pad_classifier draws balanced_epoch_indices per epoch over
+        # seq_end_idx.npy. Drop stale materialized sets so nothing trains on an old balance.
+        y_bal = y_seq[balanced_indices(y_seq, seed=config.SHUFFLE_SEED)]
+        print("Class balance: index schedule per epoch (%s samples / epoch)" % len(y_bal))
+        for name in ("X_seq_pad.npy", "y_pad_class_seq.npy", "X_seq.npy", "y_seq.npy"):
+            path = os.path.join(config.DATA_DIR, name)
+            if os.path.isfile(path):
+                os.remove(path)
+                print("  removed stale", path)
+    else:
+        X_seq, y_seq = balance_sequence_windows(X_seq, y_seq, seed=config.SHUFFLE_SEED)
+        y_bal = y_seq
+        print("Sequence tensors (class-balanced):", X_seq.shape, y_seq.shape)
+        np.save(os.path.join(config.DATA_DIR, "X_seq_pad.npy"), X_seq)
+        np.save(os.path.join(config.DATA_DIR, "y_pad_class_seq.npy"), y_seq)
+        np.save(os.path.join(config.DATA_DIR, "X_seq.npy"), X_seq)
+        np.save(os.path.join(config.DATA_DIR, "y_seq.npy"), y_seq)
     print("Class distribution (after balance):")
     for i, name in enumerate(config.PAD_LEVEL_CLASSES):
-        n_i = int(np.sum(y_seq == i))
-        print("  %s: %s (%.2f%%)" % (name, n_i, 100.0 * n_i / max(len(y_seq), 1)))
-
-    np.save(os.path.join(config.DATA_DIR, "X_seq_pad.npy"), X_seq)
-    np.save(os.path.join(config.DATA_DIR, "y_pad_class_seq.npy"), y_seq)
-    np.save(os.path.join(config.DATA_DIR, "X_seq.npy"), X_seq)
-    np.save(os.path.join(config.DATA_DIR, "y_seq.npy"), y_seq)
+        n_i = int(np.sum(y_bal == i))
+        print("  %s: %s (%.2f%%)" % (name, n_i, 100.0 * n_i / max(len(y_bal), 1)))
 
     np.save(os.path.join(config.DATA_DIR, "X_scaled_timeseries.npy"), X_scaled)
     np.save(os.path.join(config.DATA_DIR, "y_pad_class_ordered.npy"), y)
+    # Window endpoints into X_scaled_timeseries (load_sequence_dataset): the unbalanced
+    # sequence set without a (N, SEQ_LENGTH, 10) copy
+    np.save(
+        os.path.join(config.DATA_DIR, "seq_end_idx.npy"),
+        np.arange(config.SEQ_LENGTH - 1, len(X_scaled), dtype=np.int64),
+    )
 
     rng = np.random.RandomState(config.SHUFFLE_SEED)
     perm = rng.permutation(len(df))
@@ -4,6 +4,7 @@ Phase 5 — Firebase: rolling buffer → scaler.transform only → TFLite → sa
 No scaler fit at inference. Buffer not full → pad_level WARMUP.
 """
 import os
+import threading
 import time
 
 import numpy as np
@@ -16,14 +17,20 @@ from .inference_utils import (
     clip_sensors_for_buffer,
     fallback_pad_level_from_temp,
     get_model_version_tag,
+    load_pad_level_predictor,
     load_scaler_features_only,
     pad_level_from_index,
     sensors_in_sanity_range,
-    validate_raw_feature_matrix,
     validate_sequence_batch_shape,
 )
-from .rolling_buffer import RollingFeatureBuffer
-from .user_profile import get_user_profile
+from .rolling_buffer import RollingFeatureBuffer, make_feature_buffer, validate_buffer_scaler
+from .rtdb import get_db, using_memory_db
+from .log import get_logger
+from .metrics import METRICS, inc, start_metrics_server, tick
+from .stage_timing import dump_due, install_dump_signal, requested_dump, timed
+from .user_profile import get_user_profile, start_profile_store
+
+log = get_logger("bridge")
 
 # Load .env from project root if python-dotenv available
 try:
@@ -55,15 +62,32 @@ def _probs_from_pad_level(name: str) -> np.ndarray:
 
 
 def _get_predictor_and_scaler():
+    if config.USE_RAW_INPUT_MODEL:
+        # Scaler + derived features live inside the raw-input graph (tflite_convert.py --raw-inputs)
+        if not os.path.isfile(config.TFLITE_RAW_MODEL_PATH):
+            raise FileNotFoundError(
+                "Raw-input TFLite model not found: %s — run: python tflite_convert.py --raw-inputs"
+                % config.TFLITE_RAW_MODEL_PATH
+            )
+        from .tflite_pad_inference import load_pad_level_tflite
+
+        return load_pad_level_tflite(config.TFLITE_RAW_MODEL_PATH), None, "tflite"
+
     scaler_X = load_scaler_features_only()
-    if not os.path.isfile(config.TFLITE_MODEL_PATH):
+    validate_buffer_scaler(scaler_X)
+    backend = getattr(config, "INFERENCE_BACKEND", "tflite")
+    if backend in ("numpy", "stream"):
+        if not os.path.isfile(config.NUMPY_WEIGHTS_PATH):
+            raise FileNotFoundError(
+                "NumPy weights not found: %s — run: python numpy_export.py"
+                % config.NUMPY_WEIGHTS_PATH
+            )
+    elif not os.path.isfile(config.TFLITE_MODEL_PATH):
         raise FileNotFoundError(
             "TFLite model not found: %s — run training then: python tflite_convert.py"
             % config.TFLITE_MODEL_PATH
         )
-    from .tflite_pad_inference import load_pad_level_tflite
-
-    return load_pad_level_tflite(), scaler_X, "tflite"
+    return load_pad_level_predictor(backend), scaler_X, backend
 
 
 def process_sensor_data(
@@ -84,9 +108,31 @@ def process_sensor_data(
     Returns (pad_level, inference_state, inference_source, latency_ms).
 
     inference_state: model | fallback | warmup
-    inference_source: tflite (deployment)
+    inference_source: predictor backend (tflite | numpy | stream)
+
+    Stage times go to stage_timing: predict / smooth / safety, and process for the whole call.
     """
     del model_version  # reserved for Firebase payload at call site
+    with timed("process"):
+        return _process_sensor_data(
+            temp, pulse, motion, age, height, weight, gender, buf, predictor, scaler_X, smoother
+        )
+
+
+def _process_sensor_data(
+    temp: float,
+    pulse: float,
+    motion: float,
+    age: float,
+    height: float,
+    weight: float,
+    gender: float,
+    buf: RollingFeatureBuffer,
+    predictor,
+    scaler_X,
+    smoother: PadLevelProbabilitySmoother,
+) -> Tuple[str, str, str, float]:
+    source = getattr(predictor, "backend", "tflite")
     try:
         raw_temp = float(temp)
         raw_pulse = float(pulse)
@@ -96,14 +142,15 @@ def process_sensor_data(
         sensor_ok = sensors_in_sanity_range(raw_temp, raw_pulse, raw_motion)
 
         buf.push_observation(t, p, m, float(age), float(height), float(weight), float(gender))
-        scaled = buf.scaled_window(scaler_X)
+        scaled = buf.model_input(scaler_X)
         if scaled is None:
-            return "WARMUP", "warmup", "tflite", 0.0
+            return "WARMUP", "warmup", source, 0.0
 
-        validate_sequence_batch_shape(scaled, config.SEQ_LENGTH, config.FEATURE_DIM_SEQ)
-        rw = buf.raw_window()
-        if rw is not None:
-            validate_raw_feature_matrix(rw)
+        validate_sequence_batch_shape(
+            scaled,
+            getattr(predictor, "seq_len", config.SEQ_LENGTH),
+            getattr(predictor, "feat_dim", config.FEATURE_DIM_SEQ),
+        )
 
         latency_ms = 0.0
         conf_min = float(getattr(config, "MODEL_CONFIDENCE_MIN", 0.5))
@@ -114,7 +161,8 @@ def process_sensor_data(
             inf_state = "fallback"
         else:
             try:
-                probs, latency_ms = predictor.predict_proba_timed(scaled)
+                with timed("predict"):
+                    probs, latency_ms = predictor.predict_proba_timed(scaled)
                 if float(np.max(probs)) < conf_min:
                     fb = fallback_pad_level_from_temp(t)
                     probs = _probs_from_pad_level(fb)
@@ -122,19 +170,24 @@ def process_sensor_data(
                 else:
                     inf_state = "model"
             except Exception as exc:
-                print("Inference failed; temperature fallback:", repr(exc))
+                log.warning(
+                    "Inference failed; temperature fallback: %r",
+                    exc, every=config.LOG_EVERY_SEC,
+                )
                 fb = fallback_pad_level_from_temp(t)
                 probs = _probs_from_pad_level(fb)
                 inf_state = "fallback"
                 latency_ms = 0.0
 
-        avg_probs = smoother.smooth_proba(probs)
+        with timed("smooth"):
+            avg_probs = smoother.smooth_proba(probs)
         k = int(np.argmax(avg_probs))
         level = pad_level_from_index(k)
-        level = safety.adjust_pad_level_after_prediction(t, raw_pulse, level)
-        return level, inf_state, "tflite", float(latency_ms)
+        with timed("safety"):
+            level = safety.adjust_pad_level_after_prediction(t, raw_pulse, level)
+        return level, inf_state, source, float(latency_ms)
     except Exception as exc:
-        print("process_sensor_data error (fallback):", repr(exc))
+        log.error("process_sensor_data error (fallback): %r", exc, every=config.LOG_EVERY_SEC)
         try:
             fb = fallback_pad_level_from_temp(float(temp))
             probs = _probs_from_pad_level(fb)
@@ -142,13 +195,18 @@ def process_sensor_data(
             k = int(np.argmax(avg))
             level = pad_level_from_index(k)
             level = safety.adjust_pad_level_after_prediction(float(temp), float(pulse), level)
-            return level, "fallback", "tflite", 0.0
+            return level, "fallback", source, 0.0
         except Exception:
-            return "OFF", "fallback", "tflite", 0.0
+            return "OFF", "fallback", source, 0.0
 
 
 def init_firebase(cred_path=None, database_url=None):
     """Initialize Firebase using service account JSON. Cred path can be absolute or relative to project root."""
+    global db, FIREBASE_AVAILABLE
+    if using_memory_db():
+        db = get_db()
+        FIREBASE_AVAILABLE = True
+        return True
     if not FIREBASE_AVAILABLE:
         return False
     if firebase_admin._apps:
@@ -262,15 +320,24 @@ def listen_and_process():
     Listen for sensor data → pad_level prediction (TFLite preferred) → Firebase command.
     """
     if not init_firebase():
-        print("Firebase not configured; use real-time simulation instead.")
+        log.warning("Firebase not configured; use real-time simulation instead.")
         return
     predictor, scaler_X, backend = _get_predictor_and_scaler()
     model_version = get_model_version_tag(backend)
-    buf = RollingFeatureBuffer()
-    smoother = PadLevelProbabilitySmoother(window=config.PREDICTION_SMOOTH_WINDOW)
-    print("Inference backend:", backend, "| model_version:", model_version)
-    print("TFLite:", config.TFLITE_MODEL_PATH)
-    print("Scaler (inference only):", config.SCALER_FEATURES_PATH)
+    if not start_profile_store(db):
+        log.info("Profile store unavailable; reading profile from Firebase per payload")
+    install_dump_signal()
+    start_metrics_server()
+    buf = make_feature_buffer(backend="raw" if config.USE_RAW_INPUT_MODEL else None)
+    smoother = PadLevelProbabilitySmoother(
+        window=config.PREDICTION_SMOOTH_WINDOW, mode=config.PREDICTION_SMOOTH_MODE
+    )
+    log.info("Inference backend: %s | model_version: %s", backend, model_version)
+    if config.USE_RAW_INPUT_MODEL:
+        log.info("TFLite (raw inputs, scaler in graph): %s", config.TFLITE_RAW_MODEL_PATH)
+    else:
+        log.info("TFLite: %s", config.TFLITE_MODEL_PATH)
+        log.info("Scaler (inference only): %s", config.SCALER_FEATURES_PATH)
 
     sensor_paths = []
     for p in (config.FIREBASE_PATH_SENSORS, "sensor"):
@@ -279,14 +346,28 @@ def listen_and_process():
 
     last_processed = {"temp": None, "pulse": None}
 
+    METRICS.gauge_fn("buffer_fill_ratio", lambda: min(1.0, len(buf) / float(buf.seq_len)))
+
+    # Each sensor path's listener calls back on its own thread; buf, smoother, last_processed
+    # and a StreamingPadClassifier's cached activations are shared, so samples go one at a time.
+    handle_lock = threading.Lock()
+
     def handle_sensor_payload(payload: Any):
+        with handle_lock:
+            _handle_sensor_payload(payload)
+
+    def _handle_sensor_payload(payload: Any):
+        tick()
         buf.maybe_reset_if_stale(time.monotonic())
         norm = normalize_sensor_payload(payload)
         temp = norm.get("temp")
         pulse = norm.get("pulse")
 
         if temp is None or pulse is None:
-            print("Skipping payload (missing temp/pulse):", payload)
+            log.warning(
+                "Skipping payload (missing temp/pulse): %s",
+                payload, every=config.LOG_EVERY_SEC,
+            )
             return
 
         if last_processed["temp"] == temp and last_processed["pulse"] == pulse:
@@ -294,7 +375,9 @@ def listen_and_process():
         last_processed["temp"] = temp
         last_processed["pulse"] = pulse
 
-        print(f"Sensor received: temp={temp:.2f}C pulse={pulse}bpm")
+        log.debug(
+            "Sensor received: temp=%.2fC pulse=%sbpm", temp, pulse, sample=config.LOG_DEBUG_SAMPLE
+        )
 
         motion = norm.get("motion_level_0_1")
         if motion is None:
@@ -327,11 +410,22 @@ def listen_and_process():
             smoother,
             model_version,
         )
-        write_pad_level_command(level, state, source, latency_ms, model_version)
-        print(
-            f"Wrote: pad_level={level} state={state} source={source} "
-            f"latency_ms={latency_ms:.2f} buffer={len(buf)}/{config.SEQ_LENGTH}"
+        inc("decisions_total", state=state)
+        try:
+            with timed("write"):
+                write_pad_level_command(level, state, source, latency_ms, model_version)
+        except Exception:
+            inc("writes_total", result="error")
+            raise
+        inc("writes_total", result="ok")
+        log.info(
+            "Wrote: pad_level=%s state=%s source=%s latency_ms=%.2f buffer=%s/%s",
+            level, state, source, latency_ms, len(buf), config.SEQ_LENGTH,
+            every=config.LOG_EVERY_SEC,
         )
+        report = dump_due(config.STAGE_TIMING_DUMP_SEC) or requested_dump()
+        if report:
+            log.info("%s", report)
 
     def on_sensor_event(event):
         try:
@@ -341,12 +435,11 @@ def listen_and_process():
                 return
             handle_sensor_payload(event.data)
         except Exception as e:
-            print("Firebase listener error:", repr(e))
+            log.error("Firebase listener error: %r", e, every=config.LOG_EVERY_SEC)
 
-    print(
-        "Firebase listener attached to sensor paths:",
+    log.info(
+        "Firebase listener attached to sensor paths: %s -> %s",
         ", ".join(sensor_paths),
-        "->",
         config.FIREBASE_PATH_COMMAND,
     )
 
@@ -357,7 +450,7 @@ def listen_and_process():
             if payload:
                 handle_sensor_payload(payload)
         except Exception as e:
-            print("Failed to fetch initial sensor payload for", p, ":", repr(e))
+            log.warning("Failed to fetch initial sensor payload for %s: %r", p, e)
 
     for p in sensor_paths:
         db.reference(p).listen(on_sensor_event)
@@ -7,8 +7,7 @@ from __future__ import annotations
 
 import os
 import pickle
-from collections import deque
-from typing import Any, Deque, List, Optional, Tuple
+from typing import Any, List, Optional, Tuple
 
 import numpy as np
 
@@ -122,6 +121,28 @@ def get_model_version_tag(backend: str) -> str:
     return getattr(config, "MODEL_VERSION_DEFAULT", "tflite_v2")
 
 
+def load_pad_level_predictor(backend: Optional[str] = None, path: Optional[str] = None) -> Any:
+    """
+    Serving predictor for ``backend`` (default config.INFERENCE_BACKEND):
+    ``tflite`` → PadLevelTfliteInterpreter, ``numpy`` → NumpyPadClassifier (no tensorflow import),
+    ``stream`` → StreamingPadClassifier (NumPy, incremental conv on a one-step sliding window).
+    """
+    name = (backend or getattr(config, "INFERENCE_BACKEND", "tflite")).strip().lower()
+    if name == "numpy":
+        from .numpy_pad_inference import load_pad_level_numpy
+
+        return load_pad_level_numpy(path)
+    if name == "stream":
+        from .numpy_pad_inference import load_pad_level_streaming
+
+        return load_pad_level_streaming(path)
+    if name == "tflite":
+        from .tflite_pad_inference import load_pad_level_tflite
+
+        return load_pad_level_tflite(path)
+    raise ValueError("Unknown inference backend %r (expected tflite, numpy or stream)" % name)
+
+
 def validate_scaler_feature_order(scaler: Any) -> None:
     """
     Ensure scaler_features.pkl matches current training feature count and (if present) names.
@@ -163,6 +184,47 @@ def load_scaler_features_only(path: Optional[str] = None) -> Any:
     return obj
 
 
+def standard_scaler_affine(scaler: Any) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ``(mean_, scale_)`` of a fitted StandardScaler as float64 (FEATURE_DIM_SEQ,) arrays, for code
+    that applies ``(x - mean_) / scale_`` itself instead of calling ``transform``.
+
+    Raises TypeError unless ``scaler`` is a StandardScaler with the default ``with_mean`` /
+    ``with_std`` and both attributes set — any other scaler (MinMaxScaler, ``with_mean=False``,
+    which still sets ``mean_``) does not transform by that affine. ValueError on a size mismatch.
+    """
+    from sklearn.preprocessing import StandardScaler
+
+    mean = getattr(scaler, "mean_", None)
+    scale = getattr(scaler, "scale_", None)
+    if (
+        not isinstance(scaler, StandardScaler)
+        or not getattr(scaler, "with_mean", True)
+        or not getattr(scaler, "with_std", True)
+        or mean is None
+        or scale is None
+    ):
+        raise TypeError(
+            "Expected a fitted StandardScaler(with_mean=True, with_std=True); got %s "
+            "(with_mean=%s, with_std=%s, mean_=%s, scale_=%s)"
+            % (
+                type(scaler).__name__,
+                getattr(scaler, "with_mean", None),
+                getattr(scaler, "with_std", None),
+                "None" if mean is None else "set",
+                "None" if scale is None else "set",
+            )
+        )
+    mean = np.asarray(mean, dtype=np.float64).reshape(-1)
+    scale = np.asarray(scale, dtype=np.float64).reshape(-1)
+    f = config.FEATURE_DIM_SEQ
+    if mean.size != f or scale.size != f:
+        raise ValueError(
+            "Scaler mean_/scale_ must have %s entries; got %s / %s" % (f, mean.size, scale.size)
+        )
+    return mean, scale
+
+
 def validate_classifier_output_probs(out: np.ndarray) -> np.ndarray:
     """
     TFLite/Keras softmax output: shape (NUM_PAD_CLASSES,), finite, valid distribution, argmax in bounds.
@@ -189,38 +251,180 @@ def validate_classifier_output_probs(out: np.ndarray) -> np.ndarray:
     return p
 
 
-def validate_sequence_batch_shape(x: np.ndarray, seq_len: int, feat_dim: int) -> None:
-    """TFLite / Keras sequence input must be exactly (1, SEQ_LENGTH, FEATURE_DIM_SEQ)."""
+def validate_classifier_output_probs_batch(out: np.ndarray) -> np.ndarray:
+    """
+    Batched ``validate_classifier_output_probs``: (N, NUM_PAD_CLASSES) → row-normalized probabilities.
+    Rows whose sum is far from 1 are treated as logits (softmax).
+    """
+    p = np.asarray(out, dtype=np.float64)
+    n = config.NUM_PAD_CLASSES
+    if p.ndim != 2 or p.shape[1] != n:
+        raise ValueError("Classifier output must have shape (N, %d), got %s" % (n, p.shape))
+    if not np.all(np.isfinite(p)):
+        raise ValueError("Non-finite classifier output")
+    sm = np.sum(p, axis=1, keepdims=True)
+    if np.any(sm <= 0):
+        raise ValueError("Classifier output has non-positive sum")
+    logits = np.abs(sm - 1.0) > 0.25
+    if np.any(logits):
+        e = np.exp(p - np.max(p, axis=1, keepdims=True))
+        soft = e / np.sum(e, axis=1, keepdims=True)
+        p = np.where(logits, soft, p / np.where(logits, 1.0, sm))
+    else:
+        p = p / sm
+    return p
+
+
+def validate_sequence_batch_shape(
+    x: np.ndarray, seq_len: int, feat_dim: int, batch: Optional[int] = 1
+) -> None:
+    """
+    TFLite / Keras sequence input must be exactly (batch, SEQ_LENGTH, FEATURE_DIM_SEQ).
+    ``batch=None`` accepts any N >= 1.
+    """
     a = np.asarray(x)
-    expected = (1, int(seq_len), int(feat_dim))
-    if tuple(a.shape) != expected:
+    expected = (batch if batch is not None else "N", int(seq_len), int(feat_dim))
+    ok = (
+        a.ndim == 3
+        and tuple(a.shape[1:]) == expected[1:]
+        and (a.shape[0] == batch if batch is not None else a.shape[0] >= 1)
+    )
+    if not ok:
         raise ValueError(
             "Model input shape must be %s (batch, SEQ_LENGTH, features); got %s"
             % (expected, tuple(a.shape))
         )
 
 
+SMOOTH_MODES = ("mean", "ema")
+
+
 class PadLevelProbabilitySmoother:
-    """Average the last ``window`` softmax vectors; return stabilized probabilities."""
+    """
+    Stabilize softmax vectors over time, O(1) per update.
+
+    ``mean``: average of the last ``window`` vectors via a running sum over a fixed ring.
+    ``ema``: exponential moving average, ``alpha`` defaults to 2 / (window + 1).
+
+    Holds ``streams`` independent histories (one per vest). ``smooth_proba`` takes a single
+    (NUM_PAD_CLASSES,) vector (stream 0) or an (N, NUM_PAD_CLASSES) batch, advancing streams
+    ``rows`` (default 0..N-1, must be unique) in one vectorized call.
+    """
 
-    def __init__(self, window: int = 3) -> None:
+    # Recompute running sums from the ring every this many updates (bounds float drift)
+    RESYNC_EVERY = 4096
+
+    def __init__(
+        self,
+        window: int = 3,
+        mode: str = "mean",
+        alpha: Optional[float] = None,
+        streams: int = 1,
+    ) -> None:
+        mode = (mode or "mean").strip().lower()
+        if mode not in SMOOTH_MODES:
+            raise ValueError("Unknown smoothing mode %r (expected one of %s)" % (mode, SMOOTH_MODES))
         self._window = max(1, int(window))
-        self._hist: Deque[np.ndarray] = deque(maxlen=self._window)
-
-    def reset(self) -> None:
-        self._hist.clear()
-
-    def smooth_proba(self, probs: np.ndarray) -> np.ndarray:
-        p = np.asarray(probs, dtype=np.float64).reshape(-1)
-        if p.size != config.NUM_PAD_CLASSES:
-            raise ValueError("smooth_proba expects %d probs" % config.NUM_PAD_CLASSES)
-        self._hist.append(p / max(float(np.sum(p)), 1e-12))
-        stacked = np.stack(list(self._hist), axis=0)
-        avg = np.mean(stacked, axis=0)
-        s = float(np.sum(avg))
-        if s <= 0:
-            return np.ones(config.NUM_PAD_CLASSES, dtype=np.float64) / config.NUM_PAD_CLASSES
-        return avg / s
+        self.mode = mode
+        self.alpha = float(alpha) if alpha is not None else 2.0 / (self._window + 1.0)
+        if not 0.0 < self.alpha <= 1.0:
+            raise ValueError("EMA alpha must be in (0, 1], got %s" % self.alpha)
+        n, c = max(1, int(streams)), config.NUM_PAD_CLASSES
+        self._ring = np.zeros((self._window, n, c), dtype=np.float64)
+        self._acc = np.zeros((n, c), dtype=np.float64)  # running sum (mean) or EMA state
+        self._head = np.zeros(n, dtype=np.intp)
+        self._count = np.zeros(n, dtype=np.int64)
+        self._updates = 0
+
+    @property
+    def streams(self) -> int:
+        return int(self._acc.shape[0])
+
+    def ensure_streams(self, n: int) -> None:
+        """Grow to at least ``n`` streams (existing histories kept; capacity doubles)."""
+        cur = self.streams
+        if n <= cur:
+            return
+        new = max(int(n), 2 * cur)
+        c = config.NUM_PAD_CLASSES
+        ring = np.zeros((self._window, new, c), dtype=np.float64)
+        ring[:, :cur] = self._ring
+        acc = np.zeros((new, c), dtype=np.float64)
+        acc[:cur] = self._acc
+        self._ring, self._acc = ring, acc
+        self._head = np.concatenate([self._head, np.zeros(new - cur, dtype=np.intp)])
+        self._count = np.concatenate([self._count, np.zeros(new - cur, dtype=np.int64)])
+
+    def reset(self, rows: Any = None) -> None:
+        idx = slice(None) if rows is None else np.asarray(rows, dtype=np.intp)
+        self._ring[:, idx] = 0.0
+        self._acc[idx] = 0.0
+        self._head[idx] = 0
+        self._count[idx] = 0
+
+    def smooth_proba(self, probs: np.ndarray, rows: Any = None) -> np.ndarray:
+        p = np.asarray(probs, dtype=np.float64)
+        c = config.NUM_PAD_CLASSES
+        single = p.ndim == 1
+        if p.shape[-1:] != (c,) or p.ndim not in (1, 2):
+            raise ValueError("smooth_proba expects (%d,) or (N, %d) probs, got %s" % (c, c, p.shape))
+        if single:
+            return self._smooth_one(p, 0 if rows is None else int(np.asarray(rows).reshape(-1)[0]))
+        idx = np.arange(p.shape[0]) if rows is None else np.asarray(rows, dtype=np.intp).reshape(-1)
+        if idx.size != p.shape[0]:
+            raise ValueError("rows has %d entries for %d prob vectors" % (idx.size, p.shape[0]))
+        if idx.size and int(idx.max()) >= self.streams:
+            raise IndexError("stream %d out of range (streams=%d)" % (int(idx.max()), self.streams))
+        p = p / np.maximum(p.sum(axis=1, keepdims=True), 1e-12)
+
+        if self.mode == "ema":
+            fresh = (self._count[idx] == 0)[:, None]
+            out = np.where(fresh, p, self.alpha * p + (1.0 - self.alpha) * self._acc[idx])
+            self._acc[idx] = out
+            self._count[idx] += 1
+        else:
+            head = self._head[idx]
+            # Unused ring slots are zero, so subtracting the evicted entry is safe while filling.
+            self._acc[idx] += p - self._ring[head, idx]
+            self._ring[head, idx] = p
+            self._head[idx] = (head + 1) % self._window
+            self._updates += idx.size
+            if self._updates >= self.RESYNC_EVERY:
+                self._acc[:] = self._ring.sum(axis=0)
+                self._updates = 0
+            out = self._acc[idx]
+
+        # Single normalization: mean = sum / count, and the sum of normalized rows sums to count.
+        tot = out.sum(axis=1, keepdims=True)
+        ok = tot > 0
+        return np.where(ok, out / np.where(ok, tot, 1.0), 1.0 / c)
+
+    def _smooth_one(self, p: np.ndarray, r: int) -> np.ndarray:
+        """Scalar-indexed path for one vector (avoids fancy-indexing overhead per tick)."""
+        if not 0 <= r < self.streams:
+            raise IndexError("stream %d out of range (streams=%d)" % (r, self.streams))
+        p = p / max(float(p.sum()), 1e-12)
+        acc = self._acc[r]
+        if self.mode == "ema":
+            if self._count[r] == 0:
+                acc[:] = p
+            else:
+                acc *= 1.0 - self.alpha
+                acc += self.alpha * p
+            self._count[r] += 1
+        else:
+            h = int(self._head[r])
+            acc += p - self._ring[h, r]
+            self._ring[h, r] = p
+            self._head[r] = (h + 1) % self._window
+            self._updates += 1
+            if self._updates >= self.RESYNC_EVERY:
+                self._acc[:] = self._ring.sum(axis=0)
+                self._updates = 0
+        tot = float(acc.sum())
+        if tot <= 0:
+            return np.full(config.NUM_PAD_CLASSES, 1.0 / config.NUM_PAD_CLASSES)
+        return acc / tot
 
 
 # Back-compat alias
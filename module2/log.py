@@ -0,0 +1,185 @@
+"""
+Leveled logging for the serving loops: per-message rate limiting, sampling, in-memory ring buffer.
+
+    log = get_logger("pipeline")
+    log.debug("[sensor] using payload: %s", payload)       # dropped unless MODULE2_LOG_LEVEL=DEBUG
+    log.info("[model] prediction: %s", level, every=5.0)    # at most once per 5 s per message
+    log.info("[model] running inference", sample=100)       # 1 in 100
+    log.warning("Firebase write failed: %s", exc)
+
+Messages are %-templates plus args and are only formatted when a line is actually written or
+kept in the ring buffer, so a suppressed message costs a dict lookup, not string formatting or I/O.
+A rate-limited line that gets through says how many were suppressed since the previous one.
+The rate-limit key is the template (or ``key=``, e.g. per uid), so one message cannot starve another;
+the last config.LOG_RATE_KEYS keys are tracked (least recently used dropped first).
+
+Output looks like the prints it replaces — the bare message, stdout below WARNING, stderr from
+WARNING up — via stdlib logging (logger ``module2.<name>``, level config.LOG_LEVEL).
+
+The ring buffer keeps the last config.LOG_RING_SIZE (time, level, logger, text) entries at or
+above config.LOG_RING_LEVEL (default INFO), including those filtered from stdout; ``recent()``
+serves them (e.g. the metrics endpoint's /logs). Lines are formatted when recorded, so the ring
+never holds on to payloads or mutable args.
+"""
+from __future__ import annotations
+
+import logging
+import sys
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Hashable, List, Optional, Tuple
+
+from . import config
+
+_ROOT = "module2"
+
+
+def _level(name: Any, default: int) -> int:
+    if isinstance(name, int):
+        return name
+    return int(getattr(logging, str(name or "").strip().upper(), default))
+
+
+_RING: Deque[Tuple[float, int, str, str]] = deque(maxlen=max(1, int(getattr(config, "LOG_RING_SIZE", 2048))))
+_RING_LEVEL = _level(getattr(config, "LOG_RING_LEVEL", "INFO"), logging.INFO)
+_RATE_KEYS = max(1, int(getattr(config, "LOG_RATE_KEYS", 4096)))
+_configured = False
+_configure_lock = threading.Lock()
+
+
+class _BelowWarning(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        return record.levelno < logging.WARNING
+
+
+def configure(level: Any = None) -> None:
+    """Attach stdout / stderr handlers to the ``module2`` logger (once) and set its level."""
+    global _configured
+    root = logging.getLogger(_ROOT)
+    with _configure_lock:
+        if not _configured:
+            fmt = logging.Formatter("%(message)s")
+            out = logging.StreamHandler(sys.stdout)
+            out.addFilter(_BelowWarning())
+            out.setFormatter(fmt)
+            err = logging.StreamHandler(sys.stderr)
+            err.setLevel(logging.WARNING)
+            err.setFormatter(fmt)
+            root.addHandler(out)
+            root.addHandler(err)
+            root.propagate = False
+            _configured = True
+    root.setLevel(_level(level if level is not None else getattr(config, "LOG_LEVEL", "INFO"), logging.INFO))
+
+
+class VestLogger:
+    """Thin wrapper over ``logging.Logger`` adding ``every=`` (seconds) / ``sample=`` (1 in N)."""
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+        self._logger = logging.getLogger("%s.%s" % (_ROOT, name))
+        self._lock = threading.Lock()
+        # key -> [next allowed monotonic time, suppressed since last emit, calls seen], LRU order
+        self._rate: "OrderedDict[Hashable, List[Any]]" = OrderedDict()
+
+    def is_enabled(self, level: int) -> bool:
+        return self._logger.isEnabledFor(level)
+
+    def _log(
+        self,
+        level: int,
+        msg: str,
+        args: Tuple[Any, ...],
+        every: Optional[float],
+        sample: Optional[int],
+        key: Optional[Hashable],
+    ) -> None:
+        to_ring = level >= _RING_LEVEL
+        to_out = self._logger.isEnabledFor(level)
+        if not (to_ring or to_out):
+            return
+        suppressed = 0
+        if every or (sample and sample > 1):
+            rkey = key or msg
+            with self._lock:
+                st = self._rate.get(rkey)
+                if st is None:
+                    st = self._rate[rkey] = [0.0, 0, 0]
+                    if len(self._rate) > _RATE_KEYS:
+                        self._rate.popitem(last=False)
+                else:
+                    self._rate.move_to_end(rkey)
+                st[2] += 1
+                if sample and sample > 1 and (st[2] - 1) % sample:
+                    st[1] += 1
+                    return
+                if every:
+                    now = time.monotonic()
+                    if now < st[0]:
+                        st[1] += 1
+                        return
+                    st[0] = now + float(every)
+                suppressed, st[1] = st[1], 0
+        text = _render(msg, args)
+        if suppressed:
+            text += " (+%d suppressed)" % suppressed
+        if to_ring:
+            _RING.append((time.time(), level, self.name, text))
+        if to_out:
+            # Already formatted: logging only %-formats msg when args are given.
+            self._logger.log(level, text)
+
+    def debug(self, msg: str, *args: Any, every: Optional[float] = None,
+              sample: Optional[int] = None, key: Optional[Hashable] = None) -> None:
+        self._log(logging.DEBUG, msg, args, every, sample, key)
+
+    def info(self, msg: str, *args: Any, every: Optional[float] = None,
+             sample: Optional[int] = None, key: Optional[Hashable] = None) -> None:
+        self._log(logging.INFO, msg, args, every, sample, key)
+
+    def warning(self, msg: str, *args: Any, every: Optional[float] = None,
+                sample: Optional[int] = None, key: Optional[Hashable] = None) -> None:
+        self._log(logging.WARNING, msg, args, every, sample, key)
+
+    def error(self, msg: str, *args: Any, every: Optional[float] = None,
+              sample: Optional[int] = None, key: Optional[Hashable] = None) -> None:
+        self._log(logging.ERROR, msg, args, every, sample, key)
+
+
+_loggers: Dict[str, VestLogger] = {}
+
+
+def get_logger(name: str) -> VestLogger:
+    configure_once()
+    lg = _loggers.get(name)
+    if lg is None:
+        lg = _loggers.setdefault(name, VestLogger(name))
+    return lg
+
+
+def configure_once() -> None:
+    if not _configured:
+        configure()
+
+
+def _render(msg: str, args: Tuple[Any, ...]) -> str:
+    try:
+        return msg % args if args else msg
+    except Exception:
+        return "%s %r" % (msg, args)
+
+
+def _format(entry: Tuple[float, int, str, str]) -> str:
+    ts, level, name, text = entry
+    stamp = time.strftime("%H:%M:%S", time.localtime(ts)) + ".%03d" % int((ts % 1) * 1000)
+    return "%s %-7s %-10s %s" % (stamp, logging.getLevelName(level), name, text)
+
+
+def recent(n: Optional[int] = None, min_level: Any = None) -> List[str]:
+    """Last ``n`` ring-buffer entries (oldest first) at or above ``min_level``."""
+    floor = _level(min_level, logging.NOTSET) if min_level is not None else logging.NOTSET
+    entries = [e for e in list(_RING) if e[1] >= floor]
+    if n is not None:
+        entries = entries[-int(n):]
+    return [_format(e) for e in entries]
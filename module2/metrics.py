@@ -0,0 +1,212 @@
+"""
+Process metrics in Prometheus text format, served on an optional local HTTP endpoint.
+
+Counters and gauges are recorded in-process (``inc`` / ``set_gauge`` / ``gauge_fn``); the
+per-stage latency histograms come from stage_timing (since-start counts). Nothing is
+exported unless ``start_metrics_server`` is called — config.METRICS_PORT /
+MODULE2_METRICS_PORT (0 = off):
+
+    GET /metrics  → text/plain; version=0.0.4
+    GET /healthz  → 200 "ok" while ticks keep arriving, 503 after METRICS_HEALTH_STALE_SEC
+    GET /logs     → recent log lines from module2/log.py's ring buffer (?n=200&level=WARNING)
+
+stdlib only (http.server in a daemon thread); no prometheus_client dependency.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs
+
+from . import config
+from .log import get_logger, recent
+from .stage_timing import BUCKET_EDGES_MS, TIMINGS
+
+log = get_logger("metrics")
+
+PREFIX = "vest_"
+# Exposed histogram buckets: every 4th stage_timing edge (powers of two from 1 µs), in seconds.
+_LE_INDEX = list(range(0, len(BUCKET_EDGES_MS), 4))
+
+_HELP: Dict[str, Tuple[str, str]] = {
+    "ticks_total": ("counter", "Loop iterations (reads / listener wake-ups)."),
+    "decisions_total": ("counter", "pad_level decisions by inference_state (model, fallback, warmup)."),
+    "writes_total": ("counter", "Firebase heating writes by result (ok, error)."),
+    "buffer_stale_resets_total": ("counter", "Rolling buffers cleared after BUFFER_STALE_SECONDS without data."),
+    "buffer_fill_ratio": ("gauge", "Rolling buffer fill (pushed rows / SEQ_LENGTH, capped at 1)."),
+    "write_queue_depth": ("gauge", "Writes pending or in flight in the write-behind queue."),
+    "vests_active": ("gauge", "Vests with state in this process (fleet mode)."),
+    "vests_warm": ("gauge", "Vests with a full rolling buffer (fleet mode)."),
+    "last_tick_age_seconds": ("gauge", "Seconds since the last loop iteration."),
+}
+
+LabelKey = Tuple[Tuple[str, str], ...]
+
+
+def _escape(v: str) -> str:
+    return str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _fmt_labels(labels: LabelKey, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{%s}" % ",".join('%s="%s"' % (k, _escape(v)) for k, v in items)
+
+
+class MetricsRegistry:
+    """Thread-safe counters / gauges keyed by (name, labels), rendered with stage histograms."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._values: Dict[str, Dict[LabelKey, float]] = {}
+        self._gauge_fns: Dict[str, Callable[[], Optional[float]]] = {}
+        self.last_tick_monotonic: Optional[float] = None
+
+    def inc(self, name: str, value: float = 1.0, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + float(value)
+
+    def set_gauge(self, name: str, value: float, **labels: str) -> None:
+        key = tuple(sorted((k, str(v)) for k, v in labels.items()))
+        with self._lock:
+            self._values.setdefault(name, {})[key] = float(value)
+
+    def gauge_fn(self, name: str, fn: Callable[[], Optional[float]]) -> None:
+        """Gauge evaluated at scrape time (``fn`` returning None omits it)."""
+        with self._lock:
+            self._gauge_fns[name] = fn
+
+    def total(self, name: str) -> float:
+        """Sum of ``name`` over all label sets (0 when never recorded)."""
+        with self._lock:
+            return sum(self._values.get(name, {}).values())
+
+    def tick(self) -> None:
+        self.inc("ticks_total")
+        self.last_tick_monotonic = time.monotonic()
+
+    def tick_age(self) -> Optional[float]:
+        t = self.last_tick_monotonic
+        return None if t is None else time.monotonic() - t
+
+    def render(self) -> str:
+        lines: List[str] = []
+
+        def header(name: str) -> None:
+            kind, text = _HELP.get(name, ("untyped", name))
+            lines.append("# HELP %s%s %s" % (PREFIX, name, text))
+            lines.append("# TYPE %s%s %s" % (PREFIX, name, kind))
+
+        with self._lock:
+            values = {n: dict(s) for n, s in self._values.items()}
+            gauge_fns = dict(self._gauge_fns)
+        age = self.tick_age()
+        if age is not None:
+            values["last_tick_age_seconds"] = {(): age}
+        for name, fn in sorted(gauge_fns.items()):
+            try:
+                v = fn()
+            except Exception:
+                v = None
+            if v is not None:
+                values[name] = {(): float(v)}
+        for name in sorted(values):
+            header(name)
+            for labels, v in sorted(values[name].items()):
+                lines.append("%s%s%s %s" % (PREFIX, name, _fmt_labels(labels), repr(float(v))))
+
+        hists = TIMINGS.cumulative()
+        if hists:
+            name = "stage_latency_seconds"
+            lines.append("# HELP %s%s Per-stage wall time (stage_timing)." % (PREFIX, name))
+            lines.append("# TYPE %s%s histogram" % (PREFIX, name))
+            for stage, h in sorted(hists.items()):
+                labels: LabelKey = (("stage", stage),)
+                running = 0
+                last = 0
+                for i in _LE_INDEX:
+                    running += sum(h.counts[last : i + 1])
+                    last = i + 1
+                    le = "%.9g" % (BUCKET_EDGES_MS[i] / 1000.0)
+                    lines.append("%s%s_bucket%s %d" % (PREFIX, name, _fmt_labels(labels, ("le", le)), running))
+                lines.append("%s%s_bucket%s %d" % (PREFIX, name, _fmt_labels(labels, ("le", "+Inf")), h.n))
+                lines.append("%s%s_sum%s %r" % (PREFIX, name, _fmt_labels(labels), h.sum_ms / 1000.0))
+                lines.append("%s%s_count%s %d" % (PREFIX, name, _fmt_labels(labels), h.n))
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+
+
+def inc(name: str, value: float = 1.0, **labels: str) -> None:
+    METRICS.inc(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels: str) -> None:
+    METRICS.set_gauge(name, value, **labels)
+
+
+def tick() -> None:
+    METRICS.tick()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    registry: MetricsRegistry = METRICS
+    stale_sec: float = 60.0
+
+    def do_GET(self) -> None:  # noqa: N802 (http.server API)
+        path, _, query = self.path.partition("?")
+        if path == "/metrics":
+            body = self.registry.render().encode("utf-8")
+            self._send(200, body, "text/plain; version=0.0.4; charset=utf-8")
+        elif path == "/healthz":
+            age = self.registry.tick_age()
+            ok = age is not None and age <= self.stale_sec
+            text = "ok" if ok else ("no ticks yet" if age is None else "stale: last tick %.0fs ago" % age)
+            self._send(200 if ok else 503, (text + "\n").encode("utf-8"), "text/plain; charset=utf-8")
+        elif path == "/logs":
+            qs = parse_qs(query)
+            try:
+                n = int(qs.get("n", ["200"])[0])
+            except ValueError:
+                n = 200
+            lines = recent(max(1, n), qs.get("level", [None])[0])
+            body = "".join(line + "\n" for line in lines).encode("utf-8")
+            self._send(200, body, "text/plain; charset=utf-8")
+        else:
+            self._send(404, b"not found\n", "text/plain; charset=utf-8")
+
+    def _send(self, code: int, body: bytes, content_type: str) -> None:
+        self.send_response(code)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, fmt: str, *args: object) -> None:
+        return  # scrapes would flood stdout
+
+
+def start_metrics_server(
+    port: Optional[int] = None, host: Optional[str] = None
+) -> Optional[ThreadingHTTPServer]:
+    """Serve /metrics, /healthz and /logs from a daemon thread; None when disabled or bind fails."""
+    port = int(config.METRICS_PORT if port is None else port)
+    host = host or config.METRICS_HOST
+    if port <= 0:
+        return None
+    handler = type("MetricsHandler", (_Handler,), {"stale_sec": float(config.METRICS_HEALTH_STALE_SEC)})
+    try:
+        server = ThreadingHTTPServer((host, port), handler)
+    except OSError as exc:
+        log.error("[metrics] cannot listen on %s:%s: %r", host, port, exc)
+        return None
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    log.info("[metrics] serving http://%s:%d/metrics", host, server.server_address[1])
+    return server
@@ -0,0 +1,369 @@
+"""
+Pure-NumPy inference for the Conv1D pad_level classifier (no TensorFlow in the serving process).
+
+Network (``pad_classifier.build_pad_classifier``):
+  Conv1D(32, k=3, relu) → Conv1D(16, k=3, relu) → Flatten → Dense(32, relu) → Dense(4, softmax)
+
+Weights are extracted once (TensorFlow needed only for that step) into an ``.npz`` holding
+Keras-layout arrays:
+  conv1_w (k, cin, 32), conv1_b, conv2_w (k, 32, 16), conv2_b, dense1_w (in, 32), dense1_b,
+  dense2_w (32, 4), dense2_b
+
+``NumpyPadClassifier`` mirrors ``PadLevelTfliteInterpreter`` (predict_proba_timed / batch).
+``StreamingPadClassifier`` keeps the conv activations of the previous window and, when the new
+window is the old one shifted by one timestep, computes only the newest conv columns.
+"""
+from __future__ import annotations
+
+import os
+import time
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from . import config
+from .inference_utils import (
+    validate_classifier_output_probs,
+    validate_classifier_output_probs_batch,
+    validate_sequence_batch_shape,
+)
+
+WEIGHT_KEYS = (
+    "conv1_w",
+    "conv1_b",
+    "conv2_w",
+    "conv2_b",
+    "dense1_w",
+    "dense1_b",
+    "dense2_w",
+    "dense2_b",
+)
+
+
+def _weights_from_keras(path: str) -> Dict[str, np.ndarray]:
+    import tensorflow as tf
+
+    try:
+        model = tf.keras.models.load_model(path, compile=False, safe_mode=False)
+    except TypeError:
+        model = tf.keras.models.load_model(path, compile=False)
+    convs = [l for l in model.layers if isinstance(l, tf.keras.layers.Conv1D)]
+    denses = [l for l in model.layers if isinstance(l, tf.keras.layers.Dense)]
+    if len(convs) != 2 or len(denses) != 2:
+        raise ValueError(
+            "Expected Conv1D x2 + Dense x2 (build_pad_classifier); got %s Conv1D, %s Dense"
+            % (len(convs), len(denses))
+        )
+    out: Dict[str, np.ndarray] = {}
+    for name, layer in zip(("conv1", "conv2", "dense1", "dense2"), convs + denses):
+        w, b = layer.get_weights()
+        out[name + "_w"] = w
+        out[name + "_b"] = b
+    return out
+
+
+def _dequantize(interp: Any, detail: Dict[str, Any]) -> np.ndarray:
+    arr = interp.get_tensor(detail["index"])
+    if arr.dtype == np.float32:
+        return arr
+    q = detail["quantization_parameters"]
+    scales = np.asarray(q["scales"], dtype=np.float32)
+    zps = np.asarray(q["zero_points"], dtype=np.float32)
+    if scales.size == 0:
+        raise ValueError("Quantized tensor %s has no scales" % detail["name"])
+    shape = [1] * arr.ndim
+    if scales.size > 1:
+        shape[int(q["quantized_dimension"])] = scales.size
+    return (arr.astype(np.float32) - zps.reshape(shape)) * scales.reshape(shape)
+
+
+def _tflite_ops(interp: Any, path: str) -> list:
+    """
+    Op list via the interpreter's private ``_get_ops_details`` (no stability guarantee across TF
+    releases) — the reason the ``.keras`` source is preferred.
+    """
+    try:
+        return [
+            (op["op_name"], [int(i) for i in op["inputs"]]) for op in interp._get_ops_details()
+        ]
+    except (AttributeError, KeyError, TypeError) as exc:
+        raise RuntimeError(
+            "This TensorFlow version cannot list the ops of %s (%r). Export the weights from the "
+            "trained Keras model instead: python numpy_export.py --src %s"
+            % (path, exc, config.CLASSIFIER_MODEL_PATH)
+        ) from exc
+
+
+def _weights_from_tflite(path: str) -> Dict[str, np.ndarray]:
+    """
+    Walk CONV_2D / FULLY_CONNECTED ops in execution order; int8 weights are dequantized.
+    Fallback for when only the .tflite is at hand (relies on a private interpreter API).
+    """
+    import tensorflow as tf
+
+    interp = tf.lite.Interpreter(
+        model_path=path,
+        experimental_op_resolver_type=tf.lite.experimental.OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES,
+    )
+    interp.allocate_tensors()
+    details = {int(d["index"]): d for d in interp.get_tensor_details()}
+    convs, denses = [], []
+    for op_name, inputs in _tflite_ops(interp, path):
+        if op_name not in ("CONV_2D", "FULLY_CONNECTED"):
+            continue
+        _, w_idx, b_idx = inputs[:3]
+        w = _dequantize(interp, details[w_idx])
+        b = _dequantize(interp, details[b_idx])
+        if op_name == "CONV_2D":
+            convs.append((w[:, 0, :, :].transpose(1, 2, 0), b))  # (cout,1,k,cin) → (k,cin,cout)
+        else:
+            denses.append((w.T, b))  # (out,in) → (in,out)
+    if len(convs) != 2 or len(denses) != 2:
+        raise ValueError(
+            "Expected 2 CONV_2D + 2 FULLY_CONNECTED ops in %s; got %s / %s"
+            % (path, len(convs), len(denses))
+        )
+    out: Dict[str, np.ndarray] = {}
+    for name, (w, b) in zip(("conv1", "conv2", "dense1", "dense2"), convs + denses):
+        out[name + "_w"] = np.ascontiguousarray(w, dtype=np.float32)
+        out[name + "_b"] = np.asarray(b, dtype=np.float32)
+    return out
+
+
+def export_npz_weights(src_path: str, out_path: Optional[str] = None) -> str:
+    """
+    Extract weights from ``.keras`` / ``.h5`` (preferred) or ``.tflite`` into ``.npz``
+    (requires tensorflow).
+    """
+    src = os.path.abspath(src_path)
+    if not os.path.isfile(src):
+        raise FileNotFoundError(src)
+    if src.lower().endswith(".tflite"):
+        weights = _weights_from_tflite(src)
+    else:
+        weights = _weights_from_keras(src)
+    out = os.path.abspath(out_path or config.NUMPY_WEIGHTS_PATH)
+    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
+    np.savez(
+        out,
+        seq_len=np.int64(config.SEQ_LENGTH),
+        feature_dim=np.int64(config.FEATURE_DIM_SEQ),
+        **{k: np.asarray(v, dtype=np.float32) for k, v in weights.items()},
+    )
+    return out
+
+
+def _conv1d_relu(x: np.ndarray, w: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Valid Conv1D + ReLU as one matmul: x (N, L, C), w (k, C, F) → (N, L - k + 1, F)."""
+    k = w.shape[0]
+    l_out = x.shape[1] - k + 1
+    cols = np.concatenate([x[:, i : i + l_out, :] for i in range(k)], axis=2)
+    y = cols @ w.reshape(-1, w.shape[2])
+    y += b
+    return np.maximum(y, 0.0, out=y)
+
+
+class NumpyPadClassifier:
+    """Vectorized NumPy forward pass over weights from ``export_npz_weights``."""
+
+    backend = "numpy"
+    raw_inputs = False
+
+    def __init__(self, weights_path: str) -> None:
+        path = os.path.abspath(weights_path)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(path)
+        with np.load(path) as z:
+            missing = [k for k in WEIGHT_KEYS if k not in z.files]
+            if missing:
+                raise ValueError("%s missing weight arrays: %s" % (path, missing))
+            self._w = {k: np.ascontiguousarray(z[k], dtype=np.float32) for k in WEIGHT_KEYS}
+            seq_len = int(z["seq_len"]) if "seq_len" in z.files else config.SEQ_LENGTH
+        self.seq_len = int(config.SEQ_LENGTH)
+        self.feat_dim = int(config.FEATURE_DIM_SEQ)
+        if seq_len != self.seq_len or self._w["conv1_w"].shape[1] != self.feat_dim:
+            raise ValueError(
+                "NumPy weights expect (%s, %s) input; config is (%s, %s)"
+                % (seq_len, self._w["conv1_w"].shape[1], self.seq_len, self.feat_dim)
+            )
+
+    def forward(self, x: np.ndarray) -> np.ndarray:
+        """(N, SEQ_LENGTH, FEATURE_DIM_SEQ) float32 → (N, NUM_PAD_CLASSES) softmax."""
+        w = self._w
+        h = _conv1d_relu(x, w["conv1_w"], w["conv1_b"])
+        h = _conv1d_relu(h, w["conv2_w"], w["conv2_b"])
+        h = h.reshape(h.shape[0], -1) @ w["dense1_w"]
+        h += w["dense1_b"]
+        np.maximum(h, 0.0, out=h)
+        z = h @ w["dense2_w"]
+        z += w["dense2_b"]
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        z /= z.sum(axis=1, keepdims=True)
+        return z
+
+    def predict_class_index(self, x: np.ndarray) -> int:
+        probs, _ = self.predict_proba_timed(x)
+        return int(np.argmax(probs))
+
+    def predict_proba(self, x: np.ndarray) -> np.ndarray:
+        probs, _ = self.predict_proba_timed(x)
+        return probs
+
+    def predict_proba_timed(self, x: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Returns (validated probs (4,), latency_ms)."""
+        x = np.asarray(x, dtype=np.float32)
+        validate_sequence_batch_shape(x, self.seq_len, self.feat_dim)
+        t0 = time.perf_counter()
+        out = self.forward(x)
+        probs = validate_classifier_output_probs(out[0])
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        return probs, latency_ms
+
+    def predict_proba_batch(self, x: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Returns (validated probs (N, 4), batch latency_ms)."""
+        x = np.asarray(x, dtype=np.float32)
+        validate_sequence_batch_shape(x, self.seq_len, self.feat_dim, batch=None)
+        t0 = time.perf_counter()
+        probs = validate_classifier_output_probs_batch(self.forward(x))
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        return probs, latency_ms
+
+
+class _DoubledRing:
+    """(n, dim) sliding window stored twice so the newest n rows are always a contiguous view."""
+
+    def __init__(self, n: int, dim: int) -> None:
+        self.n = n
+        self._data = np.zeros((2 * n, dim), dtype=np.float32)
+        self._head = 0  # index of the oldest row of the current window
+
+    def fill(self, rows: np.ndarray) -> None:
+        self._data[: self.n] = rows
+        self._data[self.n :] = rows
+        self._head = 0
+
+    def push(self, row: np.ndarray) -> None:
+        i = self._head
+        self._data[i] = row
+        self._data[i + self.n] = row
+        self._head = (i + 1) % self.n
+
+    @property
+    def window(self) -> np.ndarray:
+        return self._data[self._head : self._head + self.n]
+
+
+def _column_relu(window: np.ndarray, w_flat: np.ndarray, b: np.ndarray) -> np.ndarray:
+    """Newest output column of a valid Conv1D + ReLU: last k rows of ``window`` → (F,)."""
+    k = w_flat.shape[0] // window.shape[1]
+    y = window[-k:].reshape(-1) @ w_flat
+    y += b
+    return np.maximum(y, 0.0, out=y)
+
+
+class StreamingPadClassifier(NumpyPadClassifier):
+    """
+    Incremental forward pass for a window that slides by one timestep per tick.
+
+    Caches the Conv1D(32) / Conv1D(16) outputs of the previous window; on a one-step shift only
+    the newest column of each conv is computed (the dense head still sees the whole flattened
+    conv2 output). Any other window (first call, gap, buffer clear, profile edit of past rows)
+    falls back to a full recompute, so results always equal ``NumpyPadClassifier.forward``.
+    One instance holds one stream: use a separate instance per vest.
+    """
+
+    backend = "stream"
+
+    def __init__(self, weights_path: str) -> None:
+        super().__init__(weights_path)
+        w = self._w
+        self._k1, _, f1 = w["conv1_w"].shape
+        self._k2, _, f2 = w["conv2_w"].shape
+        self._conv1_flat = np.ascontiguousarray(w["conv1_w"].reshape(-1, f1))
+        self._conv2_flat = np.ascontiguousarray(w["conv2_w"].reshape(-1, f2))
+        n1 = self.seq_len - self._k1 + 1
+        n2 = n1 - self._k2 + 1
+        self._x = _DoubledRing(self.seq_len, self.feat_dim)
+        self._h1 = _DoubledRing(n1, f1)
+        self._h2 = _DoubledRing(n2, f2)
+        self._primed = False
+        self.full_recomputes = 0
+        self.incremental_steps = 0
+
+    def reset(self) -> None:
+        self._primed = False
+
+    def _head(self) -> np.ndarray:
+        w = self._w
+        h = self._h2.window.reshape(1, -1) @ w["dense1_w"]
+        h += w["dense1_b"]
+        np.maximum(h, 0.0, out=h)
+        z = h @ w["dense2_w"]
+        z += w["dense2_b"]
+        z -= z.max(axis=1, keepdims=True)
+        np.exp(z, out=z)
+        z /= z.sum(axis=1, keepdims=True)
+        return z
+
+    def _full(self, window: np.ndarray) -> np.ndarray:
+        w = self._w
+        h1 = _conv1d_relu(window[None], w["conv1_w"], w["conv1_b"])[0]
+        h2 = _conv1d_relu(h1[None], w["conv2_w"], w["conv2_b"])[0]
+        self._x.fill(window)
+        self._h1.fill(h1)
+        self._h2.fill(h2)
+        self._primed = True
+        self.full_recomputes += 1
+        return self._head()
+
+    def step(self, row: np.ndarray) -> np.ndarray:
+        """Append one (FEATURE_DIM_SEQ,) row to the primed window → (1, NUM_PAD_CLASSES)."""
+        if not self._primed:
+            raise RuntimeError("StreamingPadClassifier.step() before a full window was seen")
+        w = self._w
+        self._x.push(row)
+        self._h1.push(_column_relu(self._x.window, self._conv1_flat, w["conv1_b"]))
+        self._h2.push(_column_relu(self._h1.window, self._conv2_flat, w["conv2_b"]))
+        self.incremental_steps += 1
+        return self._head()
+
+    def forward_window(self, window: np.ndarray) -> np.ndarray:
+        """(SEQ_LENGTH, FEATURE_DIM_SEQ) → (1, NUM_PAD_CLASSES); incremental when shifted by one."""
+        if self._primed and np.array_equal(window[:-1], self._x.window[1:]):
+            return self.step(window[-1])
+        return self._full(window)
+
+    def predict_proba_timed(self, x: np.ndarray) -> Tuple[np.ndarray, float]:
+        """Returns (validated probs (4,), latency_ms)."""
+        x = np.asarray(x, dtype=np.float32)
+        validate_sequence_batch_shape(x, self.seq_len, self.feat_dim)
+        t0 = time.perf_counter()
+        out = self.forward_window(x[0])
+        probs = validate_classifier_output_probs(out[0])
+        latency_ms = (time.perf_counter() - t0) * 1000.0
+        return probs, latency_ms
+
+
+def conv_head_flops(model: NumpyPadClassifier) -> Dict[str, int]:
+    """Multiply-adds per window: full recompute vs one incremental step (biases/activations ignored)."""
+    w = model._w
+    k1, cin, f1 = w["conv1_w"].shape
+    k2, _, f2 = w["conv2_w"].shape
+    n1 = model.seq_len - k1 + 1
+    n2 = n1 - k2 + 1
+    conv1_col = k1 * cin * f1
+    conv2_col = k2 * f1 * f2
+    head = w["dense1_w"].size + w["dense2_w"].size
+    return {
+        "full": n1 * conv1_col + n2 * conv2_col + head,
+        "incremental": conv1_col + conv2_col + head,
+    }
+
+
+def load_pad_level_numpy(path: Optional[str] = None) -> NumpyPadClassifier:
+    return NumpyPadClassifier(path or config.NUMPY_WEIGHTS_PATH)
+
+
+def load_pad_level_streaming(path: Optional[str] = None) -> StreamingPadClassifier:
+    return StreamingPadClassifier(path or config.NUMPY_WEIGHTS_PATH)
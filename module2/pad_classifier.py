@@ -4,6 +4,11 @@ Phase 2 — Conv1D sequence classifier for pad_level (4 classes).
 TensorFlow Lite–friendly: no LSTM/RNN (no TensorList). Input (batch, SEQ_LENGTH, FEATURE_DIM_SEQ).
 
 Loss: SparseCategoricalCrossentropy with label smoothing. Class weights: balanced.
+
+MODULE2_BALANCE_MODE=index trains from data_prep.load_sequence_dataset() instead of the
+oversampled X_seq_pad.npy: the stratified split is over the unbalanced windows, and each epoch
+gathers batches along a freshly drawn class-balanced index schedule of the training split
+(val / test stay unbalanced). Peak memory is the scaled timeseries plus one batch.
 """
 from __future__ import annotations
 
@@ -25,6 +30,7 @@ from tensorflow.keras.layers import Conv1D, Dense, Dropout, Flatten
 from tensorflow.keras.models import Sequential
 
 from . import config
+from .data_prep import SequenceWindowDataset, balanced_epoch_indices, load_sequence_dataset
 
 # Smaller head + stronger dropout to reduce overconfidence
 CLASSIFIER_DENSE_UNITS = 32
@@ -55,6 +61,52 @@ def _balanced_class_weight_dict(y: np.ndarray) -> Dict[int, float]:
     return {int(i): float(weights[i]) for i in range(config.NUM_PAD_CLASSES)}
 
 
+class WindowBatches(keras.utils.Sequence):
+    """
+    Keras batches gathered from a SequenceWindowDataset at ``positions``. With ``balanced`` the
+    order is ``balanced_epoch_indices`` over those positions, redrawn in ``on_epoch_end``.
+    """
+
+    def __init__(
+        self,
+        ds: SequenceWindowDataset,
+        positions: np.ndarray,
+        batch_size: int,
+        balanced: bool = False,
+        seed: Optional[int] = None,
+    ) -> None:
+        super().__init__()
+        self.ds = ds
+        self.positions = np.asarray(positions, dtype=np.int64)
+        self.batch_size = int(batch_size)
+        self.balanced = balanced
+        self.seed = config.SHUFFLE_SEED if seed is None else int(seed)
+        self.epoch = 0
+        self._labels = ds.y[ds.ends[self.positions]]
+        self.order = self._schedule()
+
+    def _schedule(self) -> np.ndarray:
+        if not self.balanced:
+            return self.positions
+        return self.positions[balanced_epoch_indices(self._labels, self.epoch, self.seed)]
+
+    @property
+    def labels(self) -> np.ndarray:
+        """Labels in the current epoch's order."""
+        return self.ds.y[self.ds.ends[self.order]]
+
+    def __len__(self) -> int:
+        return (len(self.order) + self.batch_size - 1) // self.batch_size
+
+    def __getitem__(self, i: int):
+        pos = self.order[i * self.batch_size : (i + 1) * self.batch_size]
+        return self.ds.windows(pos), self.ds.y[self.ds.ends[pos]]
+
+    def on_epoch_end(self) -> None:
+        self.epoch += 1
+        self.order = self._schedule()
+
+
 def build_pad_classifier(
     seq_length: Optional[int] = None,
     feature_dim: Optional[int] = None,
@@ -99,12 +151,17 @@ def _print_label_distribution(name: str, y: np.ndarray) -> None:
 
 def run():
     keras.backend.clear_session()
-    X = np.load(os.path.join(config.DATA_DIR, "X_seq_pad.npy"))
-    y = np.load(os.path.join(config.DATA_DIR, "y_pad_class_seq.npy"))
+    index_mode = config.BALANCE_MODE == "index"
+    if index_mode:
+        ds = load_sequence_dataset()
+        y = ds.labels
+        seq_len, n_features = ds.seq_len, ds.X.shape[1]
+    else:
+        X = np.load(os.path.join(config.DATA_DIR, "X_seq_pad.npy"))
+        y = np.load(os.path.join(config.DATA_DIR, "y_pad_class_seq.npy"))
+        seq_len, n_features = X.shape[1], X.shape[2]
 
     num_classes = config.NUM_PAD_CLASSES
-    n_features = X.shape[2]
-    seq_len = X.shape[1]
     assert n_features == config.FEATURE_DIM_SEQ, (
         "Expected %d sequence features, got %d — re-run data_prep.run()"
         % (config.FEATURE_DIM_SEQ, n_features)
@@ -114,14 +171,29 @@ def run():
     print("\n=== Class distribution (full sequence set, before train/val/test split) ===")
     _print_label_distribution("All", y)
 
-    X_train, y_train, X_val, y_val, X_test, y_test = _split_stratified_holdout(X, y)
+    batch_size = config.BATCH_SIZE_CLASSIFIER
+    if index_mode:
+        pos_train, y_train, pos_val, y_val, pos_test, y_test = _split_stratified_holdout(
+            np.arange(len(y)), y
+        )
+        train_data = WindowBatches(ds, pos_train, batch_size, balanced=True)
+        fit_data = dict(x=train_data, validation_data=WindowBatches(ds, pos_val, batch_size))
+        test_data = WindowBatches(ds, pos_test, batch_size)
+        y_fit = train_data.labels
+    else:
+        X_train, y_train, X_val, y_val, X_test, y_test = _split_stratified_holdout(X, y)
+        fit_data = dict(x=X_train, y=y_train, batch_size=batch_size, validation_data=(X_val, y_val))
+        test_data = X_test
+        y_fit = y_train
 
     print("\n=== Class distribution (splits) ===")
     _print_label_distribution("Train", y_train)
+    if index_mode:
+        _print_label_distribution("Train (balanced index schedule, epoch 0)", y_fit)
     _print_label_distribution("Val", y_val)
     _print_label_distribution("Test", y_test)
 
-    class_weight = _balanced_class_weight_dict(y_train)
+    class_weight = _balanced_class_weight_dict(y_fit)
     print("\nclass_weight (balanced on train):", class_weight)
 
     model = build_pad_classifier(seq_len, n_features, num_classes)
@@ -142,11 +214,8 @@ def run():
         ),
     ]
     model.fit(
-        X_train,
-        y_train,
+        **fit_data,
         epochs=config.EPOCHS_CLASSIFIER,
-        batch_size=config.BATCH_SIZE_CLASSIFIER,
-        validation_data=(X_val, y_val),
         callbacks=callbacks,
         class_weight=class_weight,
         verbose=1,
@@ -155,7 +224,7 @@ def run():
     model.save(config.CLASSIFIER_MODEL_PATH)
     print("Saved classifier to", config.CLASSIFIER_MODEL_PATH)
 
-    y_pred = np.argmax(model.predict(X_test, verbose=0), axis=1)
+    y_pred = np.argmax(model.predict(test_data, verbose=0), axis=1)
     labels = list(config.PAD_LEVEL_CLASSES)
 
     acc = float(np.mean(y_pred == y_test))
@@ -185,7 +254,8 @@ def run():
             "Pad level classifier (Conv1D, sparse CE + label smoothing, balanced class_weight) — test set\n"
         )
         f.write(
-            "seq_len=%d n_features=%d num_classes=%d dense=%s dropout=%s label_smoothing=%s\n"
+            "seq_len=%d n_features=%d num_classes=%d dense=%s dropout=%s label_smoothing=%s"
+            " balance=%s\n"
             % (
                 seq_len,
                 n_features,
@@ -193,6 +263,7 @@ def run():
                 CLASSIFIER_DENSE_UNITS,
                 CLASSIFIER_DROPOUT,
                 LABEL_SMOOTHING,
+                config.BALANCE_MODE,
             )
         )
         f.write(f"Accuracy: {acc:.4f}\n")
@@ -0,0 +1,123 @@
+"""
+Thread-safe TTL + LRU cache with single-flight loading.
+
+``get_or_load(key, loader)`` returns a fresh cached value, or runs ``loader()`` — but only once
+per key at a time: concurrent callers that miss on the same key wait for the in-flight load
+and share its result (or its exception). At most ``maxsize`` keys are kept; the least recently
+used is evicted. ``loader`` returning None is passed through but not cached.
+
+Used by user_profile so Firebase listener threads that all need the active user's profile
+trigger one read instead of one each.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+
+class _Flight:
+    __slots__ = ("done", "value", "error")
+
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlightCache:
+    """``maxsize`` entries, each valid for ``ttl_sec`` (0: share in-flight loads only, keep nothing)."""
+
+    def __init__(self, maxsize: int = 64, ttl_sec: float = 5.0) -> None:
+        self.maxsize = max(1, int(maxsize))
+        self.ttl_sec = float(ttl_sec)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._flights: Dict[Hashable, _Flight] = {}
+        self.hits = 0
+        self.misses = 0
+        self.joined = 0
+        self.evicted = 0
+
+    def _fresh(self, key: Hashable, now: float) -> Tuple[bool, Any]:
+        """(found, value) for an unexpired entry (lock held); expired entries are removed."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        stored_at, value = entry
+        if now - stored_at > self.ttl_sec:
+            del self._entries[key]
+            return False, None
+        self._entries.move_to_end(key)
+        return True, value
+
+    def _store(self, key: Hashable, value: Any, now: float) -> None:
+        """Insert / refresh ``key`` and evict beyond ``maxsize`` (lock held)."""
+        if self.ttl_sec <= 0:
+            return
+        self._entries[key] = (now, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evicted += 1
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            found, value = self._fresh(key, time.monotonic())
+            return value if found else None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._store(key, value, time.monotonic())
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop ``key`` (or every entry). Loads already in flight still complete and are cached."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        with self._lock:
+            found, value = self._fresh(key, time.monotonic())
+            if found:
+                self.hits += 1
+                return value
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = _Flight()
+                self._flights[key] = flight
+                self.misses += 1
+            else:
+                self.joined += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+        try:
+            flight.value = loader()
+        except BaseException as exc:
+            flight.error = exc
+            raise
+        finally:
+            with self._lock:
+                if flight.error is None and flight.value is not None:
+                    self._store(key, flight.value, time.monotonic())
+                del self._flights[key]
+            flight.done.set()
+        return flight.value
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "size": len(self._entries),
+                "in_flight": len(self._flights),
+                "hits": self.hits,
+                "misses": self.misses,
+                "joined": self.joined,
+                "evicted": self.evicted,
+            }
@@ -1,26 +1,43 @@
 """
 Rolling window of raw feature rows aligned with training (10-D, FEATURE_COLS_SEQ order).
 
-Scaling is applied outside this module, after the full (SEQ_LENGTH, 10) matrix is built.
+Scaling (deque backend) is applied after the full (SEQ_LENGTH, 10) matrix is built.
+
+Backends (``make_feature_buffer`` / config.ROLLING_BUFFER_BACKEND):
+- ``deque``: one ndarray per push, ``np.stack`` per read (reference implementation)
+- ``raw``: (SEQ_LENGTH + 1, 7) raw sensor/profile rows for the raw-input TFLite model
+  (``tflite_convert.py --raw-inputs``); features and scaling run inside the graph
+- ``ring``: preallocated (SEQ_LENGTH, 10) float32 ring written in place; windows are rolled
+  into a reused output array (no per-tick allocation). Scaling is fused: the attached
+  scaler's mean_/scale_ are applied per row on push, so the model input never goes through sklearn.
 """
 from __future__ import annotations
 
 from collections import deque
 import time
-from typing import Deque, Optional
+from typing import Any, Deque, Optional
 
 import numpy as np
 
 from . import config
-from .inference_utils import validate_raw_feature_matrix, validate_runtime_feature_vector
+from .inference_utils import (
+    standard_scaler_affine,
+    validate_raw_feature_matrix,
+    validate_runtime_feature_vector,
+)
+from .metrics import inc
+from .stage_timing import record, timed
 
 # Match data_prep: consecutive diffs of temp / pulse, then clip
-_TEMP_STEP_CLIP = (-1.0, 1.0)
-_PULSE_STEP_CLIP = (-10.0, 10.0)
+TEMP_STEP_CLIP = (-1.0, 1.0)
+PULSE_STEP_CLIP = (-10.0, 10.0)
+# temp_delta = temp - TEMP_DELTA_REF_C; motion → 1.0 iff >= MOTION_BIN_THRESHOLD
+TEMP_DELTA_REF_C = 36.5
+MOTION_BIN_THRESHOLD = 0.5
 
 
 def _motion_bin(m: float) -> float:
-    return 1.0 if float(m) >= 0.5 else 0.0
+    return 1.0 if float(m) >= MOTION_BIN_THRESHOLD else 0.0
 
 
 class RollingFeatureBuffer:
@@ -49,6 +66,7 @@ class RollingFeatureBuffer:
             return False
         if now - self._last_push_monotonic > idle_sec:
             self.clear()
+            inc("buffer_stale_resets_total")
             return True
         return False
 
@@ -65,15 +83,16 @@ class RollingFeatureBuffer:
         weight: float,
         gender: float,
     ) -> None:
+        t0 = time.perf_counter()
         motion_b = _motion_bin(motion)
-        temp_delta = float(temp) - 36.5
+        temp_delta = float(temp) - TEMP_DELTA_REF_C
         if not self._rows:
             t_step = 0.0
             p_step = 0.0
         else:
             prev = self._rows[-1]
-            t_step = float(np.clip(float(temp) - float(prev[0]), *_TEMP_STEP_CLIP))
-            p_step = float(np.clip(float(pulse) - float(prev[2]), *_PULSE_STEP_CLIP))
+            t_step = float(np.clip(float(temp) - float(prev[0]), *TEMP_STEP_CLIP))
+            p_step = float(np.clip(float(pulse) - float(prev[2]), *PULSE_STEP_CLIP))
         row = np.array(
             [
                 float(temp),
@@ -92,6 +111,7 @@ class RollingFeatureBuffer:
         validate_runtime_feature_vector(row)
         self._last_push_monotonic = time.monotonic()
         self._rows.append(row)
+        record("buffer.push", (time.perf_counter() - t0) * 1000.0)
 
     def raw_window(self) -> Optional[np.ndarray]:
         if len(self._rows) < self.seq_len:
@@ -100,6 +120,11 @@ class RollingFeatureBuffer:
         validate_raw_feature_matrix(out)
         return out
 
+    def model_input(self, scaler) -> Optional[np.ndarray]:
+        """Tensor for the serving model (scaled window here; raw rows for ``RawObservationBuffer``)."""
+        with timed("buffer.model_input"):
+            return self.scaled_window(scaler)
+
     def scaled_window(self, scaler) -> Optional[np.ndarray]:
         """
         Apply ``scaler.transform`` only (inference must never call ``fit`` on this scaler).
@@ -115,3 +140,234 @@ class RollingFeatureBuffer:
         return scaler.transform(raw).astype(np.float32).reshape(
             1, self.seq_len, raw.shape[1]
         )
+
+
+class RingFeatureBuffer(RollingFeatureBuffer):
+    """
+    Same contract as ``RollingFeatureBuffer`` backed by a preallocated float32 ring.
+
+    Fused scaling: once a StandardScaler is attached (``attach_scaler`` or the first
+    ``scaled_window(scaler)`` call), its ``mean_`` / ``scale_`` are captured and each row is scaled
+    on push into a doubled ring (every row stored at ``i`` and ``i + SEQ_LENGTH``), so the
+    (1, SEQ_LENGTH, 10) float32 model input is a contiguous view — no sklearn call, no copy.
+
+    ``raw_window()`` / ``scaled_window()`` return views of internal buffers that are overwritten
+    by the next push — copy them if they must outlive the tick.
+    """
+
+    def __init__(self, seq_len: Optional[int] = None, scaler: Any = None) -> None:
+        super().__init__(seq_len)
+        n, f = self.seq_len, config.FEATURE_DIM_SEQ
+        self._ring = np.zeros((n, f), dtype=np.float32)
+        self._window = np.zeros((n, f), dtype=np.float32)
+        self._row = np.zeros(f, dtype=np.float64)  # float64 scratch for the newest row
+        self._head = 0  # next row to write
+        self._count = 0
+        self._prev_temp = 0.0
+        self._prev_pulse = 0.0
+        self._scaler: Any = None
+        self._mean: Optional[np.ndarray] = None
+        self._scale: Optional[np.ndarray] = None
+        self._scaled = np.zeros((2 * n, f), dtype=np.float32)
+        # One (1, n, f) view per head position: the hot path allocates nothing.
+        self._scaled_views = [self._scaled[h : h + n].reshape(1, n, f) for h in range(n)]
+        if scaler is not None:
+            self.attach_scaler(scaler)
+
+    def attach_scaler(self, scaler: Any) -> None:
+        """
+        Capture ``scaler.mean_`` / ``scale_`` (transform only — never fit) and scale rows on push.
+        Rows already in the ring are rescaled. Only a StandardScaler's affine can be fused: any
+        other scaler raises TypeError (use the ``deque`` backend, which calls ``transform``).
+        """
+        mean, scale = standard_scaler_affine(scaler)
+        self._scaler = scaler
+        self._mean = mean
+        self._scale = scale
+        scaled = ((self._ring.astype(np.float64) - mean) / scale).astype(np.float32)
+        self._scaled[: self.seq_len] = scaled
+        self._scaled[self.seq_len :] = scaled
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self._last_push_monotonic = None
+
+    def __len__(self) -> int:
+        return self._count
+
+    def push_observation(
+        self,
+        temp: float,
+        pulse: float,
+        motion: float,
+        age: float,
+        height: float,
+        weight: float,
+        gender: float,
+    ) -> None:
+        t0 = time.perf_counter()
+        temp = float(temp)
+        pulse = float(pulse)
+        if self._count == 0:
+            t_step = 0.0
+            p_step = 0.0
+        else:
+            t_step = min(max(temp - self._prev_temp, TEMP_STEP_CLIP[0]), TEMP_STEP_CLIP[1])
+            p_step = min(max(pulse - self._prev_pulse, PULSE_STEP_CLIP[0]), PULSE_STEP_CLIP[1])
+        row = self._row
+        row[0] = temp
+        row[1] = temp - TEMP_DELTA_REF_C
+        row[2] = pulse
+        row[3] = _motion_bin(motion)
+        row[4] = age
+        row[5] = height
+        row[6] = weight
+        row[7] = gender
+        row[8] = t_step
+        row[9] = p_step
+        h = self._head
+        self._ring[h] = row
+        if self._mean is not None:
+            np.subtract(row, self._mean, out=row)
+            np.divide(row, self._scale, out=row)
+            self._scaled[h] = row
+            self._scaled[h + self.seq_len] = row
+        self._prev_temp = temp
+        self._prev_pulse = pulse
+        self._head = (h + 1) % self.seq_len
+        if self._count < self.seq_len:
+            self._count += 1
+        self._last_push_monotonic = time.monotonic()
+        record("buffer.push", (time.perf_counter() - t0) * 1000.0)
+
+    def raw_window(self) -> Optional[np.ndarray]:
+        if self._count < self.seq_len:
+            return None
+        # Oldest row sits at head once full: roll [head:] + [:head] into the reused window.
+        tail = self.seq_len - self._head
+        self._window[:tail] = self._ring[self._head :]
+        self._window[tail:] = self._ring[: self._head]
+        return self._window
+
+    def scaled_window(self, scaler) -> Optional[np.ndarray]:
+        """
+        (1, SEQ_LENGTH, 10) float32 scaled window. Attaches ``scaler`` on first use (or when a
+        different scaler object is passed), then serves from the pre-scaled ring.
+        """
+        if self._count < self.seq_len:
+            return None
+        if scaler is not None and scaler is not self._scaler:
+            self.attach_scaler(scaler)
+        if self._mean is None:
+            raise ValueError("scaled_window needs a scaler (none attached)")
+        return self._scaled_views[self._head]
+
+
+class RawObservationBuffer(RollingFeatureBuffer):
+    """
+    Raw (temp, pulse, motion, age, height, weight, gender) rows for the raw-input TFLite model.
+
+    Holds SEQ_LENGTH + 1 rows in a doubled float32 ring; the leading row is the observation before
+    the window (the first push after ``clear`` is duplicated, giving step 0 like the feature
+    buffer). Warm after SEQ_LENGTH pushes. ``model_input()`` returns a (1, SEQ_LENGTH + 1, 7)
+    view that is overwritten by the next push.
+    """
+
+    def __init__(self, seq_len: Optional[int] = None) -> None:
+        super().__init__(seq_len)
+        n, f = self.seq_len + 1, config.RAW_INPUT_DIM
+        self._cap = n
+        self._raw = np.zeros((2 * n, f), dtype=np.float32)
+        self._views = [self._raw[h : h + n].reshape(1, n, f) for h in range(n)]
+        self._row = np.zeros(f, dtype=np.float32)
+        self._head = 0
+        self._count = 0
+
+    def clear(self) -> None:
+        self._head = 0
+        self._count = 0
+        self._last_push_monotonic = None
+
+    def __len__(self) -> int:
+        return min(self._count, self.seq_len)
+
+    def _write(self, row: np.ndarray) -> None:
+        h = self._head
+        self._raw[h] = row
+        self._raw[h + self._cap] = row
+        self._head = (h + 1) % self._cap
+
+    def push_observation(
+        self,
+        temp: float,
+        pulse: float,
+        motion: float,
+        age: float,
+        height: float,
+        weight: float,
+        gender: float,
+    ) -> None:
+        t0 = time.perf_counter()
+        row = self._row
+        row[0] = temp
+        row[1] = pulse
+        row[2] = motion
+        row[3] = age
+        row[4] = height
+        row[5] = weight
+        row[6] = gender
+        if self._count == 0:
+            self._write(row)
+        self._write(row)
+        self._count += 1
+        self._last_push_monotonic = time.monotonic()
+        record("buffer.push", (time.perf_counter() - t0) * 1000.0)
+
+    def raw_window(self) -> Optional[np.ndarray]:
+        """(SEQ_LENGTH + 1, 7) raw rows, oldest first (view)."""
+        if self._count < self.seq_len:
+            return None
+        return self._views[self._head][0]
+
+    def model_input(self, scaler=None) -> Optional[np.ndarray]:
+        if self._count < self.seq_len:
+            return None
+        return self._views[self._head]
+
+    def scaled_window(self, scaler) -> Optional[np.ndarray]:
+        raise TypeError(
+            "RawObservationBuffer feeds the raw-input model; scaling happens inside the graph"
+        )
+
+
+BUFFER_BACKENDS = {
+    "deque": RollingFeatureBuffer,
+    "ring": RingFeatureBuffer,
+    "raw": RawObservationBuffer,
+}
+
+
+def make_feature_buffer(
+    seq_len: Optional[int] = None, backend: Optional[str] = None
+) -> RollingFeatureBuffer:
+    """Rolling buffer for ``backend`` (default config.ROLLING_BUFFER_BACKEND)."""
+    name = (backend or getattr(config, "ROLLING_BUFFER_BACKEND", "deque")).strip().lower()
+    try:
+        cls = BUFFER_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            "Unknown rolling buffer backend %r (expected one of %s)"
+            % (name, sorted(BUFFER_BACKENDS))
+        )
+    return cls(seq_len)
+
+
+def validate_buffer_scaler(scaler: Any, backend: Optional[str] = None) -> None:
+    """
+    Fail at load, not on the first warm tick: the ``ring`` backend fuses the StandardScaler
+    affine, so any other scaler raises TypeError here (see ``standard_scaler_affine``).
+    """
+    name = (backend or getattr(config, "ROLLING_BUFFER_BACKEND", "deque")).strip().lower()
+    if name == "ring":
+        standard_scaler_affine(scaler)
@@ -0,0 +1,340 @@
+"""
+Pluggable Realtime Database client: ``firebase_admin.db`` or an in-memory stand-in.
+
+Runtime modules only use ``get_db().reference(path)`` and, on the reference, ``get`` (with
+``shallow=True``), ``set``, ``update``, ``delete``, ``listen`` and
+``order_by_key().limit_to_first(n).get()``. ``InMemoryRTDB`` implements that subset on a local
+tree, so the pipeline, bridge and profile code run unchanged without a Firebase project:
+
+    MODULE2_DB_BACKEND=memory MODULE2_MEMORY_DB_JSON=data/rtdb_seed.json \\
+        MODULE2_MEMORY_DB_LATENCY_MS=30 python realtime_firebase_pipeline.py
+
+or in-process (benchmarks): ``set_db(InMemoryRTDB(latency_ms=30, seed=0))``.
+
+Listeners behave like the SDK's: each ``listen`` gets its own delivery thread, the first event
+is ``put "/"`` with the current subtree, then ``put`` / ``patch`` events with paths relative to
+the listened node. Injected latency (``latency_ms`` ± ``jitter_ms`` per call, ``event_latency_ms``
+per delivered event) comes from a seeded RNG, so runs are repeatable.
+"""
+from __future__ import annotations
+
+import copy
+import json
+import queue
+import random
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from . import config
+
+
+def _keys(path: str) -> List[str]:
+    return [k for k in str(path or "").strip("/").split("/") if k]
+
+
+def _prune(value: Any) -> Any:
+    """RTDB has no empty objects: drop None / empty children recursively (None if nothing is left)."""
+    if isinstance(value, dict):
+        out = {}
+        for k, v in value.items():
+            v = _prune(v)
+            if v is not None:
+                out[str(k)] = v
+        return out or None
+    return value
+
+
+class MemoryEvent:
+    """Shape of ``firebase_admin.db.Event`` (event_type, path, data)."""
+
+    __slots__ = ("event_type", "path", "data")
+
+    def __init__(self, event_type: str, path: str, data: Any) -> None:
+        self.event_type = event_type
+        self.path = path
+        self.data = data
+
+
+class MemoryListenerRegistration:
+    """Delivers queued events to ``callback`` on its own thread; ``close()`` stops it."""
+
+    def __init__(self, owner: "InMemoryRTDB", path: str, callback: Callable[[Any], None]) -> None:
+        self.path = path
+        self._owner = owner
+        self._callback = callback
+        self._queue: "queue.Queue[Optional[MemoryEvent]]" = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="memory-rtdb-listen", daemon=True)
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            if event is None:
+                return
+            self._owner._delay(self._owner.event_latency_ms, 0.0)
+            try:
+                self._callback(event)
+            except Exception:
+                pass  # the SDK drops callback errors too; the listener keeps running
+
+    def close(self) -> None:
+        self._owner._unlisten(self)
+        self._queue.put(None)
+
+
+class MemoryQuery:
+    """``order_by_key()`` with ``limit_to_first`` / ``limit_to_last``."""
+
+    def __init__(self, ref: "MemoryReference") -> None:
+        self._ref = ref
+        self._first: Optional[int] = None
+        self._last: Optional[int] = None
+
+    def limit_to_first(self, n: int) -> "MemoryQuery":
+        self._first = int(n)
+        return self
+
+    def limit_to_last(self, n: int) -> "MemoryQuery":
+        self._last = int(n)
+        return self
+
+    def get(self) -> Any:
+        value = self._ref.get()
+        if not isinstance(value, dict):
+            return value
+        keys = sorted(value)
+        if self._first is not None:
+            keys = keys[: self._first]
+        if self._last is not None:
+            keys = keys[-self._last :] if self._last else []
+        return {k: value[k] for k in keys}
+
+
+class MemoryReference:
+    def __init__(self, owner: "InMemoryRTDB", path: str) -> None:
+        self._owner = owner
+        self.path = "/".join(_keys(path))
+        self.key = self.path.rsplit("/", 1)[-1] if self.path else None
+
+    def child(self, path: str) -> "MemoryReference":
+        return MemoryReference(self._owner, "%s/%s" % (self.path, path))
+
+    def get(self, shallow: bool = False) -> Any:
+        return self._owner._get(self.path, shallow)
+
+    def set(self, value: Any) -> None:
+        self._owner._set(self.path, value)
+
+    def update(self, value: Dict[str, Any]) -> None:
+        if not isinstance(value, dict) or not value:
+            raise ValueError("update() needs a non-empty dict")
+        self._owner._update(self.path, value)
+
+    def delete(self) -> None:
+        self._owner._set(self.path, None)
+
+    def listen(self, callback: Callable[[Any], None]) -> MemoryListenerRegistration:
+        return self._owner._listen(self.path, callback)
+
+    def order_by_key(self) -> MemoryQuery:
+        return MemoryQuery(self)
+
+
+class InMemoryRTDB:
+    """
+    Thread-safe RTDB tree with the ``firebase_admin.db`` module's ``reference()`` entry point.
+
+    ``stats()`` counts reads / writes / delivered events for load tests.
+    """
+
+    def __init__(
+        self,
+        data: Any = None,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        event_latency_ms: float = 0.0,
+        seed: Optional[int] = 0,
+    ) -> None:
+        self.latency_ms = float(latency_ms)
+        self.jitter_ms = float(jitter_ms)
+        self.event_latency_ms = float(event_latency_ms)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._lock = threading.Lock()
+        self._root: Any = _prune(copy.deepcopy(data))
+        self._listeners: List[MemoryListenerRegistration] = []
+        self.reads = 0
+        self.writes = 0
+        self.events = 0
+
+    def reference(self, path: str = "/") -> MemoryReference:
+        return MemoryReference(self, path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "reads": self.reads,
+                "writes": self.writes,
+                "events": self.events,
+                "listeners": len(self._listeners),
+            }
+
+    def _delay(self, base_ms: float, jitter_ms: float) -> None:
+        if base_ms <= 0.0 and jitter_ms <= 0.0:
+            return
+        if jitter_ms > 0.0:
+            with self._rng_lock:
+                base_ms += self._rng.uniform(-jitter_ms, jitter_ms)
+        if base_ms > 0.0:
+            time.sleep(base_ms / 1000.0)
+
+    def _node(self, keys: List[str]) -> Any:
+        node = self._root
+        for k in keys:
+            if not isinstance(node, dict):
+                return None
+            node = node.get(k)
+        return node
+
+    def _put(self, keys: List[str], value: Any) -> None:
+        value = _prune(copy.deepcopy(value))
+        if not keys:
+            self._root = value
+            return
+        if not isinstance(self._root, dict):
+            if value is None:
+                return
+            self._root = {}
+        parents = []
+        node = self._root
+        for k in keys[:-1]:
+            if not isinstance(node, dict):
+                return
+            child = node.get(k)
+            if not isinstance(child, dict):
+                if value is None:
+                    return
+                child = node[k] = {}
+            parents.append((node, k))
+            node = child
+        if value is None:
+            node.pop(keys[-1], None)
+            # Deleting the last child removes the (now empty) parents as well.
+            while parents and not node:
+                node, k = parents.pop()
+                node.pop(k, None)
+            if self._root == {}:
+                self._root = None
+        else:
+            node[keys[-1]] = value
+
+    def _get(self, path: str, shallow: bool) -> Any:
+        self._delay(self.latency_ms, self.jitter_ms)
+        with self._lock:
+            self.reads += 1
+            value = self._node(_keys(path))
+            if shallow and isinstance(value, dict):
+                return {k: (True if isinstance(v, dict) else v) for k, v in value.items()}
+            return copy.deepcopy(value)
+
+    def _set(self, path: str, value: Any) -> None:
+        self._delay(self.latency_ms, self.jitter_ms)
+        keys = _keys(path)
+        with self._lock:
+            self.writes += 1
+            self._put(keys, value)
+            self._notify(keys, "put", value, [keys])
+
+    def _update(self, path: str, value: Dict[str, Any]) -> None:
+        self._delay(self.latency_ms, self.jitter_ms)
+        keys = _keys(path)
+        with self._lock:
+            self.writes += 1
+            touched = [keys + _keys(k) for k in value]
+            for k, v in value.items():
+                self._put(keys + _keys(k), v)
+            self._notify(keys, "patch", value, touched)
+
+    def _notify(
+        self, keys: List[str], event_type: str, data: Any, touched: List[List[str]]
+    ) -> None:
+        """
+        Queue events (lock held): listeners at or above the written node get the write itself,
+        listeners below the written node whose subtree changed get ``put "/"`` with all of it.
+        """
+        for reg in self._listeners:
+            lkeys = _keys(reg.path)
+            if keys[: len(lkeys)] == lkeys:
+                rel = "/" + "/".join(keys[len(lkeys) :])
+                event = MemoryEvent(event_type, rel, copy.deepcopy(data))
+            elif any(lkeys[: len(t)] == t or t[: len(lkeys)] == lkeys for t in touched):
+                event = MemoryEvent("put", "/", copy.deepcopy(self._node(lkeys)))
+            else:
+                continue
+            self.events += 1
+            reg._queue.put(event)
+
+    def _listen(self, path: str, callback: Callable[[Any], None]) -> MemoryListenerRegistration:
+        reg = MemoryListenerRegistration(self, path, callback)
+        with self._lock:
+            self._listeners.append(reg)
+            self.events += 1
+            reg._queue.put(MemoryEvent("put", "/", copy.deepcopy(self._node(_keys(path)))))
+        reg._thread.start()
+        return reg
+
+    def _unlisten(self, reg: MemoryListenerRegistration) -> None:
+        with self._lock:
+            if reg in self._listeners:
+                self._listeners.remove(reg)
+
+
+_client: Any = None
+_client_lock = threading.Lock()
+
+
+def using_memory_db() -> bool:
+    return isinstance(_client, InMemoryRTDB) or (
+        _client is None and getattr(config, "DB_BACKEND", "firebase") == "memory"
+    )
+
+
+def memory_db_from_config() -> InMemoryRTDB:
+    """InMemoryRTDB seeded from config.MEMORY_DB_JSON (if set) with the configured latency."""
+    data = None
+    if config.MEMORY_DB_JSON:
+        with open(config.MEMORY_DB_JSON, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    return InMemoryRTDB(
+        data,
+        latency_ms=config.MEMORY_DB_LATENCY_MS,
+        jitter_ms=config.MEMORY_DB_JITTER_MS,
+        event_latency_ms=config.MEMORY_DB_EVENT_LATENCY_MS,
+    )
+
+
+def get_db() -> Any:
+    """
+    Active client: the one passed to ``set_db``, else an InMemoryRTDB when
+    MODULE2_DB_BACKEND=memory, else ``firebase_admin.db`` (ImportError if not installed).
+    """
+    global _client
+    if _client is not None:
+        return _client
+    with _client_lock:
+        if _client is None:
+            if getattr(config, "DB_BACKEND", "firebase") == "memory":
+                _client = memory_db_from_config()
+            else:
+                from firebase_admin import db  # type: ignore
+
+                _client = db
+    return _client
+
+
+def set_db(client: Any) -> Any:
+    """Use ``client`` (anything with ``reference(path)``) for every module; returns it."""
+    global _client
+    with _client_lock:
+        _client = client
+    return client
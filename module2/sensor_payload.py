@@ -10,6 +10,8 @@ from __future__ import annotations
 
 from typing import Any, Dict, Optional
 
+from .rtdb import get_db
+
 
 def _to_float(v: Any) -> Optional[float]:
     if v is None:
@@ -62,6 +64,17 @@ def _normalize_sensor_dict(d: Any) -> Optional[Dict[str, float]]:
     }
 
 
+def resolve_sensor_payload(latest: Any, user_sensor: Any) -> Optional[Dict[str, float]]:
+    """
+    Same priority as get_sensor_payload over snapshots already in hand (e.g. a listener mirror):
+    sensors/latest first, then users/{uid}/sensor. No Firebase reads.
+    """
+    out = _normalize_sensor_dict(latest)
+    if out is not None:
+        return out
+    return _normalize_sensor_dict(user_sensor)
+
+
 def get_sensor_payload(uid: Optional[str]) -> Optional[Dict[str, float]]:
     """
     Step 1: Try sensors/latest.
@@ -69,7 +82,7 @@ def get_sensor_payload(uid: Optional[str]) -> Optional[Dict[str, float]]:
     Returns normalized payload or None.
     """
     try:
-        from firebase_admin import db  # type: ignore
+        db = get_db()
     except Exception:
         return None
 
@@ -0,0 +1,157 @@
+"""
+Event-driven Firebase RTDB ingestion: ``db.reference(path).listen`` with a local mirror.
+
+Each listened path keeps an in-memory copy of its subtree, updated from the stream's
+``put`` / ``patch`` events (no extra reads). Bursts are coalesced: the consumer wakes once,
+drains the set of changed top-level keys (e.g. uids under ``users``) and reads only the latest
+state of those keys from the mirror. With ``children`` a key is only marked changed when one
+of those children below it changes (fleet: ``users/{uid}/sensor``, not the pipeline's own
+``users/{uid}/heating`` writes echoing back).
+
+``alive()`` is False when ``listen`` failed or a listener thread stopped, so callers can fall
+back to polling and retry ``start()`` later.
+"""
+from __future__ import annotations
+
+import copy
+import functools
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set
+
+from .log import get_logger
+
+log = get_logger("stream")
+
+ALL_KEYS = ""  # dirty marker: the whole subtree was replaced
+
+
+def apply_stream_event(tree: Any, path: str, data: Any, event_type: str = "put") -> Any:
+    """
+    Apply one RTDB stream event to ``tree`` (mutated in place where possible); returns the new root.
+
+    ``put`` replaces the node at ``path`` (None deletes); ``patch`` updates its children, whose
+    keys may themselves be slash-separated paths.
+    """
+    keys = [k for k in (path or "").strip("/").split("/") if k]
+    if event_type == "patch" and isinstance(data, dict):
+        for k, v in data.items():
+            tree = apply_stream_event(tree, "/".join(keys + [str(k)]), v, "put")
+        return tree
+    if not keys:
+        return data
+    if not isinstance(tree, dict):
+        tree = {}
+    node = tree
+    for k in keys[:-1]:
+        child = node.get(k)
+        if not isinstance(child, dict):
+            child = {}
+            node[k] = child
+        node = child
+    if data is None:
+        node.pop(keys[-1], None)
+    else:
+        node[keys[-1]] = data
+    return tree
+
+
+def _changed_paths(path: str, data: Any, event_type: str) -> List[List[str]]:
+    """Key paths written by one event (a patch writes each of its, possibly nested, children)."""
+    keys = [k for k in (path or "").strip("/").split("/") if k]
+    if event_type == "patch" and isinstance(data, dict) and data:
+        return [keys + [k for k in str(c).strip("/").split("/") if k] for c in data]
+    return [keys]
+
+
+class SensorEventStream:
+    """Listens on ``paths`` and mirrors each subtree; ``wait`` / ``take_dirty`` coalesce events."""
+
+    def __init__(
+        self, paths: Sequence[str], db_module: Any, children: Optional[Iterable[str]] = None
+    ) -> None:
+        self.paths: List[str] = [p.strip().strip("/") for p in paths if p and p.strip("/")]
+        self.children: Optional[Set[str]] = set(children) if children is not None else None
+        self._db = db_module
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._trees: Dict[str, Any] = {p: None for p in self.paths}
+        self._dirty: Dict[str, Set[str]] = {p: set() for p in self.paths}
+        self._regs: Dict[str, Any] = {}
+        self.events = 0
+        self.last_event_monotonic: Optional[float] = None
+
+    def start(self) -> bool:
+        """Attach one listener per path; False (and nothing attached) on any failure."""
+        self.close()
+        try:
+            for p in self.paths:
+                self._regs[p] = self._db.reference(p).listen(functools.partial(self._on_event, p))
+        except Exception as exc:
+            log.warning("[stream] listen failed: %r", exc)
+            self.close()
+            return False
+        return True
+
+    def alive(self) -> bool:
+        if not self.paths or len(self._regs) != len(self.paths):
+            return False
+        for reg in self._regs.values():
+            thread = getattr(reg, "_thread", None)
+            if thread is not None and not thread.is_alive():
+                return False
+        return True
+
+    def close(self) -> None:
+        for reg in self._regs.values():
+            try:
+                reg.close()
+            except Exception:
+                pass
+        self._regs = {}
+
+    def _on_event(self, path: str, event: Any) -> None:
+        rel = str(getattr(event, "path", "/") or "/").strip("/")
+        data = getattr(event, "data", None)
+        event_type = getattr(event, "event_type", "put")
+        with self._lock:
+            self._trees[path] = apply_stream_event(self._trees[path], rel, data, event_type)
+            for keys in _changed_paths(rel, data, event_type):
+                if not keys:
+                    self._dirty[path].add(ALL_KEYS)
+                elif len(keys) == 1 or self.children is None or keys[1] in self.children:
+                    self._dirty[path].add(keys[0])
+            self.events += 1
+            self.last_event_monotonic = time.monotonic()
+        self._wake.set()
+
+    def wait(self, timeout: Optional[float]) -> bool:
+        """Block until at least one event arrived since the last call (or timeout)."""
+        fired = self._wake.wait(timeout)
+        self._wake.clear()
+        return fired
+
+    def interrupt(self) -> None:
+        """Wake a thread blocked in ``wait`` (shutdown)."""
+        self._wake.set()
+
+    def take_dirty(self, path: str) -> Optional[Set[str]]:
+        """
+        Top-level keys of ``path`` changed since the last call; None means the whole subtree was
+        replaced (treat every key as changed). Empty set: nothing new.
+        """
+        path = path.strip("/")
+        with self._lock:
+            dirty = self._dirty.get(path, set())
+            self._dirty[path] = set()
+        if ALL_KEYS in dirty:
+            return None
+        return dirty
+
+    def snapshot(self, path: str, key: Optional[str] = None) -> Any:
+        """Deep copy of the mirrored subtree at ``path`` (or its child ``key``)."""
+        with self._lock:
+            tree = self._trees.get(path.strip("/"))
+            if key is not None:
+                tree = tree.get(key) if isinstance(tree, dict) else None
+            return copy.deepcopy(tree)
@@ -0,0 +1,229 @@
+"""
+Per-stage latency instrumentation: fixed-bucket histograms, p50 / p95 / p99 on demand.
+
+Each stage name ("fetch", "buffer.push", "tflite.invoke", ...) owns a histogram over fixed,
+log-spaced millisecond buckets (factor 2**0.25 ≈ 19% per bucket, 1 µs → ~70 s), so recording
+is O(log buckets) with constant memory and quantiles are read off the cumulative counts
+(reported as the bucket's upper edge, capped at the observed max).
+
+    with timed("fetch"):
+        ...
+    record("tflite.invoke", ms)
+    print(dump())
+
+Loops print ``dump_due(interval)`` periodically. ``install_dump_signal()`` makes SIGUSR1
+(``kill -USR1 <pid>``) request a dump, which the loop prints on its next ``requested_dump()``
+call — the handler itself takes no lock, so a signal landing inside ``record`` cannot deadlock.
+Recording is thread-safe. MODULE2_STAGE_TIMING=0 (config.STAGE_TIMING)
+turns ``timed`` / ``record`` into no-ops.
+"""
+from __future__ import annotations
+
+import bisect
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from . import config
+
+# Upper bucket edges in ms; values above the last edge land in an overflow bucket.
+BUCKET_EDGES_MS: List[float] = [0.001 * 2 ** (k / 4.0) for k in range(97)]
+QUANTILES = (0.50, 0.95, 0.99)
+
+
+class StageHistogram:
+    __slots__ = ("counts", "n", "sum_ms", "max_ms")
+
+    def __init__(self) -> None:
+        self.counts = [0] * (len(BUCKET_EDGES_MS) + 1)
+        self.n = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_EDGES_MS, ms)] += 1
+        self.n += 1
+        self.sum_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def quantile(self, q: float) -> float:
+        if self.n == 0:
+            return 0.0
+        target = q * self.n
+        seen = 0
+        for i, c in enumerate(self.counts):
+            seen += c
+            if c and seen >= target:
+                edge = BUCKET_EDGES_MS[i] if i < len(BUCKET_EDGES_MS) else self.max_ms
+                return min(edge, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> Dict[str, float]:
+        out = {"n": self.n, "mean": self.sum_ms / self.n if self.n else 0.0, "max": self.max_ms}
+        for q in QUANTILES:
+            out["p%d" % round(q * 100)] = self.quantile(q)
+        return out
+
+
+class _Span:
+    __slots__ = ("_timings", "_stage", "_t0")
+
+    def __init__(self, timings: "StageTimings", stage: str) -> None:
+        self._timings = timings
+        self._stage = stage
+
+    def __enter__(self) -> "_Span":
+        self._t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._timings.record(self._stage, (time.perf_counter() - self._t0) * 1000.0)
+
+
+class _NoSpan:
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class StageTimings:
+    """Stage name → StageHistogram; ``enabled=False`` records nothing."""
+
+    def __init__(self, enabled: bool = True) -> None:
+        self.enabled = bool(enabled)
+        self._lock = threading.Lock()
+        self._hists: Dict[str, StageHistogram] = {}
+        # Never reset (dumps reset _hists): monotonic counts for scrapers (module2/metrics.py)
+        self._totals: Dict[str, StageHistogram] = {}
+        self._since = time.monotonic()
+        self._next_dump = 0.0
+
+    def record(self, stage: str, ms: float) -> None:
+        if not self.enabled:
+            return
+        ms = float(ms)
+        with self._lock:
+            h = self._hists.get(stage)
+            if h is None:
+                h = self._hists[stage] = StageHistogram()
+                if stage not in self._totals:
+                    self._totals[stage] = StageHistogram()
+            h.add(ms)
+            self._totals[stage].add(ms)
+
+    def timed(self, stage: str) -> Any:
+        """Context manager recording the wall time of its block under ``stage``."""
+        return _Span(self, stage) if self.enabled else _NO_SPAN
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists = {}
+            self._since = time.monotonic()
+
+    def cumulative(self) -> Dict[str, StageHistogram]:
+        """Copies of the since-start histograms (unaffected by ``reset`` / ``dump(reset=True)``)."""
+        out: Dict[str, StageHistogram] = {}
+        with self._lock:
+            for stage, h in self._totals.items():
+                c = StageHistogram()
+                c.counts = list(h.counts)
+                c.n, c.sum_ms, c.max_ms = h.n, h.sum_ms, h.max_ms
+                out[stage] = c
+        return out
+
+    def snapshot(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {stage: h.summary() for stage, h in self._hists.items()}
+
+    def dump(self, reset: bool = False) -> str:
+        """Table of n / mean / p50 / p95 / p99 / max (ms) per stage since the last reset."""
+        with self._lock:
+            rows = [(stage, h.summary()) for stage, h in sorted(self._hists.items())]
+            window = time.monotonic() - self._since
+            if reset:
+                self._hists = {}
+                self._since = time.monotonic()
+        if not rows:
+            return "[timing] no samples"
+        lines = ["[timing] %-22s %8s %9s %9s %9s %9s %9s  (ms, last %.0fs)" % (
+            "stage", "n", "mean", "p50", "p95", "p99", "max", window
+        )]
+        for stage, s in rows:
+            lines.append("[timing] %-22s %8d %9.3f %9.3f %9.3f %9.3f %9.3f" % (
+                stage, s["n"], s["mean"], s["p50"], s["p95"], s["p99"], s["max"]
+            ))
+        return "\n".join(lines)
+
+    def dump_due(self, interval_sec: float, reset: bool = True) -> Optional[str]:
+        """``dump(reset)`` at most every ``interval_sec`` (None when not due or interval <= 0)."""
+        if interval_sec <= 0 or not self.enabled:
+            return None
+        now = time.monotonic()
+        with self._lock:
+            if self._next_dump == 0.0:
+                self._next_dump = now + interval_sec
+            if now < self._next_dump:
+                return None
+            self._next_dump = now + interval_sec
+        return self.dump(reset)
+
+
+TIMINGS = StageTimings(getattr(config, "STAGE_TIMING", True))
+
+
+def record(stage: str, ms: float) -> None:
+    TIMINGS.record(stage, ms)
+
+
+def timed(stage: str) -> Any:
+    return TIMINGS.timed(stage)
+
+
+def dump(reset: bool = False) -> str:
+    return TIMINGS.dump(reset)
+
+
+def dump_due(interval_sec: float, reset: bool = True) -> Optional[str]:
+    return TIMINGS.dump_due(interval_sec, reset)
+
+
+# Set by the signal handler, cleared by requested_dump(): a plain bool, since even Event.set
+# takes a lock the interrupted thread may hold.
+_dump_requested = False
+
+
+def _request_dump(*_: Any) -> None:
+    global _dump_requested
+    _dump_requested = True
+
+
+def requested_dump() -> Optional[str]:
+    """``dump()`` if a dump was requested (SIGUSR1) since the last call, else None."""
+    global _dump_requested
+    if not _dump_requested:
+        return None
+    _dump_requested = False
+    return dump()
+
+
+def install_dump_signal(signum: Optional[int] = None) -> bool:
+    """
+    SIGUSR1 (or ``signum``) requests a dump for the next ``requested_dump()``; False where
+    signals are unavailable.
+    """
+    import signal
+
+    signum = signum if signum is not None else getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        return False
+    try:
+        signal.signal(signum, _request_dump)
+    except (ValueError, OSError):
+        return False  # not the main thread / unsupported signal
+    return True
@@ -3,6 +3,18 @@ TensorFlow Lite inference for the pad_level sequence classifier.
 
 Input must be exactly (1, SEQ_LENGTH, FEATURE_DIM_SEQ) float32 — validated on every call.
 Output validated as (NUM_PAD_CLASSES,) probabilities / logits.
+
+``predict_proba_batch`` scores (N, SEQ_LENGTH, FEATURE_DIM_SEQ) in one invoke by resizing the
+input tensor (re-allocated only when N changes).
+
+Raw-input models (``tflite_convert.py --raw-inputs``) take (1, RAW_INPUT_SEQ_LENGTH, RAW_INPUT_DIM)
+instead; the layout is detected from the model's input shape (``raw_inputs``).
+
+Full-integer models (``tflite_convert.py --int8``) have int8/uint8 input and output tensors:
+float windows are quantized with the input tensor's scale / zero point and the output is
+dequantized, so callers always pass and receive float32 (``quantized_io``).
+
+Each call records set_input / invoke / get_output times under ``tflite.*`` (stage_timing).
 """
 from __future__ import annotations
 
@@ -12,21 +24,26 @@ from typing import Any, Optional, Tuple
 
 import numpy as np
 
-try:
-    import tensorflow as tf
-except ImportError:  # pragma: no cover
-    tf = None  # type: ignore
-
 from . import config
-from .inference_utils import validate_classifier_output_probs, validate_sequence_batch_shape
+from .inference_utils import (
+    validate_classifier_output_probs,
+    validate_classifier_output_probs_batch,
+    validate_sequence_batch_shape,
+)
+from .stage_timing import record
 
 
 class PadLevelTfliteInterpreter:
     """Loads .tflite once; reuses allocate_tensors for low overhead."""
 
+    backend = "tflite"
+
     def __init__(self, model_path: str) -> None:
-        if tf is None:
-            raise ImportError("tensorflow is required for TFLite inference")
+        # Imported here so the NumPy backend never pays for tensorflow at startup.
+        try:
+            import tensorflow as tf
+        except ImportError as exc:  # pragma: no cover
+            raise ImportError("tensorflow is required for TFLite inference") from exc
         path = os.path.abspath(model_path)
         if not os.path.isfile(path):
             raise FileNotFoundError(path)
@@ -34,16 +51,62 @@ class PadLevelTfliteInterpreter:
         self._interpreter.allocate_tensors()
         self._in = self._interpreter.get_input_details()[0]
         self._out = self._interpreter.get_output_details()[0]
+        shape = list(self._in.get("shape", []))
+        self.raw_inputs = (
+            len(shape) == 3
+            and int(shape[1]) == config.RAW_INPUT_SEQ_LENGTH
+            and int(shape[2]) == config.RAW_INPUT_DIM
+        )
+        if self.raw_inputs:
+            self.seq_len, self.feat_dim = config.RAW_INPUT_SEQ_LENGTH, config.RAW_INPUT_DIM
+        else:
+            self.seq_len, self.feat_dim = config.SEQ_LENGTH, config.FEATURE_DIM_SEQ
         self._validate_model_signature()
+        self._batch = int(self._in["shape"][0]) if len(self._in["shape"]) else 1
+        self.quantized_io = np.dtype(self._in["dtype"]) in (np.int8, np.uint8)
+
+    @staticmethod
+    def _qparams(detail: Any) -> Tuple[float, int]:
+        scale, zero_point = detail.get("quantization", (0.0, 0))
+        if not scale:
+            raise ValueError("Quantized tensor %s has no scale" % detail.get("name"))
+        return float(scale), int(zero_point)
+
+    def _quantize_input(self, x: np.ndarray) -> np.ndarray:
+        """float32 window → the input tensor dtype (identity for float models)."""
+        if not self.quantized_io:
+            return x
+        dtype = np.dtype(self._in["dtype"])
+        scale, zero_point = self._qparams(self._in)
+        info = np.iinfo(dtype)
+        q = np.round(x / scale) + zero_point
+        return np.clip(q, info.min, info.max).astype(dtype)
+
+    def _dequantize_output(self, out: np.ndarray) -> np.ndarray:
+        """Output tensor → float64 (identity cast for float models)."""
+        if np.dtype(self._out["dtype"]) not in (np.int8, np.uint8):
+            return np.asarray(out, dtype=np.float64)
+        scale, zero_point = self._qparams(self._out)
+        return (np.asarray(out, dtype=np.float64) - zero_point) * scale
+
+    def _ensure_batch(self, n: int) -> None:
+        """Resize input to (n, seq_len, feat_dim); no-op when already sized."""
+        if n == self._batch:
+            return
+        self._interpreter.resize_tensor_input(self._in["index"], [n, self.seq_len, self.feat_dim])
+        self._interpreter.allocate_tensors()
+        self._in = self._interpreter.get_input_details()[0]
+        self._out = self._interpreter.get_output_details()[0]
+        self._batch = n
 
     def _validate_model_signature(self) -> None:
-        """Ensure model expects fixed shape (1, SEQ_LENGTH, 10) when dimensions are known."""
+        """Ensure model expects (1, SEQ_LENGTH, 10) (or the raw-input shape) when dimensions are known."""
         shape = self._in.get("shape")
         if shape is None:
             return
         arr = np.array(shape, dtype=np.int64)
         exp = np.array(
-            [1, config.SEQ_LENGTH, config.FEATURE_DIM_SEQ],
+            [1, self.seq_len, self.feat_dim],
             dtype=np.int64,
         )
         for i in range(min(len(arr), len(exp))):
@@ -72,17 +135,46 @@ class PadLevelTfliteInterpreter:
     def predict_proba_timed(self, x: np.ndarray) -> Tuple[np.ndarray, float]:
         """Returns (validated probs (4,), latency_ms)."""
         x = np.asarray(x, dtype=np.float32)
-        validate_sequence_batch_shape(x, config.SEQ_LENGTH, config.FEATURE_DIM_SEQ)
+        validate_sequence_batch_shape(x, self.seq_len, self.feat_dim)
+        self._ensure_batch(1)
         t0 = time.perf_counter()
-        self._interpreter.set_tensor(self._in["index"], x)
+        self._interpreter.set_tensor(self._in["index"], self._quantize_input(x))
+        t1 = time.perf_counter()
         self._interpreter.invoke()
+        t2 = time.perf_counter()
         out = self._interpreter.get_tensor(self._out["index"])
-        raw = np.asarray(out[0], dtype=np.float64).reshape(-1)
+        raw = self._dequantize_output(out[0]).reshape(-1)
         probs = validate_classifier_output_probs(raw)
-        latency_ms = (time.perf_counter() - t0) * 1000.0
-        return probs, latency_ms
+        t3 = time.perf_counter()
+        record("tflite.set_input", (t1 - t0) * 1000.0)
+        record("tflite.invoke", (t2 - t1) * 1000.0)
+        record("tflite.get_output", (t3 - t2) * 1000.0)
+        return probs, (t3 - t0) * 1000.0
+
+    def predict_proba_batch(self, x: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Score N windows in one invoke. Returns (validated probs (N, 4), batch latency_ms).
+        """
+        x = np.ascontiguousarray(x, dtype=np.float32)
+        validate_sequence_batch_shape(x, self.seq_len, self.feat_dim, batch=None)
+        self._ensure_batch(int(x.shape[0]))
+        t0 = time.perf_counter()
+        self._interpreter.set_tensor(self._in["index"], self._quantize_input(x))
+        t1 = time.perf_counter()
+        self._interpreter.invoke()
+        t2 = time.perf_counter()
+        out = self._interpreter.get_tensor(self._out["index"])
+        probs = validate_classifier_output_probs_batch(
+            self._dequantize_output(out).reshape(x.shape[0], -1)
+        )
+        t3 = time.perf_counter()
+        record("tflite.set_input_batch", (t1 - t0) * 1000.0)
+        record("tflite.invoke_batch", (t2 - t1) * 1000.0)
+        record("tflite.get_output_batch", (t3 - t2) * 1000.0)
+        return probs, (t3 - t0) * 1000.0
 
 
 def load_pad_level_tflite(path: Optional[str] = None) -> PadLevelTfliteInterpreter:
-    p = path or config.TFLITE_MODEL_PATH
+    default = config.TFLITE_RAW_MODEL_PATH if config.USE_RAW_INPUT_MODEL else config.TFLITE_MODEL_PATH
+    p = path or default
     return PadLevelTfliteInterpreter(p)
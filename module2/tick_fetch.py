@@ -0,0 +1,230 @@
+"""
+One-round-trip Firebase reads for the single-vest polling loop.
+
+A polling tick needs meta/current_user (active uid), sensors/latest, users/{uid}/sensor and the
+profile under users/{uid}. Read one after another that is three or four round trips. Here the
+parent node users/{uid} (sensor + profile in one read) is fetched together with
+meta/current_user and sensors/latest, all issued concurrently, so a tick costs one round trip.
+
+The uid for users/{uid} is the one resolved on the previous tick. If meta/current_user names a
+different uid (user switch, first tick), that user node is read in a second round.
+
+``fetch()`` returns the raw snapshots plus per-read timings. ``summary()`` aggregates the
+timings for heartbeats.
+
+``FleetFetcher`` is the fleet-mode counterpart: instead of the whole ``users`` tree (every
+profile, every tick) it lists the uids shallowly (keys only, refreshed every ``keys_every_sec``)
+and reads ``users/{uid}/sensor`` for all of them concurrently. A uid's full node is read only
+when its profile is unknown or older than ``profile_ttl_sec``.
+"""
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from . import config
+from .log import get_logger
+from .user_profile import _NON_PROFILE_KEYS, _parse_uid
+
+log = get_logger("fetch")
+_LOG_EVERY = float(getattr(config, "LOG_EVERY_SEC", 5.0))
+
+
+def _path(attr: str, default: str) -> str:
+    return str(getattr(config, attr, default)).strip().strip("/")
+
+
+class TickFetcher:
+    """Concurrent meta + sensors/latest + users/{uid} reads over ``db_module.reference``."""
+
+    def __init__(self, db_module: Any, workers: int = 3) -> None:
+        self._db = db_module
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="tick-fetch")
+        self.meta_path = _path("FIREBASE_PATH_META_CURRENT_USER", "meta/current_user")
+        self.latest_path = _path("FIREBASE_PATH_SENSORS", "sensors/latest")
+        self.users_path = _path("FIREBASE_PATH_USERS", "users")
+        self.uid: Optional[str] = None
+        self.ticks = 0
+        self.second_rounds = 0
+        # read name -> [count, sum_ms, max_ms, last_ms]
+        self._timings: Dict[str, list] = {}
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    def _read(self, path: str) -> Tuple[Any, float]:
+        t0 = time.perf_counter()
+        try:
+            value = self._db.reference(path).get()
+        except Exception as exc:
+            log.warning("[fetch] read %s failed: %r", path, exc, every=_LOG_EVERY, key=("read", path))
+            value = None
+        return value, (time.perf_counter() - t0) * 1000.0
+
+    def _read_all(self, reads: Dict[str, str], timings: Dict[str, float]) -> Dict[str, Any]:
+        """Issue every ``name -> path`` read at once; values by name, wall time per name into ``timings``."""
+        futures = {name: self._pool.submit(self._read, path) for name, path in reads.items()}
+        out: Dict[str, Any] = {}
+        for name, fut in futures.items():
+            out[name], timings[name] = fut.result()
+        return out
+
+    def _record(self, timings: Dict[str, float]) -> None:
+        for name, ms in timings.items():
+            t = self._timings.setdefault(name, [0, 0.0, 0.0, 0.0])
+            t[0] += 1
+            t[1] += ms
+            t[2] = max(t[2], ms)
+            t[3] = ms
+
+    def fetch(self) -> Dict[str, Any]:
+        """
+        {"uid", "latest", "user", "timings_ms", "rounds"}: raw sensors/latest and users/{uid}
+        snapshots (None when missing or unreadable); ``timings_ms`` has one entry per read
+        plus ``total``.
+        """
+        t0 = time.perf_counter()
+        timings: Dict[str, float] = {}
+        guess = self.uid
+        reads = {"meta": self.meta_path, "latest": self.latest_path}
+        if guess:
+            reads["user"] = "%s/%s" % (self.users_path, guess)
+        res = self._read_all(reads, timings)
+
+        uid = _parse_uid(res.get("meta"))
+        rounds = 1
+        if not uid:
+            res["user"] = None
+        elif uid != guess:
+            res.update(self._read_all({"user": "%s/%s" % (self.users_path, uid)}, timings))
+            rounds = 2
+            self.second_rounds += 1
+        self.uid = uid
+        self.ticks += 1
+        timings["total"] = (time.perf_counter() - t0) * 1000.0
+        self._record(timings)
+        return {
+            "uid": uid,
+            "latest": res.get("latest"),
+            "user": res.get("user"),
+            "timings_ms": timings,
+            "rounds": rounds,
+        }
+
+    def summary(self) -> str:
+        """``name=last/mean/max ms`` per read, e.g. for the heartbeat line."""
+        parts = [
+            "%s=%.0f/%.0f/%.0fms" % (name, t[3], t[1] / max(t[0], 1), t[2])
+            for name, t in self._timings.items()
+        ]
+        return "fetch[%s] ticks=%d 2nd_rounds=%d" % (" ".join(parts), self.ticks, self.second_rounds)
+
+
+class FleetFetcher:
+    """Shallow ``users`` key list + concurrent ``users/{uid}/sensor`` reads, profiles cached per uid."""
+
+    def __init__(
+        self,
+        db_module: Any,
+        workers: int = 8,
+        keys_every_sec: float = 5.0,
+        profile_ttl_sec: float = 60.0,
+    ) -> None:
+        self._db = db_module
+        self._pool = ThreadPoolExecutor(max_workers=max(1, int(workers)), thread_name_prefix="fleet-fetch")
+        self.users_path = _path("FIREBASE_PATH_USERS", "users")
+        self.keys_every_sec = float(keys_every_sec)
+        self.profile_ttl_sec = float(profile_ttl_sec)
+        self.uids: List[str] = []
+        self._next_keys = 0.0
+        # uid -> (monotonic read time, users/{uid} without sensor / status / heating)
+        self._profiles: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self.ticks = 0
+        self.sensor_reads = 0
+        self.user_reads = 0
+        self.failed_reads = 0
+        self._ms_sum = 0.0
+        self._ms_max = 0.0
+        self._ms_last = 0.0
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+    def _read(self, path: str, shallow: bool = False) -> Tuple[Any, bool]:
+        try:
+            ref = self._db.reference(path)
+            return (ref.get(shallow=True) if shallow else ref.get()), True
+        except Exception as exc:
+            log.warning("[fetch] read %s failed: %r", path, exc, every=_LOG_EVERY, key=("read", path))
+            return None, False
+
+    def _refresh_keys(self, now: float) -> None:
+        keys, ok = self._read(self.users_path, shallow=True)
+        if not ok:
+            self.failed_reads += 1
+            return  # keep the last known uids; retried next tick
+        self._next_keys = now + self.keys_every_sec
+        self.uids = sorted(str(k) for k in keys) if isinstance(keys, dict) else []
+        known = set(self.uids)
+        for uid in [u for u in self._profiles if u not in known]:
+            del self._profiles[uid]
+
+    def fetch(self) -> Tuple[Dict[str, Dict[str, Any]], Set[str]]:
+        """
+        ({uid: users/{uid}-shaped node with a fresh ``sensor`` and the cached profile fields},
+        uids whose read failed this tick). A uid without a sensor node maps to its profile only.
+        """
+        t0 = time.perf_counter()
+        now = time.monotonic()
+        if now >= self._next_keys:
+            self._refresh_keys(now)
+        reads: Dict[str, Tuple[str, bool]] = {}
+        for uid in self.uids:
+            cached = self._profiles.get(uid)
+            full = cached is None or now - cached[0] > self.profile_ttl_sec
+            path = "%s/%s" % (self.users_path, uid) + ("" if full else "/sensor")
+            reads[uid] = (path, full)
+        futures = {uid: self._pool.submit(self._read, path) for uid, (path, _) in reads.items()}
+        users: Dict[str, Dict[str, Any]] = {}
+        failed: Set[str] = set()
+        for uid, fut in futures.items():
+            value, ok = fut.result()
+            if not ok:
+                self.failed_reads += 1
+                failed.add(uid)
+                continue
+            if reads[uid][1]:
+                self.user_reads += 1
+                node = value if isinstance(value, dict) else {}
+                fields = {k: v for k, v in node.items() if k not in _NON_PROFILE_KEYS}
+                self._profiles[uid] = (now, fields)
+                sensor = node.get("sensor")
+            else:
+                self.sensor_reads += 1
+                sensor = value
+            user = dict(self._profiles[uid][1])
+            if sensor is not None:
+                user["sensor"] = sensor
+            users[uid] = user
+        self.ticks += 1
+        ms = (time.perf_counter() - t0) * 1000.0
+        self._ms_last = ms
+        self._ms_sum += ms
+        self._ms_max = max(self._ms_max, ms)
+        return users, failed
+
+    def summary(self) -> str:
+        return (
+            "fleet_fetch[tick=%.0f/%.0f/%.0fms] ticks=%d uids=%d sensor_reads=%d user_reads=%d "
+            "failed=%d"
+        ) % (
+            self._ms_last,
+            self._ms_sum / max(self.ticks, 1),
+            self._ms_max,
+            self.ticks,
+            len(self.uids),
+            self.sensor_reads,
+            self.user_reads,
+            self.failed_reads,
+        )
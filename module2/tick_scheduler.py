@@ -0,0 +1,94 @@
+"""
+Fixed-cadence tick scheduling on the monotonic clock.
+
+Deadlines sit on a fixed grid (start + k * period), so work time does not stretch the period the
+way "do the work, then sleep period" does. A tick that finishes after the next deadline is an
+overrun: the next tick starts immediately if less than one period late; whole periods already
+missed are skipped (counted) rather than run back-to-back, so the loop realigns to the grid
+instead of bursting.
+
+Jitter is how late each tick actually started relative to its deadline.
+"""
+from __future__ import annotations
+
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+
+class DeadlineScheduler:
+    """``wait()`` before each tick (or ``next_delay()`` + ``mark()`` with another sleep, e.g. asyncio)."""
+
+    def __init__(self, period_sec: float, window: int = 1024) -> None:
+        self.period = max(1e-3, float(period_sec))
+        self._deadline: Optional[float] = None
+        self._jitter_ms: deque = deque(maxlen=max(1, int(window)))
+        self.ticks = 0
+        self.overruns = 0
+        self.skipped = 0
+
+    def reset(self) -> None:
+        """Forget the grid (e.g. while an event stream drives the loop); the next tick starts at once."""
+        self._deadline = None
+
+    def next_delay(self, now: Optional[float] = None) -> float:
+        """Advance to the next deadline; seconds to sleep until it (0 when already due)."""
+        now = time.monotonic() if now is None else now
+        if self._deadline is None:
+            self._deadline = now
+            return 0.0
+        self._deadline += self.period
+        late = now - self._deadline
+        if late <= 0.0:
+            return -late
+        self.overruns += 1
+        missed = int(late // self.period)
+        if missed:
+            self.skipped += missed
+            self._deadline += missed * self.period
+        return 0.0
+
+    def mark(self, now: Optional[float] = None) -> None:
+        """Record that the tick for the current deadline started at ``now``."""
+        if self._deadline is None:
+            return
+        now = time.monotonic() if now is None else now
+        self.ticks += 1
+        self._jitter_ms.append(max(0.0, now - self._deadline) * 1000.0)
+
+    def wait(self) -> None:
+        delay = self.next_delay()
+        if delay > 0.0:
+            time.sleep(delay)
+        self.mark()
+
+    def stats(self) -> Dict[str, Any]:
+        if self._jitter_ms:
+            arr = np.fromiter(self._jitter_ms, dtype=np.float64, count=len(self._jitter_ms))
+            p50, p95 = np.percentile(arr, (50, 95))
+            jmax = float(arr.max())
+        else:
+            p50 = p95 = jmax = 0.0
+        return {
+            "period_s": self.period,
+            "ticks": self.ticks,
+            "overruns": self.overruns,
+            "skipped": self.skipped,
+            "jitter_ms_p50": float(p50),
+            "jitter_ms_p95": float(p95),
+            "jitter_ms_max": jmax,
+        }
+
+    def summary(self) -> str:
+        st = self.stats()
+        return "cadence=%.2fs ticks=%d overruns=%d skipped=%d jitter p50=%.1fms p95=%.1fms max=%.1fms" % (
+            st["period_s"],
+            st["ticks"],
+            st["overruns"],
+            st["skipped"],
+            st["jitter_ms_p50"],
+            st["jitter_ms_p95"],
+            st["jitter_ms_max"],
+        )
@@ -4,19 +4,42 @@ Firebase user profile resolution for real-time inference.
 Expected Realtime Database structure:
 - meta/current_user/uid -> active user id
 - users/{uid}/ -> user profile containing: age_years, height_cm, weight_kg, gender_0_1
+- meta/user_index/{uid} -> true (uid index used when the current uid has no user node)
+
+``start_profile_store()`` subscribes to meta/current_user and users/{uid}; while its listeners
+are up, get_user_profile / get_resolved_uid answer from memory (no reads) and profile edits or
+user switches apply as soon as the event arrives. Without it (or while it is not ready) they
+read Firebase through a thread-safe TTL/LRU cache that coalesces concurrent reads.
 """
 
 from __future__ import annotations
 
+import threading
 import time
 from typing import Any, Dict, Optional, Tuple
 
 from . import config
+from .log import get_logger
+from .profile_cache import SingleFlightCache
+from .rtdb import get_db
+from .sensor_stream import SensorEventStream
 
+log = get_logger("profile")
+_LOG_EVERY = float(getattr(config, "LOG_EVERY_SEC", 5.0))
 _PROFILE_CACHE_TTL_SEC = float(getattr(config, "USER_PROFILE_CACHE_TTL_SEC", 5.0))
-_cache_uid: Optional[str] = None
-_cache_profile: Optional[Dict[str, float]] = None
-_cache_monotonic: float = 0.0
+# uid -> (resolved uid, profile); bounded LRU, one in-flight read per uid
+_profile_cache = SingleFlightCache(
+    maxsize=int(getattr(config, "USER_PROFILE_CACHE_MAX", 64)), ttl_sec=_PROFILE_CACHE_TTL_SEC
+)
+# meta/current_user: not cached (a user switch must show up on the next call), only coalesced
+_uid_flight = SingleFlightCache(maxsize=1, ttl_sec=0.0)
+_last_uid: Optional[str] = None
+# (uid, profile fields, parsed profile) of the last profile_from_snapshot call
+_snapshot_profile: Tuple[Optional[str], Any, Optional[Dict[str, float]]] = (None, None, None)
+_snapshot_lock = threading.Lock()
+_store: Optional["ProfileStore"] = None
+# users/{uid} children that change every tick and never carry profile fields
+_NON_PROFILE_KEYS = frozenset(("sensor", "status", "heating"))
 
 
 def _to_number(v: Any) -> Optional[float]:
@@ -66,113 +89,36 @@ def _parse_uid(meta_current_user: Any) -> Optional[str]:
     return None
 
 
-def get_user_profile() -> Dict[str, float]:
-    """
-    Resolve the active user's profile from Firebase.
-
-    Returns a dict with keys:
-      age_years, height_cm, weight_kg, gender_0_1
-
-    Any missing Firebase values fall back to config.DEFAULT_*.
-    Never raises (safe for real-time loops).
-    """
-    defaults = {
+def get_default_profile() -> Dict[str, float]:
+    """config.DEFAULT_* profile used whenever Firebase has no usable user data."""
+    return {
         "age_years": float(config.DEFAULT_AGE_YEARS),
         "height_cm": float(config.DEFAULT_HEIGHT_CM),
         "weight_kg": float(config.DEFAULT_WEIGHT_KG),
         "gender_0_1": float(config.DEFAULT_GENDER_0_1),
     }
 
-    try:
-        from firebase_admin import db  # type: ignore
-    except Exception:
-        print("[profile] firebase_admin not available; using defaults:", defaults)
-        return dict(defaults)
 
-    uid: Optional[str] = None
-    user_data: Any = None
-    try:
-        meta = db.reference(getattr(config, "FIREBASE_PATH_META_CURRENT_USER", "meta/current_user")).get()
-        uid = _parse_uid(meta)
-    except Exception as exc:
-        print("[profile] failed to read meta/current_user:", repr(exc))
-        uid = None
-
-    print("[profile] current uid:", uid)
-
-    if not uid:
-        print("[profile] missing uid; using defaults:", defaults)
-        return dict(defaults)
-
-    base = getattr(config, "FIREBASE_PATH_USERS", "users").strip().strip("/")
-
-    # Small cache to avoid repeated reads in tight loops.
-    global _cache_uid, _cache_profile, _cache_monotonic
-    now = time.monotonic()
-    if (
-        _cache_profile is not None
-        and _cache_uid == uid
-        and (now - float(_cache_monotonic)) <= float(_PROFILE_CACHE_TTL_SEC)
-    ):
-        print("[profile] fetched profile (cached):", _cache_profile)
-        return dict(_cache_profile)
-
-    try:
-        user_data = db.reference(f"{base}/{uid}").get()
-    except Exception as exc:
-        print("[profile] failed to read users/%s:" % uid, repr(exc))
-        user_data = None
-
-    # If UID doesn't exist under /users, switch to the first available user (if any)
-    # and sync it back to meta/current_user so frontend+backend stay aligned.
-    uid_mismatch = not isinstance(user_data, dict) or not user_data
-    if uid_mismatch:
-        all_users: Any = None
-        try:
-            all_users = db.reference(base).get()
-        except Exception as exc:
-            print("[profile] failed to list users:", repr(exc))
-            all_users = None
-
-        if isinstance(all_users, dict) and all_users:
-            try:
-                resolved_uid = next(iter(all_users.keys()))
-            except Exception:
-                resolved_uid = None
-            if isinstance(resolved_uid, str) and resolved_uid.strip():
-                resolved_uid = resolved_uid.strip()
-                print(
-                    "[profile] UID not found, switching to available UID: %s" % resolved_uid
-                )
-                uid = resolved_uid
-                try:
-                    db.reference(
-                        getattr(config, "FIREBASE_PATH_META_CURRENT_USER", "meta/current_user")
-                    ).update({"uid": resolved_uid})
-                except Exception as exc:
-                    print("[profile] failed to auto-sync uid to meta/current_user:", repr(exc))
-                try:
-                    user_data = db.reference(f"{base}/{uid}").get()
-                except Exception as exc:
-                    print("[profile] failed to read users/%s:" % uid, repr(exc))
-                    user_data = None
-            else:
-                user_data = None
-        else:
-            user_data = None
+def profile_from_user_data(user_data: Any, uid: Optional[str] = None) -> Optional[Dict[str, float]]:
+    """
+    Parse a ``users/{uid}`` node (or its ``profile`` child) into model profile fields.
 
+    Returns None when the node is missing/invalid; missing fields fall back to config.DEFAULT_*.
+    """
     if not isinstance(user_data, dict) or not user_data:
-        print("[profile] missing user data for uid=%s; using defaults:" % uid, defaults)
-        return dict(defaults)
-
-    print("[profile] RAW user_data:", user_data)
-    if isinstance(user_data, dict) and "profile" in user_data:
+        log.warning("[profile] missing user data for uid=%s; using defaults", uid, every=_LOG_EVERY)
+        return None
+    defaults = get_default_profile()
+    if "profile" in user_data:
         user_data = user_data.get("profile")
-    print("[profile] NORMALIZED user_data:", user_data)
+    log.debug("[profile] normalized user_data: %s", user_data)
 
     if not isinstance(user_data, dict) or not user_data:
-        print("[profile] missing/invalid normalized profile for uid=%s; using defaults:" % uid, defaults)
-        return dict(defaults)
+        log.warning(
+            "[profile] missing/invalid normalized profile for uid=%s; using defaults: %s",
+            uid, defaults, every=_LOG_EVERY,
+        )
+        return None
 
     # Support both Firebase field formats:
     # - current: age/height/weight/gender
@@ -199,25 +145,336 @@ def get_user_profile() -> Dict[str, float]:
     if gender is None:
         missing_list.append("gender_0_1")
     missing: Tuple[str, ...] = tuple(missing_list)
-    print("[profile] fetched profile:", out)
+    log.debug("[profile] fetched profile: %s", out)
     if missing:
-        print("[profile] fallback used for:", ", ".join(missing))
-
-    _cache_uid = uid
-    _cache_profile = dict(out)
-    _cache_monotonic = now
+        log.info("[profile] fallback used for: %s", ", ".join(missing), every=_LOG_EVERY)
     return out
 
 
+def _meta_path() -> str:
+    return getattr(config, "FIREBASE_PATH_META_CURRENT_USER", "meta/current_user").strip().strip("/")
+
+
+def _users_path() -> str:
+    return getattr(config, "FIREBASE_PATH_USERS", "users").strip().strip("/")
+
+
+def _user_index_path() -> str:
+    return getattr(config, "FIREBASE_PATH_USER_INDEX", "meta/user_index").strip().strip("/")
+
+
+def _first_indexed_uid(db: Any) -> Optional[str]:
+    """
+    First uid in key order from meta/user_index (a one-key query). When the index is empty,
+    list ``users`` shallowly (keys only, no per-user data) and backfill the index from it.
+    """
+    index = _user_index_path()
+    try:
+        snap = db.reference(index).order_by_key().limit_to_first(1).get()
+        if isinstance(snap, dict) and snap:
+            return str(next(iter(snap)))
+    except Exception as exc:
+        log.warning("[profile] failed to query %s: %r", index, exc, every=_LOG_EVERY)
+    try:
+        keys = db.reference(_users_path()).get(shallow=True)
+    except Exception as exc:
+        log.warning("[profile] failed to list users: %r", exc, every=_LOG_EVERY)
+        return None
+    if not isinstance(keys, dict) or not keys:
+        return None
+    uids = sorted(str(k) for k in keys)
+    try:
+        db.reference(index).update({u: True for u in uids})
+        log.info("[profile] backfilled %s with %d uids", index, len(uids))
+    except Exception as exc:
+        log.warning("[profile] failed to backfill %s: %r", index, exc, every=_LOG_EVERY)
+    return uids[0]
+
+
+def _resolve_available_user(db: Any, max_tries: int = 3) -> Tuple[Optional[str], Any]:
+    """(uid, users/{uid} data) for the first indexed uid that still has a user node."""
+    for _ in range(max_tries):
+        uid = _first_indexed_uid(db)
+        if not uid:
+            return None, None
+        try:
+            user_data = db.reference("%s/%s" % (_users_path(), uid)).get()
+        except Exception as exc:
+            log.warning("[profile] failed to read users/%s: %r", uid, exc, every=_LOG_EVERY)
+            return None, None
+        if isinstance(user_data, dict) and user_data:
+            return uid, user_data
+        log.info("[profile] dropping stale uid %s from %s", uid, _user_index_path())
+        try:
+            db.reference("%s/%s" % (_user_index_path(), uid)).delete()
+        except Exception as exc:
+            log.warning(
+                "[profile] failed to prune %s: %r",
+                _user_index_path(), exc, every=_LOG_EVERY,
+            )
+            return None, None
+    return None, None
+
+
+class ProfileStore:
+    """
+    Active uid + parsed profile mirrored from listeners on meta/current_user and users/{uid}.
+
+    A uid change re-attaches the users/{uid} listener. ``profile()`` / ``resolved_uid()`` return
+    None until both listeners delivered data (caller falls back to reads); when the user node is
+    missing they defer to the read path (which can auto-switch the uid) at most once per TTL.
+    """
+
+    def __init__(self, db_module: Any) -> None:
+        self._db = db_module
+        self._lock = threading.Lock()
+        self._meta = SensorEventStream([_meta_path()], db_module)
+        self._user: Optional[SensorEventStream] = None
+        self._uid: Optional[str] = None
+        self._profile: Optional[Dict[str, float]] = None
+        self._next_fallback = 0.0
+        self.updates = 0
+
+    def start(self) -> bool:
+        return self._meta.start()
+
+    def alive(self) -> bool:
+        return self._meta.alive() and (self._user is None or self._user.alive())
+
+    def close(self) -> None:
+        self._meta.close()
+        if self._user is not None:
+            self._user.close()
+
+    def _switch_uid(self, uid: Optional[str]) -> None:
+        if self._user is not None:
+            self._user.close()
+            self._user = None
+        self._uid = uid
+        self._profile = None
+        if uid:
+            self._user = SensorEventStream(["%s/%s" % (_users_path(), uid)], self._db)
+            if not self._user.start():
+                self._user = None
+        log.info("[profile] active uid -> %s (listening=%s)", uid, self._user is not None)
+
+    def _refresh(self) -> None:
+        """Apply pending events from the mirrors (lock held; no network reads)."""
+        meta_dirty = self._meta.take_dirty(_meta_path())
+        if meta_dirty is None or meta_dirty:
+            uid = _parse_uid(self._meta.snapshot(_meta_path()))
+            if uid != self._uid:
+                self._switch_uid(uid)
+        if self._user is None:
+            return
+        path = self._user.paths[0]
+        dirty = self._user.take_dirty(path)
+        if dirty is None or (dirty - _NON_PROFILE_KEYS):
+            self._profile = profile_from_user_data(self._user.snapshot(path), self._uid)
+            self.updates += 1
+
+    def _ready(self) -> bool:
+        return (
+            self.alive()
+            and self._meta.events > 0
+            and self._user is not None
+            and self._user.events > 0
+        )
+
+    def profile(self) -> Optional[Dict[str, float]]:
+        with self._lock:
+            self._refresh()
+            if not self._ready():
+                return None
+            if self._profile is None:
+                now = time.monotonic()
+                if now < self._next_fallback:
+                    return get_default_profile()
+                self._next_fallback = now + float(_PROFILE_CACHE_TTL_SEC)
+                return None
+            return dict(self._profile)
+
+    def resolved_uid(self) -> Optional[str]:
+        with self._lock:
+            self._refresh()
+            if not self._ready() or self._profile is None:
+                return None
+            return self._uid
+
+
+def start_profile_store(db_module: Any = None) -> bool:
+    """Attach the push-updated profile store (replaces a previous one). False if listen fails."""
+    global _store
+    if db_module is None:
+        try:
+            db_module = get_db()
+        except Exception:
+            return False
+    store = ProfileStore(db_module)
+    if not store.start():
+        return False
+    stop_profile_store()
+    _store = store
+    return True
+
+
+def stop_profile_store() -> None:
+    global _store
+    if _store is not None:
+        _store.close()
+        _store = None
+
+
+def get_user_profile() -> Dict[str, float]:
+    """
+    Active user's profile: from the listener-fed store when it is running and ready, otherwise
+    read from Firebase (see _read_user_profile). Never raises.
+    """
+    store = _store
+    if store is not None:
+        try:
+            out = store.profile()
+        except Exception as exc:
+            log.warning("[profile] store error: %r", exc, every=_LOG_EVERY)
+            out = None
+        if out is not None:
+            return out
+    return _read_user_profile()
+
+
+def _read_current_uid(db: Any) -> Optional[str]:
+    try:
+        meta = db.reference(_meta_path()).get()
+        uid = _parse_uid(meta)
+    except Exception as exc:
+        log.warning("[profile] failed to read meta/current_user: %r", exc, every=_LOG_EVERY)
+        uid = None
+    log.debug("[profile] current uid: %s", uid)
+    return uid
+
+
+def _fetch_user_profile(db: Any, uid: str) -> Optional[Tuple[str, Dict[str, float]]]:
+    """
+    Read users/{uid} and parse it; (resolved uid, profile), or None when no usable user data.
+
+    If the uid has no user node, switches to the first available user via the uid index —
+    never the full users tree — and syncs it back to meta/current_user so frontend+backend
+    stay aligned. The switched-to uid is cached too.
+    """
+    try:
+        user_data = db.reference("%s/%s" % (_users_path(), uid)).get()
+    except Exception as exc:
+        log.warning("[profile] failed to read users/%s: %r", uid, exc, every=_LOG_EVERY)
+        user_data = None
+
+    resolved = uid
+    if not isinstance(user_data, dict) or not user_data:
+        resolved_uid, user_data = _resolve_available_user(db)
+        if resolved_uid:
+            log.info("[profile] UID not found, switching to available UID: %s", resolved_uid)
+            resolved = resolved_uid
+            try:
+                db.reference(_meta_path()).update({"uid": resolved_uid})
+            except Exception as exc:
+                log.warning(
+                    "[profile] failed to auto-sync uid to meta/current_user: %r",
+                    exc, every=_LOG_EVERY,
+                )
+
+    if not isinstance(user_data, dict) or not user_data:
+        log.warning(
+            "[profile] missing user data for uid=%s; using defaults",
+            resolved, every=_LOG_EVERY,
+        )
+        return None
+
+    log.debug("[profile] raw user_data: %s", user_data)
+    out = profile_from_user_data(user_data, resolved)
+    if out is None:
+        return None
+    if resolved != uid:
+        _profile_cache.put(resolved, (resolved, out))
+    return resolved, out
+
+
+def _read_user_profile() -> Dict[str, float]:
+    """
+    Resolve the active user's profile from Firebase.
+
+    Returns a dict with keys:
+      age_years, height_cm, weight_kg, gender_0_1
+
+    Any missing Firebase values fall back to config.DEFAULT_*.
+    Never raises (safe for real-time loops). Safe to call from several threads: concurrent
+    callers share one meta/current_user read and one users/{uid} read (see profile_cache).
+    """
+    global _last_uid
+    defaults = get_default_profile()
+
+    try:
+        db = get_db()
+    except Exception:
+        log.warning(
+            "[profile] database client not available; using defaults: %s",
+            defaults, every=_LOG_EVERY,
+        )
+        return dict(defaults)
+
+    try:
+        uid = _uid_flight.get_or_load("uid", lambda: _read_current_uid(db))
+        if not uid:
+            log.warning("[profile] missing uid; using defaults: %s", defaults, every=_LOG_EVERY)
+            return dict(defaults)
+        result = _profile_cache.get_or_load(uid, lambda: _fetch_user_profile(db, uid))
+    except Exception as exc:
+        log.warning("[profile] profile resolution failed: %r", exc, every=_LOG_EVERY)
+        return dict(defaults)
+    if result is None:
+        return dict(defaults)
+    _last_uid, profile = result
+    return dict(profile)
+
+
+def profile_from_snapshot(uid: Optional[str], user_data: Any) -> Optional[Dict[str, float]]:
+    """
+    Profile from a users/{uid} node read elsewhere (e.g. tick_fetch's batched read). Parsed
+    again only when its profile fields changed; primes the read cache so get_user_profile /
+    get_resolved_uid do not read it again. None when the node has no usable data.
+    """
+    global _snapshot_profile, _last_uid
+    if not uid or not isinstance(user_data, dict) or not user_data:
+        return None
+    fields = {k: v for k, v in user_data.items() if k not in _NON_PROFILE_KEYS}
+    with _snapshot_lock:
+        last_uid, last_fields, profile = _snapshot_profile
+        if profile is None or last_uid != uid or last_fields != fields:
+            profile = profile_from_user_data(fields, uid)
+            _snapshot_profile = (uid, fields, profile)
+    if profile is None:
+        return None
+    _profile_cache.put(uid, (uid, profile))
+    _last_uid = uid
+    return dict(profile)
+
+
 def get_resolved_uid() -> Optional[str]:
     """
     Best-effort resolved UID for the active user.
-    Uses the same UID resolution logic as get_user_profile() via its cache.
+    From the profile store when ready; otherwise the same UID resolution logic as
+    get_user_profile() via its cache.
     """
+    store = _store
+    if store is not None:
+        try:
+            uid = store.resolved_uid()
+        except Exception:
+            uid = None
+        if uid:
+            return uid
     try:
         # Trigger resolution (and auto-sync) if needed.
-        _ = get_user_profile()
+        _ = _read_user_profile()
     except Exception:
         return None
-    return _cache_uid
+    return _last_uid
 
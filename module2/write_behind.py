@@ -0,0 +1,256 @@
+"""
+Write-behind queue for Firebase writes: the control loop enqueues, a background thread writes.
+
+Pending writes are keyed by path and coalesced — a newer payload for a path replaces the one
+still waiting, so only the latest decision per vest reaches the database. The queue is bounded
+by number of paths; when full, a payload for a path not already pending is rejected (``submit``
+returns False, counted in ``rejected``) — a pending payload is never discarded unseen, and the
+caller keeps the decision unsent so it is submitted again.
+Failed writes are retried with exponential backoff (a newer payload for the path replaces the
+failed one but keeps its attempt count and backoff). After ``max_attempts`` failures, or once the
+path has been failing for ``max_age_sec``, the pending payload is given up: counted in
+``given_up`` and reported to ``on_give_up(path, payload)`` so the caller can forget it was sent.
+
+``workers`` writer threads share the queue; a path is written by one thread at a time, so writes
+to the same path stay ordered. Each write is one blocking round trip, so throughput is about
+``workers / RTT`` writes per second — with one worker and a 100 ms RTT, a fleet keep-alive burst
+of 50 paths takes 5 s to drain.
+
+``stats()`` exposes queue depth, counters and write latency (network round trip, and
+enqueue → acknowledged).
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Set
+
+from . import config
+from .log import get_logger
+
+log = get_logger("write")
+_LOG_EVERY = float(getattr(config, "LOG_EVERY_SEC", 5.0))
+
+
+class _Pending:
+    __slots__ = ("payload", "enqueued_at", "attempts", "not_before", "failing_since")
+
+    def __init__(self, payload: Any, enqueued_at: float) -> None:
+        self.payload = payload
+        self.enqueued_at = enqueued_at
+        self.attempts = 0
+        self.not_before = 0.0
+        self.failing_since: Optional[float] = None
+
+    def inherit(self, older: "_Pending") -> None:
+        """Carry the path's failure streak over to this newer payload."""
+        self.attempts = older.attempts
+        self.not_before = older.not_before
+        self.failing_since = older.failing_since
+
+
+class WriteBehindQueue:
+    """Background writer thread(s) over ``write_fn(path, payload)``."""
+
+    def __init__(
+        self,
+        write_fn: Callable[[str, Any], None],
+        maxsize: int = 1024,
+        backoff_base_sec: float = 0.5,
+        backoff_max_sec: float = 30.0,
+        max_attempts: int = 8,
+        max_age_sec: float = 120.0,
+        on_give_up: Optional[Callable[[str, Any], None]] = None,
+        workers: int = 1,
+        name: str = "firebase-write-behind",
+    ) -> None:
+        self._write_fn = write_fn
+        self.maxsize = max(1, int(maxsize))
+        self.backoff_base_sec = float(backoff_base_sec)
+        self.backoff_max_sec = float(backoff_max_sec)
+        self.max_attempts = max(0, int(max_attempts))  # 0 = no limit
+        self.max_age_sec = max(0.0, float(max_age_sec))  # 0 = no limit
+        self._on_give_up = on_give_up
+        self._pending: "OrderedDict[str, _Pending]" = OrderedDict()
+        self._cond = threading.Condition()
+        self._inflight: Set[str] = set()
+        self._stop = False
+        self.written = 0
+        self.failed = 0
+        self.given_up = 0
+        self.rejected = 0
+        self.coalesced = 0
+        self._write_ms_sum = 0.0
+        self._write_ms_max = 0.0
+        self._write_ms_last = 0.0
+        self._ack_ms_max = 0.0
+        self._threads = [
+            threading.Thread(target=self._run, name="%s-%d" % (name, i), daemon=True)
+            for i in range(max(1, int(workers)))
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, path: str, payload: Any) -> bool:
+        """
+        Enqueue (never blocks on I/O); replaces a payload still pending for ``path``. False when
+        the queue is full and ``path`` has nothing pending: the payload was not queued.
+        """
+        now = time.monotonic()
+        with self._cond:
+            if self._stop:
+                raise RuntimeError("WriteBehindQueue is closed")
+            entry = _Pending(payload, now)
+            older = self._pending.get(path)
+            if older is not None:
+                self.coalesced += 1
+                entry.inherit(older)
+            elif len(self._pending) >= self.maxsize:
+                self.rejected += 1
+                return False
+            self._pending[path] = entry
+            self._cond.notify_all()
+            return True
+
+    def depth(self) -> int:
+        with self._cond:
+            return len(self._pending) + len(self._inflight)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            n = max(self.written, 1)
+            oldest = min((e.enqueued_at for e in self._pending.values()), default=None)
+            return {
+                "depth": len(self._pending) + len(self._inflight),
+                "written": self.written,
+                "failed": self.failed,
+                "given_up": self.given_up,
+                "rejected": self.rejected,
+                "coalesced": self.coalesced,
+                "write_ms_last": self._write_ms_last,
+                "write_ms_mean": self._write_ms_sum / n,
+                "write_ms_max": self._write_ms_max,
+                "ack_ms_max": self._ack_ms_max,
+                "oldest_pending_s": (time.monotonic() - oldest) if oldest is not None else 0.0,
+            }
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until nothing is pending or in flight; False on timeout."""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._pending or self._inflight:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+            return True
+
+    def close(self, timeout: Optional[float] = 5.0) -> bool:
+        """Flush (bounded by ``timeout``), then stop the writer threads. Returns flush success."""
+        ok = self.flush(timeout)
+        with self._cond:
+            self._stop = True
+            self._cond.notify_all()
+        for t in self._threads:
+            t.join(timeout=1.0)
+        return ok
+
+    def _next_ready(self) -> Optional[str]:
+        """
+        Oldest path not in flight whose backoff has elapsed; waits on the condition otherwise
+        (lock held).
+        """
+        while True:
+            if self._stop:
+                return None
+            now = time.monotonic()
+            wake = None
+            for path, entry in self._pending.items():
+                if path in self._inflight:
+                    continue
+                if entry.not_before <= now:
+                    return path
+                wake = entry.not_before if wake is None else min(wake, entry.not_before)
+            self._cond.wait(None if wake is None else wake - now)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                path = self._next_ready()
+                if path is None:
+                    return
+                entry = self._pending.pop(path)
+                self._inflight.add(path)
+            t0 = time.perf_counter()
+            error: Optional[BaseException] = None
+            try:
+                self._write_fn(path, entry.payload)
+            except Exception as exc:
+                error = exc
+            write_ms = (time.perf_counter() - t0) * 1000.0
+            given_up: Optional[_Pending] = None
+            with self._cond:
+                self._inflight.discard(path)
+                if error is None:
+                    self.written += 1
+                    self._write_ms_last = write_ms
+                    self._write_ms_sum += write_ms
+                    self._write_ms_max = max(self._write_ms_max, write_ms)
+                    ack_ms = (time.monotonic() - entry.enqueued_at) * 1000.0
+                    self._ack_ms_max = max(self._ack_ms_max, ack_ms)
+                else:
+                    given_up = self._failed(path, entry, error)
+                self._cond.notify_all()
+            if given_up is not None and self._on_give_up is not None:
+                try:
+                    self._on_give_up(path, given_up.payload)
+                except Exception as exc:
+                    log.error("on_give_up(%s) failed: %r", path, exc, every=_LOG_EVERY)
+
+    def _failed(self, path: str, entry: _Pending, error: BaseException) -> Optional[_Pending]:
+        """
+        Book a failed write (lock held): back off the path's pending payload — ``entry`` again,
+        or a newer one that arrived meanwhile — or give it up. Returns the given-up entry.
+        """
+        now = time.monotonic()
+        self.failed += 1
+        entry.attempts += 1
+        if entry.failing_since is None:
+            entry.failing_since = now
+        newer = self._pending.get(path)
+        if newer is not None:
+            newer.inherit(entry)
+            target = newer
+        else:
+            target = entry
+            self._pending[path] = entry
+            self._pending.move_to_end(path, last=False)
+        if (self.max_attempts and target.attempts >= self.max_attempts) or (
+            self.max_age_sec and now - target.failing_since >= self.max_age_sec
+        ):
+            del self._pending[path]
+            self.given_up += 1
+            log.error(
+                "Firebase write given up (%s, %s attempts over %.0fs): %s",
+                path,
+                target.attempts,
+                now - target.failing_since,
+                error,
+                key=("write_given_up", path),
+                every=_LOG_EVERY,
+            )
+            return target
+        delay = min(self.backoff_max_sec, self.backoff_base_sec * (2 ** (target.attempts - 1)))
+        target.not_before = now + delay
+        log.warning(
+            "Firebase write failed (%s, attempt %s, retry%s in %.1fs): %s",
+            path,
+            target.attempts,
+            " of newer payload" if newer is not None else "",
+            delay,
+            error,
+            every=_LOG_EVERY,
+            key=("write", path),
+        )
+        return None
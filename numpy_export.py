@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Extract pad_level classifier weights into an .npz for the pure-NumPy serving backend.
+
+Source is the trained .keras model (default, preferred). An exported .tflite also works (int8
+weights are dequantized), but reading it relies on a private TFLite interpreter API that may be
+missing in other TensorFlow releases; use the .keras model whenever it is available.
+TensorFlow is needed here only; serving with MODULE2_INFERENCE_BACKEND=numpy does not import it.
+
+Usage (from project root):
+  python numpy_export.py                                   # models/pad_level_classifier.keras
+  python numpy_export.py --src models/pad_level_classifier.tflite   # fallback, no .keras at hand
+  python numpy_export.py --src path/to/model.keras --out path/to/weights.npz
+
+Requires: tensorflow
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Keras / TFLite → .npz for NumPy inference")
+    parser.add_argument(
+        "--src",
+        default=None,
+        help="Input .keras/.h5/.tflite (default: module2 config CLASSIFIER_MODEL_PATH)",
+    )
+    parser.add_argument(
+        "--out",
+        default=None,
+        help="Output .npz path (default: module2 config NUMPY_WEIGHTS_PATH)",
+    )
+    args = parser.parse_args()
+
+    from module2 import config
+    from module2.numpy_pad_inference import export_npz_weights
+
+    src = os.path.abspath(args.src or config.CLASSIFIER_MODEL_PATH)
+    if not os.path.isfile(src):
+        raise SystemExit("Model not found: %s" % src)
+    out = export_npz_weights(src, args.out)
+    print("Wrote:", out, "(%d bytes)" % os.path.getsize(out))
+
+
+if __name__ == "__main__":
+    main()
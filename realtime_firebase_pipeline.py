@@ -6,16 +6,31 @@ Sensors (temp, pulse, motion) + user profile; no scaler refit at inference.
 
 Run from project root:
   python realtime_firebase_pipeline.py
+  PIPELINE_FLEET_MODE=1 python realtime_firebase_pipeline.py   # every users/{uid}/sensor, one interpreter
+  PIPELINE_EVENT_MODE=0 python realtime_firebase_pipeline.py   # poll every PIPELINE_LOOP_DELAY_SEC
+  PIPELINE_ASYNC=1 python realtime_firebase_pipeline.py        # asyncio ingest → infer → write stages
+
+Sensor reads are event-driven by default (RTDB listeners, bursts coalesced to the newest sample
+per uid; the mirrored sample is re-pushed every PIPELINE_LOOP_DELAY_SEC without an event);
+polling takes over while the stream is down and listeners are retried.
 
 Requires: firebase-admin, tensorflow, scikit-learn, numpy; .tflite from ``python tflite_convert.py``.
+With MODULE2_INFERENCE_BACKEND=numpy the model runs in pure NumPy from the .npz written by
+``python numpy_export.py`` and tensorflow is never imported; =stream additionally reuses the
+previous tick's conv activations when the window slid by one sample.
 """
 from __future__ import annotations
 
+import asyncio
+import logging
 import os
 import sys
+import threading
 import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, Union
 
 import numpy as np
 
@@ -50,6 +65,14 @@ try:
 except ImportError as exc:
     raise SystemExit("Run from project root so `module2` is importable: %s" % exc) from exc
 
+from module2.log import get_logger
+
+log = get_logger("pipeline")
+# Minimum interval for per-tick lines (prediction, warmup, validation, repeated errors)
+LOG_EVERY = float(getattr(config, "LOG_EVERY_SEC", 5.0))
+# DEBUG per-tick lines (payload, inference, decision detail): 1 in LOG_DEBUG_SAMPLE per vest
+LOG_DEBUG_SAMPLE = int(getattr(config, "LOG_DEBUG_SAMPLE", 10))
+
 try:
     import firebase_admin
     from firebase_admin import credentials, db
@@ -67,21 +90,39 @@ from module2.inference_utils import (
     load_scaler_features_only,
     pad_level_from_index,
     sensors_in_sanity_range,
-    validate_raw_feature_matrix,
 )
-from module2.rolling_buffer import RollingFeatureBuffer
+from module2.async_stages import KeyedStageQueue, StageQueue
+from module2.rolling_buffer import make_feature_buffer, validate_buffer_scaler
+from module2.rtdb import get_db, using_memory_db
 from module2.safety import adjust_pad_level_after_prediction
+from module2.numpy_pad_inference import NumpyPadClassifier, StreamingPadClassifier
 from module2.tflite_pad_inference import PadLevelTfliteInterpreter
-from module2.sensor_payload import get_sensor_payload
-from module2.user_profile import get_resolved_uid, get_user_profile
+from module2.sensor_payload import get_sensor_payload, resolve_sensor_payload
+from module2.sensor_stream import SensorEventStream
+from module2.metrics import METRICS, inc, start_metrics_server, tick
+from module2.stage_timing import dump, dump_due, install_dump_signal, requested_dump, timed
+from module2.tick_fetch import FleetFetcher, TickFetcher
+from module2.tick_scheduler import DeadlineScheduler
+from module2.write_behind import WriteBehindQueue
+from module2.user_profile import (
+    get_default_profile,
+    get_resolved_uid,
+    get_user_profile,
+    profile_from_snapshot,
+    profile_from_user_data,
+    start_profile_store,
+    stop_profile_store,
+)
 
 LABELS: Tuple[str, ...] = tuple(config.PAD_LEVEL_CLASSES)
+Predictor = Union[PadLevelTfliteInterpreter, NumpyPadClassifier]
 
 LOOP_DELAY_SEC = float(os.environ.get("PIPELINE_LOOP_DELAY_SEC", "0.75"))
 HEARTBEAT_SEC = float(os.environ.get("PIPELINE_HEARTBEAT_SEC", "10"))
 DEBUG_EVERY_SEC = float(os.environ.get("PIPELINE_DEBUG_EVERY_SEC", "5"))
 
 SMOOTH_WINDOW = max(1, int(os.environ.get("PIPELINE_SMOOTH_WINDOW", str(config.PREDICTION_SMOOTH_WINDOW))))
+SMOOTH_MODE = os.environ.get("PIPELINE_SMOOTH_MODE", config.PREDICTION_SMOOTH_MODE).strip().lower()
 DEDUPE_READS = os.environ.get("PIPELINE_DEDUPE_SENSOR_READS", "0").strip().lower() in (
     "1",
     "true",
@@ -98,6 +139,123 @@ _DEFAULT_READ_PATHS = os.environ.get(
 )
 READ_PATHS: List[str] = [p.strip().strip("/") for p in _DEFAULT_READ_PATHS.split(",") if p.strip()]
 WRITE_PATH = os.environ.get("FIREBASE_HEATING_WRITE_PATH", "heating").strip().strip("/") or "heating"
+# inference_source written to Firebase: serving backend (tflite | numpy | stream)
+INFERENCE_SOURCE = getattr(config, "INFERENCE_BACKEND", "tflite")
+
+# Fleet mode: one process / one interpreter for every users/{uid}/sensor; writes users/{uid}/<WRITE_PATH>
+FLEET_MODE = os.environ.get("PIPELINE_FLEET_MODE", "0").strip().lower() in ("1", "true", "yes")
+FLEET_USERS_PATH = getattr(config, "FIREBASE_PATH_USERS", "users").strip().strip("/")
+# Concurrent users/{uid}/sensor reads per polling tick (each read is one round trip).
+FLEET_FETCH_WORKERS = max(1, int(os.environ.get("PIPELINE_FLEET_FETCH_WORKERS", "8")))
+
+# Event-driven ingestion: RTDB listeners wake the loop on change (bursts coalesced to the latest
+# sample per uid); with no event for LOOP_DELAY_SEC the mirrored sample is pushed again, so the
+# buffer keeps the polling cadence and BUFFER_STALE_SECONDS still means "no data", not "no change".
+# While the stream is down, poll every LOOP_DELAY_SEC and retry the listeners.
+EVENT_MODE = os.environ.get("PIPELINE_EVENT_MODE", "1").strip().lower() in ("1", "true", "yes")
+STREAM_RETRY_SEC = float(os.environ.get("PIPELINE_STREAM_RETRY_SEC", "10"))
+
+# Write-behind: pad_level writes go through background writers (newest decision per path,
+# retried with backoff) so the control loop never blocks on Firebase. 0 = synchronous writes.
+# A path is given up after WRITE_MAX_ATTEMPTS failures or WRITE_MAX_AGE_SEC of failing (0 = no
+# limit) and its decision counts as unsent again. WRITE_WORKERS writes run concurrently (fleet).
+ASYNC_WRITES = os.environ.get("PIPELINE_ASYNC_WRITES", "1").strip().lower() in ("1", "true", "yes")
+WRITE_QUEUE_MAX = max(1, int(os.environ.get("PIPELINE_WRITE_QUEUE_MAX", "1024")))
+WRITE_MAX_ATTEMPTS = max(0, int(os.environ.get("PIPELINE_WRITE_MAX_ATTEMPTS", "8")))
+WRITE_MAX_AGE_SEC = float(os.environ.get("PIPELINE_WRITE_MAX_AGE_SEC", "120"))
+WRITE_WORKERS = max(1, int(os.environ.get("PIPELINE_WRITE_WORKERS", "4" if FLEET_MODE else "1")))
+WRITE_QUEUE: Optional[WriteBehindQueue] = None
+# Paths whose queued write was given up (writer threads → loop thread, see _write_due).
+_WRITES_GIVEN_UP: Set[str] = set()
+_WRITES_GIVEN_UP_LOCK = threading.Lock()
+
+# Change-driven writes: heating is written when the decision (pad_level, state, source, version)
+# changes, or every WRITE_KEEPALIVE_SEC otherwise (0 = only on change). Latency goes out as
+# p50 / p95 / max over the inferences since the previous write.
+WRITE_KEEPALIVE_SEC = float(os.environ.get("PIPELINE_WRITE_KEEPALIVE_SEC", "30"))
+
+# Batched polling reads (single vest): meta/current_user, sensors/latest and users/{uid} issued
+# concurrently each tick — one round trip instead of three or four. 0 = sequential reads.
+BATCHED_READS = os.environ.get("PIPELINE_BATCHED_READS", "1").strip().lower() in ("1", "true", "yes")
+TICK_FETCHER: Optional[TickFetcher] = None
+
+# Per-stage timing histograms (module2/stage_timing.py) are printed every TIMING_DUMP_SEC from the
+# heartbeat (0 = only on SIGUSR1 / exit).
+TIMING_DUMP_SEC = float(os.environ.get("PIPELINE_TIMING_DUMP_SEC", str(config.STAGE_TIMING_DUMP_SEC)))
+
+# Staged pipeline (single vest): ingest, inference and write run as asyncio stages joined by
+# queues, so network I/O overlaps with inference. The sample queue is bounded (oldest sample
+# dropped when full); the write queue keeps the newest write per path and never drops one.
+STAGED_MODE = os.environ.get("PIPELINE_ASYNC", "0").strip().lower() in ("1", "true", "yes")
+STAGE_QUEUE_MAX = max(1, int(os.environ.get("PIPELINE_STAGE_QUEUE_MAX", "64")))
+
+
+class LatencyWindow:
+    """Inference latencies since the last write (bounded), summarized as p50 / p95 / max."""
+
+    def __init__(self, maxlen: int = 4096) -> None:
+        self._ms: deque = deque(maxlen=maxlen)
+
+    def add(self, latency_ms: float) -> None:
+        if latency_ms > 0.0:
+            self._ms.append(float(latency_ms))
+
+    def reset(self) -> None:
+        self._ms.clear()
+
+    def summary(self) -> Dict[str, float]:
+        if not self._ms:
+            return {"p50": 0.0, "p95": 0.0, "max": 0.0, "n": 0}
+        arr = np.fromiter(self._ms, dtype=np.float64, count=len(self._ms))
+        p50, p95 = np.percentile(arr, (50, 95))
+        return {"p50": float(p50), "p95": float(p95), "max": float(arr.max()), "n": int(arr.size)}
+
+
+class VestState:
+    """Per-uid inference state: rolling buffer, probability smoother, last write / sensor fingerprint."""
+
+    def __init__(self, uid: Optional[str] = None, write_path: str = WRITE_PATH) -> None:
+        self.uid = uid
+        self.write_path = write_path
+        self.buf = make_feature_buffer(
+            config.SEQ_LENGTH, "raw" if config.USE_RAW_INPUT_MODEL else None
+        )
+        self.smoother = PadLevelProbabilitySmoother(window=SMOOTH_WINDOW, mode=SMOOTH_MODE)
+        self.last_sent: Optional[Tuple[Any, ...]] = None
+        self.last_fp: Optional[Tuple[Any, ...]] = None
+        self.last_write_at = float("-inf")
+        self.last_push = float("-inf")  # monotonic time of the last sample pushed (fleet re-push)
+        self.latency = LatencyWindow()
+        self.writes_skipped = 0
+
+
+class FleetSmoother:
+    """One PadLevelProbabilitySmoother for the fleet: a stream row per uid, one call per tick."""
+
+    def __init__(self, capacity: int = 64) -> None:
+        self.smoother = PadLevelProbabilitySmoother(
+            window=SMOOTH_WINDOW, mode=SMOOTH_MODE, streams=capacity
+        )
+        self._rows: Dict[str, int] = {}
+        self._free: List[int] = []
+
+    def row(self, uid: str) -> int:
+        r = self._rows.get(uid)
+        if r is None:
+            r = self._free.pop() if self._free else len(self._rows)
+            self.smoother.ensure_streams(r + 1)
+            self.smoother.reset([r])
+            self._rows[uid] = r
+        return r
+
+    def release(self, uid: str) -> None:
+        r = self._rows.pop(uid, None)
+        if r is not None:
+            self._free.append(r)
+
+    def smooth(self, uids: List[str], probs: np.ndarray) -> np.ndarray:
+        """(M, NUM_PAD_CLASSES) for distinct ``uids`` → smoothed (M, NUM_PAD_CLASSES)."""
+        return self.smoother.smooth_proba(probs, [self.row(u) for u in uids])
 
 
 def _probs_from_pad_level(name: str) -> np.ndarray:
@@ -195,6 +353,11 @@ def find_firebase_admin_json() -> Optional[Path]:
 
 
 def init_firebase() -> bool:
+    global db
+    if using_memory_db():
+        # MODULE2_DB_BACKEND=memory: in-process RTDB stand-in, no credentials or network.
+        db = get_db()
+        return True
     if firebase_admin is None or credentials is None or db is None:
         return False
     if firebase_admin._apps:
@@ -239,36 +402,150 @@ def diagnose_firebase() -> str:
     return "Check DB URL / JSON."
 
 
-def load_scaler_and_tflite() -> Tuple[Any, PadLevelTfliteInterpreter, Path, Path]:
+def load_scaler_and_tflite() -> Tuple[Any, Predictor, Optional[Path], Path]:
+    """
+    Scaler + interpreter. With MODULE2_RAW_INPUT_MODEL=1 the raw-input model is loaded and no
+    scaler is returned (features and scaling are inside the graph).
+    """
+    if config.USE_RAW_INPUT_MODEL:
+        if INFERENCE_SOURCE != "tflite":
+            raise ValueError("MODULE2_RAW_INPUT_MODEL=1 requires the tflite backend")
+        tflite_path = Path(config.TFLITE_RAW_MODEL_PATH)
+        if not tflite_path.is_file():
+            raise FileNotFoundError(
+                "Raw-input TFLite model missing: %s — run: python tflite_convert.py --raw-inputs"
+                % tflite_path
+            )
+        interp = PadLevelTfliteInterpreter(str(tflite_path))
+        if not interp.raw_inputs:
+            raise ValueError("%s is not a raw-input model" % tflite_path)
+        return None, interp, None, tflite_path.resolve()
+
     scaler_path = Path(config.SCALER_FEATURES_PATH)
+    if INFERENCE_SOURCE == "stream" and FLEET_MODE:
+        # One StreamingPadClassifier holds one vest's window; fleet ticks go through
+        # predict_proba_batch (full recompute), i.e. plain numpy under a "stream" version tag.
+        raise ValueError(
+            "MODULE2_INFERENCE_BACKEND=stream is single-vest; use numpy with PIPELINE_FLEET_MODE=1"
+        )
+    if INFERENCE_SOURCE in ("numpy", "stream"):
+        npz_path = Path(config.NUMPY_WEIGHTS_PATH)
+        if not npz_path.is_file():
+            raise FileNotFoundError(
+                "NumPy weights missing: %s — run: python numpy_export.py" % npz_path
+            )
+        scaler = _load_scaler(scaler_path)
+        cls = StreamingPadClassifier if INFERENCE_SOURCE == "stream" else NumpyPadClassifier
+        return scaler, cls(str(npz_path)), scaler_path.resolve(), npz_path.resolve()
+
     tflite_path = Path(config.TFLITE_MODEL_PATH)
     if not tflite_path.is_file():
         raise FileNotFoundError(
             "TFLite model missing: %s — train then: python tflite_convert.py" % tflite_path
         )
-    scaler = load_scaler_features_only(str(scaler_path))
+    scaler = _load_scaler(scaler_path)
     interp = PadLevelTfliteInterpreter(str(tflite_path))
     return scaler, interp, scaler_path.resolve(), tflite_path.resolve()
 
 
+def _load_scaler(path: Path) -> Any:
+    scaler = load_scaler_features_only(str(path))
+    validate_buffer_scaler(scaler)
+    return scaler
+
+
 def fetch_sensor_merged() -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[Tuple[Any, ...]]]:
     """
     Unified sensor source:
       1) sensors/latest
       2) users/{uid}/sensor
+    With BATCHED_READS, one concurrent round of meta/current_user, sensors/latest and users/{uid}
+    (sensor + profile from the same node) instead of sequential reads.
     """
-    uid = get_resolved_uid()
-    payload = get_sensor_payload(uid)
+    if TICK_FETCHER is not None:
+        snap = TICK_FETCHER.fetch()
+        user = snap["user"] if isinstance(snap["user"], dict) else {}
+        payload = resolve_sensor_payload(snap["latest"], user.get("sensor"))
+        profile = profile_from_snapshot(snap["uid"], user)
+    else:
+        payload = get_sensor_payload(get_resolved_uid())
+        profile = None
     if payload is None:
         return None, None, None
 
-    print("[sensor] using payload:", payload, flush=True)
-    norm = normalize_sensor_payload(payload)
-    temp, pulse = norm.get("temp"), norm.get("pulse")
-    if temp is None or pulse is None:
+    log.debug("[sensor] using payload: %s", payload, sample=LOG_DEBUG_SAMPLE)
+    with timed("normalize"):
+        norm = normalize_sensor_payload(payload)
+    if norm.get("temp") is None or norm.get("pulse") is None:
         return None, None, None
 
-    profile = get_user_profile()
+    # No usable users/{uid} in the batched read: the profile module resolves (and may switch) the uid.
+    norm = _merge_profile(norm, profile if profile is not None else get_user_profile())
+    return norm, "unified_sensor", _sensor_fingerprint(norm)
+
+
+def _single_stream_paths(uid: Optional[str]) -> List[str]:
+    """Listener paths matching get_sensor_payload's priority (sensors/latest, then users/{uid}/sensor)."""
+    paths = [getattr(config, "FIREBASE_PATH_SENSORS", "sensors/latest").strip("/")]
+    if uid:
+        paths.append("%s/%s/sensor" % (FLEET_USERS_PATH, uid))
+    return paths
+
+
+def stream_sensor_merged(
+    stream: SensorEventStream,
+) -> Tuple[Optional[Dict[str, Any]], Optional[str], Optional[Tuple[Any, ...]]]:
+    """
+    ``fetch_sensor_merged`` over the listener mirror: the latest merged sample (intermediate
+    burst values are skipped). Returned whether or not an event arrived since the last call —
+    like a poll, an unchanged reading is pushed again so the rolling buffer keeps its cadence
+    and does not go stale while the device is quiet.
+    """
+    for p in stream.paths:
+        stream.take_dirty(p)
+    snaps = [stream.snapshot(p) for p in stream.paths]
+    payload = resolve_sensor_payload(snaps[0], snaps[1] if len(snaps) > 1 else None)
+    if payload is None:
+        return None, None, None
+    with timed("normalize"):
+        norm = normalize_sensor_payload(payload)
+    if norm.get("temp") is None or norm.get("pulse") is None:
+        return None, None, None
+    norm = _merge_profile(norm, get_user_profile())
+    return norm, "stream", _sensor_fingerprint(norm)
+
+
+def _ensure_stream(
+    stream: Optional[SensorEventStream],
+    paths: List[str],
+    next_retry: float,
+    children: Optional[Tuple[str, ...]] = None,
+) -> Tuple[Optional[SensorEventStream], float]:
+    """
+    Keep listeners attached to ``paths``. Returns (stream or None while polling, next retry time);
+    a stopped listener or changed path set (e.g. new uid) closes the old stream. ``children``
+    is passed to SensorEventStream (which children of a top-level key count as a change).
+    """
+    if stream is not None and stream.alive() and stream.paths == paths:
+        return stream, next_retry
+    if stream is not None:
+        stream.close()
+        log.warning("[stream] listener on %s stopped — polling fallback", ", ".join(stream.paths))
+        stream = None
+    now = time.monotonic()
+    if now < next_retry:
+        return None, next_retry
+    stream = SensorEventStream(paths, db, children)
+    if stream.start():
+        log.info("[stream] listening on %s", ", ".join(stream.paths))
+        return stream, next_retry
+    log.warning(
+        "[stream] unavailable — polling every %.2fs, retry in %.0fs", LOOP_DELAY_SEC, STREAM_RETRY_SEC
+    )
+    return None, now + STREAM_RETRY_SEC
+
+
+def _merge_profile(norm: Dict[str, Any], profile: Dict[str, float]) -> Dict[str, Any]:
     # Prefer per-sensor demographics if present; otherwise use Firebase-resolved profile.
     if norm.get("age_years") is None:
         norm["age_years"] = float(profile["age_years"])
@@ -280,10 +557,100 @@ def fetch_sensor_merged() -> Tuple[Optional[Dict[str, Any]], Optional[str], Opti
         norm["gender_0_1"] = float(profile["gender_0_1"])
     if norm.get("motion_level_0_1") is None:
         norm["motion_level_0_1"] = 0.0
+    return norm
+
+
+def _sensor_fingerprint(norm: Dict[str, Any]) -> Tuple[Any, ...]:
+    return (
+        round(float(norm["temp"]), 4),
+        round(float(norm["pulse"]), 2),
+        round(float(norm["motion_level_0_1"]), 2),
+    )
+
+
+def fetch_fleet_sensors(
+    fetcher: FleetFetcher,
+) -> Tuple[Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]], Set[str]]:
+    """
+    Fleet poll: ``users/{uid}/sensor`` for every uid (FleetFetcher: shallow uid list, concurrent
+    per-uid reads, profiles cached) → ({uid: (normalized sample + profile, fingerprint)}, uids
+    whose read failed this tick).
+
+    A uid is active when ``users/{uid}/sensor`` carries numeric temp and pulse.
+    """
+    users, failed = fetcher.fetch()
+    out: Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]] = {}
+    for uid, user_data in users.items():
+        sample = _fleet_sample(uid, user_data)
+        if sample is not None:
+            out[uid] = sample
+    return out, failed
+
+
+def _fleet_sample(uid: str, user_data: Any) -> Optional[Tuple[Dict[str, Any], Tuple[Any, ...]]]:
+    if not isinstance(user_data, dict) or not isinstance(user_data.get("sensor"), dict):
+        return None
+    with timed("normalize"):
+        norm = normalize_sensor_payload(user_data["sensor"])
+    if norm.get("temp") is None or norm.get("pulse") is None:
+        return None
+    profile = profile_from_user_data(user_data, uid)
+    if profile is None:
+        profile = get_default_profile()
+    norm = _merge_profile(norm, profile)
+    return norm, _sensor_fingerprint(norm)
 
-    motion = float(norm["motion_level_0_1"])
-    fingerprint = (round(float(temp), 4), round(float(pulse), 2), round(motion, 2))
-    return norm, "unified_sensor", fingerprint
+
+# Only a new sensor sample makes a uid dirty: our own users/{uid}/heating writes (and status or
+# profile edits, which the mirror still picks up) must not push the same sample again.
+FLEET_STREAM_CHILDREN = ("sensor",)
+
+
+def stream_fleet_sensors(
+    stream: SensorEventStream,
+) -> Tuple[Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]], Optional[set]]:
+    """
+    Fleet samples for uids changed since the last call, from the ``users`` listener mirror.
+    Returns (samples, touched uids); touched None means the whole tree was replaced.
+    """
+    dirty = stream.take_dirty(FLEET_USERS_PATH)
+    if dirty is None:
+        users = stream.snapshot(FLEET_USERS_PATH)
+        uids = list(users) if isinstance(users, dict) else []
+    else:
+        users = None
+        uids = sorted(dirty)
+    out: Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]] = {}
+    for uid in uids:
+        user_data = users.get(uid) if users is not None else stream.snapshot(FLEET_USERS_PATH, uid)
+        sample = _fleet_sample(str(uid), user_data)
+        if sample is not None:
+            out[str(uid)] = sample
+    return out, (None if dirty is None else set(dirty))
+
+
+def _heating_payload(
+    pad_level: str,
+    inference_state: str,
+    inference_source: str,
+    model_version: str,
+    latency_ms: float,
+    latency_stats: Optional[Dict[str, float]] = None,
+) -> Dict[str, Any]:
+    payload = {
+        "pad_level": str(pad_level).upper(),
+        "inference_state": inference_state,
+        "inference_source": inference_source,
+        "model_version": model_version,
+        "inference_latency_ms": round(float(latency_ms), 2),
+        "updated_at": int(time.time() * 1000),
+    }
+    if latency_stats is not None:
+        payload["inference_latency_ms"] = round(float(latency_stats["p50"]), 2)
+        payload["inference_latency_p95_ms"] = round(float(latency_stats["p95"]), 2)
+        payload["inference_latency_max_ms"] = round(float(latency_stats["max"]), 2)
+        payload["inference_latency_samples"] = int(latency_stats["n"])
+    return payload
 
 
 def write_pad_level(
@@ -293,194 +660,930 @@ def write_pad_level(
     last_sent: Optional[Tuple[Any, ...]],
     latency_ms: float = 0.0,
     model_version: str = "",
+    path: Optional[str] = None,
+    latency_stats: Optional[Dict[str, float]] = None,
+    force: bool = False,
 ) -> Optional[Tuple[Any, ...]]:
-    mv = model_version or get_model_version_tag("tflite")
-    key = (pad_level, inference_state, inference_source, round(float(latency_ms), 2), mv)
-    if last_sent == key:
+    """
+    Update ``path`` (default WRITE_PATH) unless the decision equals ``last_sent`` (``force``
+    writes anyway, e.g. keep-alive); returns the decision key
+    (pad_level, inference_state, inference_source, model_version).
+
+    ``latency_stats`` (LatencyWindow.summary) adds p95 / max / sample count next to
+    ``inference_latency_ms``, which then carries the p50.
+
+    With WRITE_QUEUE set the payload is only enqueued (key returned immediately; the writer
+    retries failures and, once it gives up, the next decision for ``path`` is written again;
+    a full queue keeps ``last_sent``), otherwise the update is synchronous and
+    a failure keeps ``last_sent``.
+    """
+    path = path or WRITE_PATH
+    mv = model_version or get_model_version_tag(INFERENCE_SOURCE)
+    key = (pad_level, inference_state, inference_source, mv)
+    if last_sent == key and not force:
         return last_sent
-    try:
-        db.reference(WRITE_PATH).update(
-            {
-                "pad_level": str(pad_level).upper(),
-                "inference_state": inference_state,
-                "inference_source": inference_source,
-                "model_version": mv,
-                "inference_latency_ms": round(float(latency_ms), 2),
-            }
-        )
-        print(
-            "Firebase updated: %s pad_level=%s state=%s source=%s latency_ms=%.2f version=%s"
-            % (WRITE_PATH, pad_level, inference_state, inference_source, latency_ms, mv),
-            flush=True,
+    payload = _heating_payload(pad_level, inference_state, inference_source, mv, latency_ms, latency_stats)
+    if WRITE_QUEUE is not None:
+        if WRITE_QUEUE.submit(path, payload):
+            return key
+        log.warning(
+            "Write queue full (%d paths pending); %s not queued, retried with the next decision",
+            WRITE_QUEUE.maxsize, path, every=LOG_EVERY,
         )
+        return last_sent
+    try:
+        _firebase_update(path, payload)
         return key
     except Exception as exc:
-        print("Firebase write failed: %s" % exc, file=sys.stderr, flush=True)
+        log.error("Firebase write failed: %s", exc, every=LOG_EVERY, key=("write", path))
         return last_sent
 
 
+def _on_write_given_up(path: str, payload: Any) -> None:
+    # Writer thread: only record the path; the loop thread clears that vest's last_sent.
+    with _WRITES_GIVEN_UP_LOCK:
+        _WRITES_GIVEN_UP.add(path)
+
+
+def _take_write_given_up(path: str) -> bool:
+    with _WRITES_GIVEN_UP_LOCK:
+        if path in _WRITES_GIVEN_UP:
+            _WRITES_GIVEN_UP.discard(path)
+            return True
+        return False
+
+
+def _write_due(
+    state: VestState,
+    level: str,
+    inference_state: str,
+    latency_ms: float,
+    model_version: str,
+) -> Optional[Tuple[Tuple[Any, ...], str, float]]:
+    """emit_decision's policy: (key, model_version, now) when a write is due, else None."""
+    if _WRITES_GIVEN_UP and _take_write_given_up(state.write_path):
+        state.last_sent = None
+    state.latency.add(latency_ms)
+    inc("decisions_total", state=inference_state)
+    mv = model_version or get_model_version_tag(INFERENCE_SOURCE)
+    key = (level, inference_state, INFERENCE_SOURCE, mv)
+    now = time.monotonic()
+    changed = state.last_sent != key
+    keepalive = WRITE_KEEPALIVE_SEC > 0 and now - state.last_write_at >= WRITE_KEEPALIVE_SEC
+    if not changed and not keepalive:
+        state.writes_skipped += 1
+        return None
+    return key, mv, now
+
+
+def plan_decision(
+    state: VestState,
+    level: str,
+    inference_state: str,
+    latency_ms: float,
+    model_version: str,
+) -> Optional[Tuple[Tuple[Any, ...], str, Dict[str, Any]]]:
+    """
+    ``emit_decision`` without the write, for a loop that writes on another thread: applies the
+    same policy and updates ``state`` as if the write succeeded. Returns (key, path, payload)
+    to hand to ``_firebase_update``, or None when no write is due. On a failed write, clear
+    ``state.last_sent`` (same thread as this call) so the next decision is written again.
+    """
+    due = _write_due(state, level, inference_state, latency_ms, model_version)
+    if due is None:
+        return None
+    key, mv, now = due
+    payload = _heating_payload(
+        level, inference_state, INFERENCE_SOURCE, mv, latency_ms, state.latency.summary()
+    )
+    state.last_sent = key
+    state.last_write_at = now
+    state.latency.reset()
+    return key, state.write_path, payload
+
+
+def emit_decision(
+    state: VestState,
+    level: str,
+    inference_state: str,
+    latency_ms: float,
+    model_version: str,
+) -> None:
+    """
+    Change-driven write policy for one vest: record ``latency_ms``; write only when the decision
+    differs from ``state.last_sent`` or WRITE_KEEPALIVE_SEC has passed since the last write.
+    """
+    due = _write_due(state, level, inference_state, latency_ms, model_version)
+    if due is None:
+        return
+    key, mv, now = due
+    with timed("emit.write"):
+        sent = write_pad_level(
+            level,
+            inference_state,
+            INFERENCE_SOURCE,
+            state.last_sent,
+            latency_ms,
+            mv,
+            state.write_path,
+            latency_stats=state.latency.summary(),
+            force=True,
+        )
+    if sent == key:
+        state.last_write_at = now
+        state.latency.reset()
+    state.last_sent = sent
+
+
+def _firebase_update(path: str, payload: Dict[str, Any]) -> None:
+    try:
+        with timed("write"):
+            db.reference(path).update(payload)
+    except Exception:
+        inc("writes_total", result="error")
+        raise
+    inc("writes_total", result="ok")
+    log.info(
+        "Firebase updated: %s pad_level=%s state=%s source=%s latency_ms=%.2f version=%s",
+        path,
+        payload["pad_level"],
+        payload["inference_state"],
+        payload["inference_source"],
+        payload["inference_latency_ms"],
+        payload["model_version"],
+    )
+
+
+def _print_timing_report() -> None:
+    """Stage histograms (p50/p95/p99) every TIMING_DUMP_SEC; reset after each report."""
+    report = dump_due(TIMING_DUMP_SEC)
+    if report:
+        log.info("%s", report)
+
+
+def _print_requested_dump() -> None:
+    """Once per loop iteration: the dump SIGUSR1 asked for (the handler only sets a flag)."""
+    report = requested_dump()
+    if report:
+        log.info("%s", report)
+
+
+def _write_queue_status() -> str:
+    if WRITE_QUEUE is None:
+        return "writes=sync"
+    st = WRITE_QUEUE.stats()
+    return (
+        "write_queue=%d written=%d failed=%d given_up=%d coalesced=%d rejected=%d "
+        "write_ms mean=%.1f max=%.1f"
+    ) % (
+        st["depth"],
+        st["written"],
+        st["failed"],
+        st["given_up"],
+        st["coalesced"],
+        st["rejected"],
+        st["write_ms_mean"],
+        st["write_ms_max"],
+    )
+
+
+def prepare_sample(
+    state: VestState,
+    norm: Dict[str, Any],
+    scaler: Any,
+    model_version: str,
+    emit: Optional[Callable[..., None]] = None,
+) -> Optional[Tuple[np.ndarray, float, float, bool]]:
+    """
+    Validate one normalized sample and push it into ``state.buf``.
+
+    Returns (model input, clipped temp, raw pulse, sensor_ok) when a model decision is due — the
+    scaled (1, SEQ_LENGTH, 10) window, or raw rows for the raw-input model; None when the sample was fully handled here (ignore-mode fallback or WARMUP written).
+    Decisions go to ``emit`` (default emit_decision; same arguments).
+    """
+    emit = emit or emit_decision
+    seq_len = state.buf.seq_len
+    tag = "" if state.uid is None else "[%s] " % state.uid
+
+    raw_temp_in = float(norm["temp"])
+    raw_pulse_in = float(norm["pulse"])
+    motion = float(norm["motion_level_0_1"])
+    age = float(norm["age_years"])
+    height = float(norm["height_cm"])
+    weight = float(norm["weight_kg"])
+    gender = float(norm["gender_0_1"])
+
+    invalid = not sensors_in_sanity_range(raw_temp_in, raw_pulse_in, motion)
+    if invalid:
+        log.warning(
+            "%s[validate] out-of-range temp=%.3f pulse=%.3f motion=%.3f mode=%s",
+            tag,
+            raw_temp_in,
+            raw_pulse_in,
+            motion,
+            OUT_OF_RANGE_MODE,
+            every=LOG_EVERY,
+            key=("validate", state.uid),
+        )
+        if OUT_OF_RANGE_MODE == "ignore":
+            level = "OFF"
+            if state.last_sent:
+                level = state.last_sent[0]
+            emit(state, level, "fallback", 0.0, model_version)
+            return None
+        temp = float(np.clip(raw_temp_in, config.SENSOR_TEMP_MIN_C, config.SENSOR_TEMP_MAX_C))
+        pulse = float(
+            np.clip(raw_pulse_in, config.SENSOR_PULSE_MIN_BPM, config.SENSOR_PULSE_MAX_BPM)
+        )
+    else:
+        temp = raw_temp_in
+        pulse = raw_pulse_in
+
+    t, p, m = clip_sensors_for_buffer(temp, pulse, motion)
+    sensor_ok = sensors_in_sanity_range(raw_temp_in, raw_pulse_in, motion)
+
+    state.buf.push_observation(t, p, m, age, height, weight, gender)
+    scaled_batch = state.buf.model_input(scaler)
+
+    if scaled_batch is None:
+        log.info(
+            "%s[buffer] %s/%s steps (WARMUP — no prediction)",
+            tag,
+            len(state.buf),
+            seq_len,
+            every=LOG_EVERY,
+            key=("warmup", state.uid),
+        )
+        emit(state, "WARMUP", "warmup", 0.0, model_version)
+        return None
+
+    return scaled_batch, t, raw_pulse_in, sensor_ok
+
+
+def _gate_model_probs(probs: np.ndarray, t: float, conf_min: float) -> Tuple[np.ndarray, str]:
+    """Low-confidence model output → temperature fallback."""
+    if float(np.max(probs)) < conf_min:
+        return _probs_from_pad_level(fallback_pad_level_from_temp(t)), "fallback"
+    return probs, "model"
+
+
+def finish_sample(
+    state: VestState,
+    t: float,
+    raw_pulse_in: float,
+    probs: np.ndarray,
+    inf_state: str,
+    latency_ms: float,
+    model_version: str,
+    src: Optional[str] = None,
+    debug: bool = False,
+    avg_probs: Optional[np.ndarray] = None,
+    emit: Optional[Callable[..., None]] = None,
+) -> None:
+    """Smooth → safety → write for one vest's decision (``avg_probs``: already smoothed)."""
+    tag = "" if state.uid is None else "[%s] " % state.uid
+    if avg_probs is None:
+        with timed("smooth"):
+            avg_probs = state.smoother.smooth_proba(probs)
+    k = int(np.argmax(avg_probs))
+    ml_level = LABELS[k]
+    with timed("safety"):
+        level = adjust_pad_level_after_prediction(t, raw_pulse_in, ml_level)
+    log.info("%s[model] prediction: %s", tag, level, every=LOG_EVERY, key=("prediction", state.uid))
+
+    if debug and log.is_enabled(logging.DEBUG):
+        # Same sample rate and call count per key, so the three lines come out on the same tick.
+        log.debug("[debug] source=%s", src, sample=LOG_DEBUG_SAMPLE, key=("debug_src", state.uid))
+        log.debug(
+            "[debug] ML -> %s | after safety -> %s", ml_level, level,
+            sample=LOG_DEBUG_SAMPLE, key=("debug_level", state.uid),
+        )
+        log.debug(
+            "[debug] avg_probs: %s",
+            dict(zip(LABELS, [float(x) for x in np.asarray(avg_probs).reshape(-1)])),
+            sample=LOG_DEBUG_SAMPLE, key=("debug_probs", state.uid),
+        )
+
+    (emit or emit_decision)(state, level, inf_state, latency_ms, model_version)
+
+
+def process_sample(
+    state: VestState,
+    norm: Dict[str, Any],
+    scaler: Any,
+    interp: Predictor,
+    model_version: str,
+    conf_min: float,
+    src: Optional[str] = None,
+    debug: bool = False,
+    emit: Optional[Callable[..., None]] = None,
+) -> None:
+    """
+    One normalized sample for one vest: validate → buffer → scale → TFLite → smooth → safety → write.
+
+    Updates ``state`` in place (buffer, smoother, ``last_sent``). ``emit`` replaces
+    emit_decision, e.g. to hand the decision to a separate write stage.
+    """
+    prepared = prepare_sample(state, norm, scaler, model_version, emit)
+    if prepared is None:
+        return
+    scaled_batch, t, raw_pulse_in, sensor_ok = prepared
+    tag = "" if state.uid is None else "[%s] " % state.uid
+
+    latency_ms = 0.0
+    if not sensor_ok:
+        probs = _probs_from_pad_level(fallback_pad_level_from_temp(t))
+        inf_state = "fallback"
+    else:
+        try:
+            log.debug(
+                "%s[model] running inference", tag, sample=LOG_DEBUG_SAMPLE, key=("inference", state.uid)
+            )
+            with timed("predict"):
+                probs, latency_ms = interp.predict_proba_timed(scaled_batch)
+            probs, inf_state = _gate_model_probs(probs, t, conf_min)
+        except Exception as exc:
+            log.warning(
+                "%s[fallback] TFLite failed: %r", tag, exc, every=LOG_EVERY, key=("tflite", state.uid)
+            )
+            probs = _probs_from_pad_level(fallback_pad_level_from_temp(t))
+            inf_state = "fallback"
+            latency_ms = 0.0
+
+    finish_sample(
+        state, t, raw_pulse_in, probs, inf_state, latency_ms, model_version, src, debug, emit=emit
+    )
+
+
+def score_fleet_batch(
+    ready: List[Tuple[VestState, np.ndarray, float, float, bool]],
+    interp: Predictor,
+    model_version: str,
+    conf_min: float,
+    smoother: Optional[FleetSmoother] = None,
+) -> None:
+    """
+    Fleet tick: every warm vest with sane sensors is scored in a single ``predict_proba_batch``
+    invoke; the per-batch latency is reported for each decision in it. With ``smoother`` all
+    decisions of the tick are smoothed in one vectorized call.
+    """
+    model_rows = [i for i, r in enumerate(ready) if r[4]]
+    batch_probs: Optional[np.ndarray] = None
+    latency_ms = 0.0
+    if model_rows:
+        try:
+            x = np.concatenate([ready[i][1] for i in model_rows], axis=0)
+            with timed("predict_batch"):
+                batch_probs, latency_ms = interp.predict_proba_batch(x)
+        except Exception as exc:
+            log.warning("[fallback] TFLite batch failed: %r", exc, every=LOG_EVERY)
+            batch_probs = None
+            latency_ms = 0.0
+    row_of = {i: j for j, i in enumerate(model_rows)}
+
+    decisions: List[Tuple[np.ndarray, str, float]] = []
+    for i, (state, _, t, raw_pulse_in, sensor_ok) in enumerate(ready):
+        if sensor_ok and batch_probs is not None:
+            probs, inf_state = _gate_model_probs(batch_probs[row_of[i]], t, conf_min)
+            decisions.append((probs, inf_state, latency_ms))
+        else:
+            probs = _probs_from_pad_level(fallback_pad_level_from_temp(t))
+            decisions.append((probs, "fallback", 0.0))
+
+    smoothed: List[Optional[np.ndarray]] = [None] * len(ready)
+    if smoother is not None and decisions:
+        with timed("smooth_batch"):
+            avg = smoother.smooth([str(r[0].uid) for r in ready], np.stack([d[0] for d in decisions]))
+        smoothed = list(avg)
+
+    for (state, _, t, raw_pulse_in, _), (probs, inf_state, lat), avg_probs in zip(
+        ready, decisions, smoothed
+    ):
+        try:
+            finish_sample(
+                state, t, raw_pulse_in, probs, inf_state, lat, model_version, "fleet",
+                avg_probs=avg_probs,
+            )
+        except Exception as exc:
+            log.error("[%s] Loop error: %r", state.uid, exc, every=LOG_EVERY, key=("loop", state.uid))
+
+
+def _fleet_stream_samples(
+    states: Dict[str, VestState],
+    fresh: Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]],
+    mirrored: Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]],
+    now: float,
+) -> Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]]:
+    """
+    Samples to push on a listener wake: every uid that changed (``fresh``), plus each quiet uid's
+    mirrored sample once LOOP_DELAY_SEC has passed since that uid's own last push — as a poll
+    would, so one busy vest does not pad the other vests' buffers with duplicate rows.
+    """
+    samples = dict(fresh)
+    for uid, sample in mirrored.items():
+        if uid in samples:
+            continue
+        state = states.get(uid)
+        if state is None or now - state.last_push >= LOOP_DELAY_SEC:
+            samples[uid] = sample
+    return samples
+
+
+def _fleet_repush_wait(
+    states: Dict[str, VestState],
+    mirrored: Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]],
+) -> float:
+    """Listener wait: until the first quiet uid's re-push is due, at most LOOP_DELAY_SEC."""
+    due = min(
+        (states[u].last_push for u in mirrored if u in states), default=float("inf")
+    ) + LOOP_DELAY_SEC
+    return min(LOOP_DELAY_SEC, max(0.0, due - time.monotonic()))
+
+
+def run_fleet(
+    scaler: Any,
+    interp: Predictor,
+    model_version: str,
+    conf_min: float,
+) -> None:
+    """
+    Fleet loop: per-uid ``VestState`` in one process; the single interpreter scores every warm
+    vest in one batched invoke per tick. States for uids that leave ``users`` are dropped.
+
+    With EVENT_MODE a ``users`` listener wakes the loop when a sensor sample changes (heating /
+    status / profile writes do not count); changed uids are pushed at once, and a quiet uid's
+    mirrored sample again LOOP_DELAY_SEC after its own last push, so it does not go stale.
+    Otherwise (or while the stream is down) every ``users/{uid}/sensor`` is polled on a fixed
+    LOOP_DELAY_SEC grid (FleetFetcher: uid keys listed shallowly, one concurrent round of reads).
+    """
+    seq_len = int(config.SEQ_LENGTH)
+    states: Dict[str, VestState] = {}
+    # Latest valid sample per uid in the listener mirror (rebuilt when the stream restarts).
+    mirrored: Dict[str, Tuple[Dict[str, Any], Tuple[Any, ...]]] = {}
+    smoother = FleetSmoother()
+    fetcher = FleetFetcher(db, workers=FLEET_FETCH_WORKERS)
+    stream: Optional[SensorEventStream] = None
+    next_retry = 0.0
+    next_hb = time.monotonic()
+    sched = DeadlineScheduler(LOOP_DELAY_SEC)
+    METRICS.gauge_fn("vests_active", lambda: len(states))
+    METRICS.gauge_fn(
+        "vests_warm", lambda: sum(1 for st in list(states.values()) if len(st.buf) >= seq_len)
+    )
+    while True:
+        try:
+            _pace(sched, stream)
+            tick()
+            if EVENT_MODE:
+                stream, next_retry = _ensure_stream(
+                    stream, [FLEET_USERS_PATH], next_retry, FLEET_STREAM_CHILDREN
+                )
+            if stream is not None:
+                stream.wait(_fleet_repush_wait(states, mirrored))
+                with timed("fetch.mirror"):
+                    fresh, touched = stream_fleet_sensors(stream)
+                if touched is None:
+                    mirrored = dict(fresh)
+                else:
+                    for uid in touched:
+                        if uid in fresh:
+                            mirrored[uid] = fresh[uid]
+                        else:
+                            mirrored.pop(uid, None)
+                samples = _fleet_stream_samples(states, fresh, mirrored, time.monotonic())
+                gone = [u for u in states if u not in mirrored]
+            else:
+                mirrored = {}
+                with timed("fetch"):
+                    samples, unread = fetch_fleet_sensors(fetcher)
+                # A failed read is not a departure: keep that vest's state.
+                gone = [u for u in states if u not in samples and u not in unread]
+            for uid in gone:
+                del states[uid]
+                smoother.release(uid)
+            ready: List[Tuple[VestState, np.ndarray, float, float, bool]] = []
+            for uid, (norm, fp) in samples.items():
+                state = states.get(uid)
+                if state is None:
+                    state = VestState(uid, "%s/%s/%s" % (FLEET_USERS_PATH, uid, WRITE_PATH))
+                    states[uid] = state
+                now = time.monotonic()
+                state.buf.maybe_reset_if_stale(now)
+                state.last_push = now
+                if DEDUPE_READS and fp == state.last_fp:
+                    continue
+                state.last_fp = fp
+                try:
+                    prepared = prepare_sample(state, norm, scaler, model_version)
+                except Exception as exc:
+                    log.error("[%s] Loop error: %r", uid, exc, every=LOG_EVERY, key=("loop", uid))
+                    continue
+                if prepared is not None:
+                    ready.append((state,) + prepared)
+            if ready:
+                score_fleet_batch(ready, interp, model_version, conf_min, smoother)
+        except KeyboardInterrupt:
+            if stream is not None:
+                stream.close()
+            fetcher.close()
+            log.info("Stopped.")
+            return
+        except Exception as exc:
+            log.error("Loop error: %r", exc, every=LOG_EVERY)
+
+        _print_requested_dump()
+        now = time.monotonic()
+        if now >= next_hb:
+            next_hb = now + HEARTBEAT_SEC
+            warm = sum(1 for st in states.values() if len(st.buf) >= seq_len)
+            log.info(
+                "[heartbeat] fleet ok (active=%s warm=%s ingest=%s writes_skipped=%s %s)",
+                len(states),
+                warm,
+                "stream" if stream is not None else "poll",
+                sum(st.writes_skipped for st in states.values()),
+                _write_queue_status(),
+            )
+            if stream is None:
+                log.info("[heartbeat] %s", sched.summary())
+                if fetcher.ticks:
+                    log.info("[heartbeat] %s", fetcher.summary())
+            _print_timing_report()
+
+
 def main() -> None:
     assert_feature_order_matches_config()
 
     try:
         scaler, interp, spath, mpath = load_scaler_and_tflite()
     except Exception as e:
-        print("Load failed: %s" % e, file=sys.stderr)
+        log.error("Load failed: %s", e)
         sys.exit(1)
 
     if not init_firebase():
-        print("Firebase init failed:", diagnose_firebase(), file=sys.stderr)
+        log.error("Firebase init failed: %s", diagnose_firebase())
         sys.exit(1)
 
     seq_len = int(config.SEQ_LENGTH)
     feat_dim = int(config.FEATURE_DIM_SEQ)
-    buf = RollingFeatureBuffer(seq_len)
-    smoother = PadLevelProbabilitySmoother(window=SMOOTH_WINDOW)
-    model_version = get_model_version_tag("tflite")
+    model_version = get_model_version_tag(INFERENCE_SOURCE)
     conf_min = float(getattr(config, "MODEL_CONFIDENCE_MIN", 0.5))
 
-    print(
-        "TFLite pipeline: model=%s scaler=%s SEQ_LENGTH=%s FEATURE_DIM=%s version=%s"
-        % (mpath.name, spath.name, seq_len, feat_dim, model_version),
-        flush=True,
+    log.info(
+        "Pipeline (%s): model=%s scaler=%s SEQ_LENGTH=%s FEATURE_DIM=%s version=%s",
+        INFERENCE_SOURCE,
+        mpath.name,
+        spath.name if spath else "(in graph)",
+        seq_len,
+        feat_dim,
+        model_version,
     )
-    print(
-        "Read paths: %s | Write: %s | dedupe_reads=%s"
-        % (", ".join(READ_PATHS), WRITE_PATH, DEDUPE_READS),
-        flush=True,
-    )
-    print("Ctrl+C to stop.", flush=True)
+    if FLEET_MODE:
+        log.info(
+            "Fleet mode: read %s/{uid}/sensor | Write: %s/{uid}/%s | dedupe_reads=%s",
+            FLEET_USERS_PATH,
+            FLEET_USERS_PATH,
+            WRITE_PATH,
+            DEDUPE_READS,
+        )
+    else:
+        log.info(
+            "Read paths: %s | Write: %s | dedupe_reads=%s | ingest=%s | staged=%s",
+            ", ".join(READ_PATHS),
+            WRITE_PATH,
+            DEDUPE_READS,
+            "stream" if EVENT_MODE else "poll",
+            STAGED_MODE,
+        )
+    log.info("Ctrl+C to stop.")
+    start_metrics_server()
+    if install_dump_signal():
+        log.info("Stage timings: kill -USR1 %d (also every %.0fs)", os.getpid(), TIMING_DUMP_SEC)
+
+    global WRITE_QUEUE, TICK_FETCHER
+    staged = STAGED_MODE and not FLEET_MODE
+    # The staged pipeline has its own write stage; the write-behind thread would only add a hop.
+    if ASYNC_WRITES and not staged:
+        WRITE_QUEUE = WriteBehindQueue(
+            _firebase_update,
+            maxsize=WRITE_QUEUE_MAX,
+            max_attempts=WRITE_MAX_ATTEMPTS,
+            max_age_sec=WRITE_MAX_AGE_SEC,
+            on_give_up=_on_write_given_up,
+            workers=WRITE_WORKERS,
+        )
+        METRICS.gauge_fn("write_queue_depth", WRITE_QUEUE.depth)
+    if BATCHED_READS and not FLEET_MODE:
+        TICK_FETCHER = TickFetcher(db)
+    # Single-vest profile: pushed by listeners instead of read every tick (fleet reads it from users).
+    if EVENT_MODE and not FLEET_MODE:
+        if start_profile_store(db):
+            log.info("[profile] store listening on meta/current_user + users/{uid}")
+        else:
+            log.warning("[profile] store unavailable; reading profile with TTL cache")
+    try:
+        if FLEET_MODE:
+            run_fleet(scaler, interp, model_version, conf_min)
+        elif staged:
+            run_single_staged(scaler, interp, model_version, conf_min)
+        else:
+            run_single(scaler, interp, model_version, conf_min)
+    finally:
+        log.info("%s", dump())
+        stop_profile_store()
+        if TICK_FETCHER is not None:
+            TICK_FETCHER.close()
+            TICK_FETCHER = None
+        if WRITE_QUEUE is not None:
+            if not WRITE_QUEUE.close(timeout=5.0):
+                log.warning("Write queue not drained on exit: %s", _write_queue_status())
+            WRITE_QUEUE = None
+
+
+def _active_uid(stream: Optional[SensorEventStream]) -> Optional[str]:
+    """Uid for the listener paths; while polling with batched reads, the one the last tick resolved."""
+    if stream is None and TICK_FETCHER is not None and TICK_FETCHER.uid:
+        return TICK_FETCHER.uid
+    return get_resolved_uid()
+
+
+def _pace(sched: DeadlineScheduler, stream: Optional[SensorEventStream]) -> None:
+    """Polling ticks follow the fixed LOOP_DELAY_SEC grid; listener events pace the loop otherwise."""
+    if stream is None:
+        sched.wait()
+    else:
+        sched.reset()
+
+
+def _ingest_once(
+    stream: Optional[SensorEventStream], next_retry: float
+) -> Tuple[Optional[SensorEventStream], float, Optional[Dict[str, Any]], Optional[str], Optional[Tuple[Any, ...]]]:
+    """
+    One single-vest read: (stream, next_retry, norm, src, fp). With EVENT_MODE waits up to
+    LOOP_DELAY_SEC for a listener event, then reads the mirror; polls once while the stream is
+    down. Blocking.
+    """
+    if EVENT_MODE:
+        stream, next_retry = _ensure_stream(
+            stream, _single_stream_paths(_active_uid(stream)), next_retry
+        )
+    if stream is not None:
+        stream.wait(LOOP_DELAY_SEC)
+        with timed("fetch.mirror"):
+            norm, src, fp = stream_sensor_merged(stream)
+    else:
+        with timed("fetch"):
+            norm, src, fp = fetch_sensor_merged()
+    return stream, next_retry, norm, src, fp
 
-    last_sent: Optional[Tuple[Any, ...]] = None
+
+def run_single(
+    scaler: Any,
+    interp: Predictor,
+    model_version: str,
+    conf_min: float,
+) -> None:
+    """
+    Single-vest loop. With EVENT_MODE, listeners on sensors/latest and users/{uid}/sensor wake
+    the loop and only the newest sample of a burst is processed; without an event the mirrored
+    sample is pushed again after LOOP_DELAY_SEC, as a poll would. While the stream is down the
+    merged sensor is polled on a fixed LOOP_DELAY_SEC grid (overrunning ticks are skipped).
+    """
+    seq_len = int(config.SEQ_LENGTH)
+    state = VestState()
+    stream: Optional[SensorEventStream] = None
+    next_retry = 0.0
     next_hb = time.monotonic()
     next_dbg = time.monotonic()
-    last_fp: Optional[Tuple[Any, ...]] = None
+    sched = DeadlineScheduler(LOOP_DELAY_SEC)
+    METRICS.gauge_fn("buffer_fill_ratio", lambda: min(1.0, len(state.buf) / float(seq_len)))
 
     while True:
         try:
-            buf.maybe_reset_if_stale(time.monotonic())
-            norm, src, fp = fetch_sensor_merged()
+            _pace(sched, stream)
+            tick()
+            stream, next_retry, norm, src, fp = _ingest_once(stream, next_retry)
+            state.buf.maybe_reset_if_stale(time.monotonic())
             if norm is None:
-                time.sleep(LOOP_DELAY_SEC)
                 now = time.monotonic()
                 if now >= next_hb:
-                    print("[heartbeat] waiting for Firebase sensor data …", flush=True)
+                    log.info("[heartbeat] waiting for Firebase sensor data …")
                     next_hb = now + HEARTBEAT_SEC
                 continue
 
-            if DEDUPE_READS and fp is not None and fp == last_fp:
-                time.sleep(LOOP_DELAY_SEC)
+            if DEDUPE_READS and fp is not None and fp == state.last_fp:
                 continue
-            last_fp = fp
-
-            raw_temp_in = float(norm["temp"])
-            raw_pulse_in = float(norm["pulse"])
-            motion = float(norm["motion_level_0_1"])
-            age = float(norm["age_years"])
-            height = float(norm["height_cm"])
-            weight = float(norm["weight_kg"])
-            gender = float(norm["gender_0_1"])
-
-            invalid = not sensors_in_sanity_range(raw_temp_in, raw_pulse_in, motion)
-            if invalid:
-                print(
-                    "[validate] out-of-range temp=%.3f pulse=%.3f motion=%.3f mode=%s"
-                    % (raw_temp_in, raw_pulse_in, motion, OUT_OF_RANGE_MODE),
-                    flush=True,
-                )
-                if OUT_OF_RANGE_MODE == "ignore":
-                    level = "OFF"
-                    if last_sent:
-                        level = last_sent[0]
-                    last_sent = write_pad_level(
-                        level, "fallback", "tflite", last_sent, 0.0, model_version
-                    )
-                    time.sleep(LOOP_DELAY_SEC)
-                    continue
-                temp = float(np.clip(raw_temp_in, config.SENSOR_TEMP_MIN_C, config.SENSOR_TEMP_MAX_C))
-                pulse = float(
-                    np.clip(raw_pulse_in, config.SENSOR_PULSE_MIN_BPM, config.SENSOR_PULSE_MAX_BPM)
-                )
-            else:
-                temp = raw_temp_in
-                pulse = raw_pulse_in
-
-            t, p, m = clip_sensors_for_buffer(temp, pulse, motion)
-            sensor_ok = sensors_in_sanity_range(raw_temp_in, raw_pulse_in, motion)
-
-            buf.push_observation(t, p, m, age, height, weight, gender)
-            scaled_batch = buf.scaled_window(scaler)
-
-            if scaled_batch is None:
-                print(
-                    "[buffer] %s/%s steps (WARMUP — no prediction)"
-                    % (len(buf), seq_len),
-                    flush=True,
-                )
-                last_sent = write_pad_level(
-                    "WARMUP", "warmup", "tflite", last_sent, 0.0, model_version
-                )
-            else:
-                rw = buf.raw_window()
-                if rw is not None:
-                    validate_raw_feature_matrix(rw)
-
-                latency_ms = 0.0
-
-                if not sensor_ok:
-                    fb = fallback_pad_level_from_temp(t)
-                    probs = _probs_from_pad_level(fb)
-                    inf_state = "fallback"
-                else:
-                    try:
-                        print("[model] running inference", flush=True)
-                        probs, latency_ms = interp.predict_proba_timed(scaled_batch)
-                        if float(np.max(probs)) < conf_min:
-                            fb = fallback_pad_level_from_temp(t)
-                            probs = _probs_from_pad_level(fb)
-                            inf_state = "fallback"
-                        else:
-                            inf_state = "model"
-                    except Exception as exc:
-                        print("[fallback] TFLite failed:", repr(exc), flush=True)
-                        fb = fallback_pad_level_from_temp(t)
-                        probs = _probs_from_pad_level(fb)
-                        inf_state = "fallback"
-                        latency_ms = 0.0
-
-                avg_probs = smoother.smooth_proba(probs)
-                k = int(np.argmax(avg_probs))
-                ml_level = LABELS[k]
-                level = adjust_pad_level_after_prediction(t, raw_pulse_in, ml_level)
-                print("[model] prediction:", level, flush=True)
+            state.last_fp = fp
 
-                now = time.monotonic()
-                if now >= next_dbg:
-                    next_dbg = now + DEBUG_EVERY_SEC
-                    print("[debug] source=%s" % (src,), flush=True)
-                    print("[debug] ML -> %s | after safety -> %s" % (ml_level, level), flush=True)
-                    print(
-                        "[debug] avg_probs: %s"
-                        % dict(zip(LABELS, [float(x) for x in np.asarray(avg_probs).reshape(-1)])),
-                        flush=True,
-                    )
-
-                last_sent = write_pad_level(
-                    level, inf_state, "tflite", last_sent, latency_ms, model_version
-                )
+            now = time.monotonic()
+            debug = now >= next_dbg
+            if debug:
+                next_dbg = now + DEBUG_EVERY_SEC
+            with timed("sample"):
+                process_sample(state, norm, scaler, interp, model_version, conf_min, src, debug)
 
         except KeyboardInterrupt:
-            print("Stopped.", flush=True)
+            if stream is not None:
+                stream.close()
+            log.info("Stopped.")
             return
         except Exception as exc:
-            print("Loop error: %r" % (exc,), file=sys.stderr, flush=True)
+            log.error("Loop error: %r", exc, every=LOG_EVERY)
 
+        _print_requested_dump()
         now = time.monotonic()
         if now >= next_hb:
             next_hb = now + HEARTBEAT_SEC
-            print("[heartbeat] ok (buffer=%s/%s)" % (len(buf), seq_len), flush=True)
+            log.info(
+                "[heartbeat] ok (buffer=%s/%s ingest=%s writes_skipped=%s %s)",
+                len(state.buf),
+                seq_len,
+                "stream" if stream is not None else "poll",
+                state.writes_skipped,
+                _write_queue_status(),
+            )
+            if stream is None:
+                log.info("[heartbeat] %s", sched.summary())
+            if stream is None and TICK_FETCHER is not None and TICK_FETCHER.ticks:
+                log.info("[heartbeat] %s", TICK_FETCHER.summary())
+            _print_timing_report()
+
+
+async def _run_single_staged(
+    scaler: Any,
+    interp: Predictor,
+    model_version: str,
+    conf_min: float,
+) -> None:
+    """
+    ``run_single`` as three asyncio stages joined by a bounded StageQueue (samples) and a
+    KeyedStageQueue (writes, newest per path):
+
+      ingest (Firebase read / listener wait, I/O pool) → infer (buffer → model → smooth →
+      safety → plan_decision, one-thread pool) → write (Firebase update, I/O pool)
+
+    VestState is only touched on the infer thread: the write stage gets ready payloads, and a
+    failed write is reported back to that thread (``write_failed``).
 
-        time.sleep(LOOP_DELAY_SEC)
+    Reads and writes overlap with inference; polling ticks on the LOOP_DELAY_SEC grid
+    (DeadlineScheduler) while the next read overlaps the previous sample's inference. The heartbeat reports queue depths and
+    ingest → written latency.
+    """
+    loop = asyncio.get_running_loop()
+    io_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="pipeline-io")
+    infer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pipeline-infer")
+    samples = StageQueue("ingest", STAGE_QUEUE_MAX)
+    decisions = KeyedStageQueue("write")
+    state = VestState()
+    e2e = LatencyWindow()
+    status = {"stream": False, "samples": 0, "decisions": 0}
+    sched = DeadlineScheduler(LOOP_DELAY_SEC)
+    METRICS.gauge_fn("buffer_fill_ratio", lambda: min(1.0, len(state.buf) / float(state.buf.seq_len)))
+    # Listener stream and the _ingest_once call running on io_pool; closed after shutdown.
+    ingest_ctx: Dict[str, Any] = {"stream": None, "inflight": None}
+
+    async def ingest() -> None:
+        stream: Optional[SensorEventStream] = None
+        next_retry = 0.0
+        last_fp: Optional[Tuple[Any, ...]] = None
+        while True:
+            if stream is None:
+                await asyncio.sleep(sched.next_delay())
+                sched.mark()
+            else:
+                sched.reset()
+            tick()
+            _print_requested_dump()
+            norm = None
+            inflight = io_pool.submit(_ingest_once, stream, next_retry)
+            ingest_ctx["inflight"] = inflight
+            try:
+                stream, next_retry, norm, src, fp = await asyncio.wrap_future(inflight)
+            except Exception as exc:
+                log.error("Ingest error: %r", exc, every=LOG_EVERY)
+            ingest_ctx["stream"] = stream
+            status["stream"] = stream is not None
+            if norm is not None and not (DEDUPE_READS and fp is not None and fp == last_fp):
+                last_fp = fp
+                samples.put_nowait((time.monotonic(), norm, src))
+
+    def close_ingest() -> None:
+        """
+        After io_pool shut down: a cancelled ingest() does not stop its _ingest_once, which may
+        have opened a new stream — close that one as well as the last known stream.
+        """
+        streams = [ingest_ctx["stream"]]
+        inflight = ingest_ctx["inflight"]
+        if inflight is not None and inflight.done() and not inflight.cancelled():
+            if inflight.exception() is None:
+                streams.append(inflight.result()[0])
+        for s in streams:
+            if s is not None:
+                s.close()
+
+    def infer_one(norm: Dict[str, Any], src: Optional[str], debug: bool) -> List[Optional[Tuple[Any, ...]]]:
+        out: List[Optional[Tuple[Any, ...]]] = []
+        state.buf.maybe_reset_if_stale(time.monotonic())
+        with timed("sample"):
+            process_sample(
+                state, norm, scaler, interp, model_version, conf_min, src, debug,
+                emit=lambda *args: out.append(plan_decision(*args)),
+            )
+        return out
+
+    def write_failed(key: Tuple[Any, ...]) -> None:
+        # infer_pool: unless a newer decision was planned meanwhile, write the next one again.
+        if state.last_sent == key:
+            state.last_sent = None
+
+    async def infer() -> None:
+        next_dbg = time.monotonic()
+        while True:
+            t_in, norm, src = await samples.get()
+            now = time.monotonic()
+            debug = now >= next_dbg
+            if debug:
+                next_dbg = now + DEBUG_EVERY_SEC
+            try:
+                emitted = await loop.run_in_executor(infer_pool, infer_one, norm, src, debug)
+            except Exception as exc:
+                log.error("Inference error: %r", exc, every=LOG_EVERY)
+                continue
+            status["samples"] += 1
+            for job in emitted:
+                if job is None:
+                    # No write due: the decision is complete once inferred.
+                    status["decisions"] += 1
+                    e2e.add((time.monotonic() - t_in) * 1000.0)
+                else:
+                    # plan_decision already counts this write as sent; a newer one for the same
+                    # path replaces it (its key supersedes last_sent), it is never dropped.
+                    decisions.put_nowait(job[1], (t_in, job))
+
+    async def write() -> None:
+        while True:
+            _, (t_in, (key, path, payload)) = await decisions.get()
+            try:
+                await loop.run_in_executor(io_pool, _firebase_update, path, payload)
+            except Exception as exc:
+                log.error("Firebase write failed: %s", exc, every=LOG_EVERY, key=("write", path))
+                await loop.run_in_executor(infer_pool, write_failed, key)
+            status["decisions"] += 1
+            e2e.add((time.monotonic() - t_in) * 1000.0)
+
+    async def heartbeat() -> None:
+        while True:
+            await asyncio.sleep(HEARTBEAT_SEC)
+            lat = e2e.summary()
+            e2e.reset()
+            log.info(
+                "[heartbeat] ok (buffer=%s/%s ingest=%s samples=%s decisions=%s writes_skipped=%s)",
+                len(state.buf),
+                state.buf.seq_len,
+                "stream" if status["stream"] else "poll",
+                status["samples"],
+                status["decisions"],
+                state.writes_skipped,
+            )
+            log.info(
+                "[stages] %s | %s | ingest->written p50=%.1fms p95=%.1fms max=%.1fms (n=%d)",
+                samples.summary(),
+                decisions.summary(),
+                lat["p50"],
+                lat["p95"],
+                lat["max"],
+                lat["n"],
+            )
+            if not status["stream"]:
+                log.info("[heartbeat] %s", sched.summary())
+            if not status["stream"] and TICK_FETCHER is not None and TICK_FETCHER.ticks:
+                log.info("[heartbeat] %s", TICK_FETCHER.summary())
+            _print_timing_report()
+
+    tasks = [asyncio.create_task(c()) for c in (ingest, infer, write, heartbeat)]
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if ingest_ctx["stream"] is not None:
+            ingest_ctx["stream"].interrupt()  # do not sit out HEARTBEAT_SEC in stream.wait
+        io_pool.shutdown(wait=True)
+        infer_pool.shutdown(wait=True)
+        close_ingest()
+
+
+def run_single_staged(
+    scaler: Any,
+    interp: Predictor,
+    model_version: str,
+    conf_min: float,
+) -> None:
+    try:
+        asyncio.run(_run_single_staged(scaler, interp, model_version, conf_min))
+    except KeyboardInterrupt:
+        log.info("Stopped.")
 
 
 if __name__ == "__main__":
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+Replay a sensor CSV through the realtime pipeline's per-sample chain, without Firebase.
+
+Each row (body_temperature_C, pulse_bpm, motion_level_0_1 + demographics) becomes one sensor
+payload and goes through exactly what realtime_firebase_pipeline does per sample:
+normalize → validate → RollingFeatureBuffer → scaler → model (MODULE2_INFERENCE_BACKEND) →
+smoother → safety. Decisions are captured instead of written.
+
+Rows are replayed in file order, as fast as possible (--speed 0, default) or at N× real time
+with one row per --period-sec (default PIPELINE_LOOP_DELAY_SEC) on a fixed deadline grid.
+
+Reports decisions/s, per-row chain latency p50 / p95 / p99 / max, pad_level counts and agreement
+with the CSV's pad_level column, plus the per-stage timing table. --out writes the decision
+stream (one CSV row per input row); --compare diffs it against a stream from another version.
+
+Usage (from project root):
+  python replay_csv.py                                   # config.DATASET_PATH, flat out
+  python replay_csv.py --csv cleaned_dataset.csv --limit 5000 --out /tmp/decisions_a.csv
+  python replay_csv.py --speed 10                        # 10× real time
+  MODULE2_INFERENCE_BACKEND=numpy python replay_csv.py --compare /tmp/decisions_a.csv
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import os
+import sys
+import time
+from collections import Counter
+from typing import Any, Dict, List
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, ROOT)
+
+# Per-sample log lines would dominate a flat-out replay.
+os.environ.setdefault("MODULE2_LOG_LEVEL", "WARNING")
+
+STREAM_FIELDS = (
+    "row",
+    "temp",
+    "pulse",
+    "motion",
+    "label",
+    "pad_level",
+    "inference_state",
+    "model_latency_ms",
+    "chain_ms",
+)
+
+
+def _read_stream(path: str) -> List[Dict[str, str]]:
+    with open(path, "r", newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def _compare(current: List[Dict[str, Any]], path: str, show: int = 10) -> None:
+    previous = {r["row"]: r for r in _read_stream(path)}
+    common = [r for r in current if str(r["row"]) in previous]
+    diffs = [
+        (r, previous[str(r["row"])])
+        for r in common
+        if (r["pad_level"], r["inference_state"])
+        != (previous[str(r["row"])]["pad_level"], previous[str(r["row"])]["inference_state"])
+    ]
+    print(
+        "\n=== Compare with %s: %d common rows, %d differ (%.2f%%) ==="
+        % (path, len(common), len(diffs), 100.0 * len(diffs) / max(1, len(common)))
+    )
+    for r, p in diffs[:show]:
+        print(
+            "  row %s: %s/%s -> %s/%s"
+            % (r["row"], p["pad_level"], p["inference_state"], r["pad_level"], r["inference_state"])
+        )
+
+
+def main() -> None:
+    from module2 import config
+
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--csv", default=config.DATASET_PATH)
+    ap.add_argument("--start", type=int, default=0, help="first data row (0-based)")
+    ap.add_argument("--limit", type=int, default=0, help="rows to replay (0 = all)")
+    ap.add_argument("--speed", type=float, default=0.0, help="× real time; 0 = as fast as possible")
+    ap.add_argument("--period-sec", type=float, default=None, help="real-time gap between rows")
+    ap.add_argument("--out", default="", help="write the decision stream CSV here")
+    ap.add_argument("--compare", default="", help="decision stream CSV from a previous run")
+    args = ap.parse_args()
+
+    import realtime_firebase_pipeline as rp
+    from module2.stage_timing import dump
+    from module2.tick_scheduler import DeadlineScheduler
+    from module2.user_profile import get_default_profile
+
+    scaler, interp, spath, mpath = rp.load_scaler_and_tflite()
+    model_version = rp.get_model_version_tag(rp.INFERENCE_SOURCE)
+    conf_min = float(getattr(config, "MODEL_CONFIDENCE_MIN", 0.5))
+    defaults = get_default_profile()
+
+    with open(args.csv, "r", newline="", encoding="utf-8") as f:
+        rows = list(csv.DictReader(f))
+    rows = rows[args.start :]
+    if args.limit > 0:
+        rows = rows[: args.limit]
+    if not rows:
+        raise SystemExit("No rows to replay in %s" % args.csv)
+
+    period = rp.LOOP_DELAY_SEC if args.period_sec is None else float(args.period_sec)
+    sched = DeadlineScheduler(period / args.speed) if args.speed > 0 else None
+    print(
+        "Replay %s rows %d..%d | model=%s (%s) scaler=%s | %s"
+        % (
+            os.path.basename(args.csv),
+            args.start,
+            args.start + len(rows) - 1,
+            mpath.name,
+            rp.INFERENCE_SOURCE,
+            spath.name if spath else "(in graph)",
+            "%.3gx real time (period %.2fs)" % (args.speed, period) if sched else "as fast as possible",
+        ),
+        flush=True,
+    )
+
+    state = rp.VestState()
+    stream: List[Dict[str, Any]] = []
+    chain_ms = np.empty(len(rows), dtype=np.float64)
+    captured: List[tuple] = []
+
+    def emit(_state: Any, level: str, inf_state: str, latency_ms: float, _mv: str) -> None:
+        captured.append((level, inf_state, latency_ms))
+
+    t_start = time.perf_counter()
+    for i, row in enumerate(rows):
+        if sched is not None:
+            sched.wait()
+        t0 = time.perf_counter()
+        state.buf.maybe_reset_if_stale(time.monotonic())
+        with rp.timed("normalize"):
+            norm = rp.normalize_sensor_payload(row)
+        if norm.get("temp") is None or norm.get("pulse") is None:
+            chain_ms[i] = (time.perf_counter() - t0) * 1000.0
+            continue
+        norm = rp._merge_profile(norm, defaults)
+        del captured[:]
+        with rp.timed("sample"):
+            rp.process_sample(
+                state, norm, scaler, interp, model_version, conf_min, "replay", emit=emit
+            )
+        chain_ms[i] = (time.perf_counter() - t0) * 1000.0
+        for level, inf_state, latency_ms in captured:
+            stream.append(
+                {
+                    "row": args.start + i,
+                    "temp": norm["temp"],
+                    "pulse": norm["pulse"],
+                    "motion": norm["motion_level_0_1"],
+                    "label": str(row.get(config.COL_PAD_LEVEL) or "").strip().upper(),
+                    "pad_level": level,
+                    "inference_state": inf_state,
+                    "model_latency_ms": round(float(latency_ms), 4),
+                    "chain_ms": round(float(chain_ms[i]), 4),
+                }
+            )
+    wall = time.perf_counter() - t_start
+
+    p50, p95, p99 = np.percentile(chain_ms, (50, 95, 99))
+    print("\n=== Replay: %d rows in %.2fs ===" % (len(rows), wall))
+    rate = len(stream) / wall if wall > 0 else 0.0
+    print("decisions/s        %.1f (%d decisions)" % (rate, len(stream)))
+    print(
+        "chain latency ms   p50=%.3f p95=%.3f p99=%.3f max=%.3f mean=%.3f"
+        % (p50, p95, p99, float(chain_ms.max()), float(chain_ms.mean()))
+    )
+    if sched is not None:
+        print("cadence            %s" % sched.summary())
+    states = Counter(d["inference_state"] for d in stream)
+    levels = Counter(d["pad_level"] for d in stream if d["inference_state"] != "warmup")
+    print("inference_state    %s" % ", ".join("%s=%d" % kv for kv in sorted(states.items())))
+    print("pad_level          %s" % ", ".join("%s=%d" % kv for kv in sorted(levels.items())))
+    labelled = [d for d in stream if d["label"] and d["inference_state"] != "warmup"]
+    if labelled:
+        agree = sum(1 for d in labelled if d["pad_level"] == d["label"])
+        print(
+            "agreement w/ CSV   %.2f%% of %d labelled decisions (after smoothing + safety)"
+            % (100.0 * agree / len(labelled), len(labelled))
+        )
+    print(dump())
+
+    if args.out:
+        with open(args.out, "w", newline="", encoding="utf-8") as f:
+            w = csv.DictWriter(f, fieldnames=STREAM_FIELDS)
+            w.writeheader()
+            w.writerows(stream)
+        print("Decision stream: %s" % args.out)
+    if args.compare:
+        _compare(stream, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,14 +5,16 @@ Requires: .env with FIREBASE_CREDENTIALS and FIREBASE_DB_URL, or set them in the
 """
 import sys
 import os
+import time
 
 ROOT = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, ROOT)
 
 def main():
     from module2.firebase_bridge import listen_and_process, FIREBASE_AVAILABLE, init_firebase
+    from module2.rtdb import using_memory_db
 
-    if not FIREBASE_AVAILABLE:
+    if not FIREBASE_AVAILABLE and not using_memory_db():
         print("Install: pip install firebase-admin")
         sys.exit(1)
     if not init_firebase():
@@ -23,6 +25,13 @@ def main():
         sys.exit(1)
     print("Starting listener (Ctrl+C to stop)...")
     listen_and_process()
+    if using_memory_db():
+        # In-memory listener threads are daemons (the SDK's are not): keep the process up.
+        try:
+            while True:
+                time.sleep(3600)
+        except KeyboardInterrupt:
+            pass
 
 if __name__ == "__main__":
     main()
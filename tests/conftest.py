@@ -0,0 +1,7 @@
+"""Run from the project root or tests/: make ``module2`` and the top-level scripts importable."""
+import sys
+from pathlib import Path
+
+ROOT = str(Path(__file__).resolve().parent.parent)
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
@@ -0,0 +1,49 @@
+"""Fleet listener wakes: only changed uids, plus quiet uids whose own re-push is due."""
+import pytest
+
+pytest.importorskip("numpy")
+pipeline = pytest.importorskip("realtime_firebase_pipeline")
+
+
+def _sample(temp):
+    return ({"temp": temp}, (temp,))
+
+
+def _states(now, **last_push_ago):
+    states = {}
+    for uid, ago in last_push_ago.items():
+        st = pipeline.VestState(uid)
+        st.last_push = now - ago
+        states[uid] = st
+    return states
+
+
+def test_busy_vest_does_not_repush_quiet_vests():
+    now = 1000.0
+    delay = pipeline.LOOP_DELAY_SEC
+    states = _states(now, busy=0.01, quiet=delay / 10)
+    mirrored = {"busy": _sample(37.0), "quiet": _sample(36.0)}
+    out = pipeline._fleet_stream_samples(states, {"busy": _sample(37.0)}, mirrored, now)
+    assert set(out) == {"busy"}
+
+
+def test_quiet_vest_repushed_after_its_own_delay():
+    now = 1000.0
+    delay = pipeline.LOOP_DELAY_SEC
+    states = _states(now, busy=0.01, quiet=delay)
+    mirrored = {"busy": _sample(37.0), "quiet": _sample(36.0)}
+    out = pipeline._fleet_stream_samples(states, {}, mirrored, now)
+    assert set(out) == {"quiet"}
+    assert out["quiet"] == mirrored["quiet"]
+
+
+def test_new_uid_pushed_immediately():
+    out = pipeline._fleet_stream_samples({}, {}, {"new": _sample(36.5)}, 5.0)
+    assert set(out) == {"new"}
+
+
+def test_repush_wait_bounded_by_loop_delay():
+    delay = pipeline.LOOP_DELAY_SEC
+    assert pipeline._fleet_repush_wait({}, {}) == delay
+    states = _states(pipeline.time.monotonic(), a=2 * delay)
+    assert pipeline._fleet_repush_wait(states, {"a": _sample(36.0)}) == 0.0
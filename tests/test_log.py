@@ -0,0 +1,72 @@
+import logging
+
+from module2 import log as vlog
+
+
+def _logger(name, level=logging.DEBUG):
+    lg = vlog.VestLogger(name)
+    lg._logger.setLevel(level)
+    return lg
+
+
+def _ring_texts(name):
+    return [e[3] for e in vlog._RING if e[2] == name]
+
+
+class _Capture(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+
+    def emit(self, record):
+        self.messages.append(record.getMessage())
+
+
+def test_sample_emits_one_in_n():
+    lg = _logger("t_sample")
+    cap = _Capture()
+    lg._logger.addHandler(cap)
+    for i in range(25):
+        lg.debug("tick %d", i, sample=10, key="uid")
+    assert cap.messages == ["tick 0", "tick 10 (+9 suppressed)", "tick 20 (+9 suppressed)"]
+
+
+def test_ring_stores_formatted_text_not_args():
+    lg = _logger("t_ring")
+    payload = {"temp": 36.5}
+    lg.info("payload %s", payload)
+    payload["temp"] = 99.0
+    assert _ring_texts("t_ring") == ["payload {'temp': 36.5}"]
+    assert all(len(e) == 4 for e in vlog._RING)
+
+
+def test_ring_skips_debug_by_default():
+    assert vlog._RING_LEVEL == logging.INFO
+    lg = _logger("t_ring_debug")
+    lg.debug("hot %s", 1)
+    lg.info("kept")
+    assert _ring_texts("t_ring_debug") == ["kept"]
+
+
+def test_ring_records_lines_filtered_from_output():
+    lg = _logger("t_ring_quiet", level=logging.ERROR)
+    lg.warning("not printed %d", 7)
+    assert _ring_texts("t_ring_quiet") == ["not printed 7"]
+
+
+def test_rate_keys_are_bounded_lru(monkeypatch):
+    monkeypatch.setattr(vlog, "_RATE_KEYS", 3)
+    lg = _logger("t_rate")
+    for uid in ("a", "b", "c"):
+        lg.info("x", every=60.0, key=uid)
+    lg.info("x", every=60.0, key="a")  # touch a: b is now least recently used
+    lg.info("x", every=60.0, key="d")
+    assert list(lg._rate) == ["c", "a", "d"]
+    assert lg._rate["a"][1] == 1  # the second "a" was suppressed, state kept
+
+
+def test_nothing_recorded_when_disabled_everywhere():
+    lg = _logger("t_off", level=logging.ERROR)
+    lg.debug("dropped", sample=5, key="k")
+    assert lg._rate == {}
+    assert _ring_texts("t_off") == []
@@ -0,0 +1,111 @@
+"""NumPy / streaming backends vs the TFLite interpreter and the Keras model they were exported from."""
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from module2 import config
+from module2.numpy_pad_inference import WEIGHT_KEYS, NumpyPadClassifier, StreamingPadClassifier
+
+ATOL = 1e-5
+L, F, C = config.SEQ_LENGTH, config.FEATURE_DIM_SEQ, config.NUM_PAD_CLASSES
+
+
+def _windows(rng, n):
+    return rng.normal(size=(n, L, F)).astype(np.float32)
+
+
+def _stream(rng, steps):
+    """(L + steps, F) rows: consecutive windows are one-step shifts."""
+    return rng.normal(size=(L + steps, F)).astype(np.float32)
+
+
+@pytest.fixture
+def random_npz(tmp_path):
+    rng = np.random.default_rng(1)
+    shapes = {
+        "conv1_w": (3, F, 32),
+        "conv1_b": (32,),
+        "conv2_w": (3, 32, 16),
+        "conv2_b": (16,),
+        "dense1_w": ((L - 4) * 16, 32),
+        "dense1_b": (32,),
+        "dense2_w": (32, C),
+        "dense2_b": (C,),
+    }
+    path = tmp_path / "w.npz"
+    np.savez(path, seq_len=np.int64(L), feature_dim=np.int64(F),
+             **{k: rng.normal(scale=0.3, size=shapes[k]).astype(np.float32) for k in WEIGHT_KEYS})
+    return str(path)
+
+
+def test_streaming_matches_full_forward(random_npz):
+    rng = np.random.default_rng(2)
+    full = NumpyPadClassifier(random_npz)
+    stream = StreamingPadClassifier(random_npz)
+    rows = _stream(rng, 40)
+    for i in range(41):
+        x = rows[i : i + L][None]
+        np.testing.assert_allclose(stream.predict_proba(x), full.predict_proba(x), atol=ATOL)
+    assert stream.incremental_steps == 40
+    # A window that is not a one-step shift falls back to a full recompute.
+    x = _windows(rng, 1)
+    np.testing.assert_allclose(stream.predict_proba(x), full.predict_proba(x), atol=ATOL)
+    assert stream.full_recomputes == 2
+
+
+def test_batch_matches_single(random_npz):
+    m = NumpyPadClassifier(random_npz)
+    x = _windows(np.random.default_rng(3), 8)
+    batch, _ = m.predict_proba_batch(x)
+    for i in range(len(x)):
+        np.testing.assert_allclose(batch[i], m.predict_proba(x[i : i + 1]), atol=ATOL)
+
+
+@pytest.fixture(scope="module")
+def exported(tmp_path_factory):
+    """Untrained build_pad_classifier → .keras, float .tflite (no optimizations) and .npz."""
+    tf = pytest.importorskip("tensorflow")
+    from module2.numpy_pad_inference import export_npz_weights
+    from module2.pad_classifier import build_pad_classifier
+
+    tf.keras.utils.set_random_seed(0)
+    d = tmp_path_factory.mktemp("models")
+    model = build_pad_classifier()
+    keras_path = str(d / "model.keras")
+    model.save(keras_path)
+    tflite_path = str(d / "model.tflite")
+    with open(tflite_path, "wb") as f:
+        f.write(tf.lite.TFLiteConverter.from_keras_model(model).convert())
+    npz_path = export_npz_weights(keras_path, str(d / "model.npz"))
+    return model, tflite_path, npz_path
+
+
+def test_numpy_matches_tflite_and_keras(exported):
+    from module2.tflite_pad_inference import PadLevelTfliteInterpreter
+
+    model, tflite_path, npz_path = exported
+    interp = PadLevelTfliteInterpreter(tflite_path)
+    npy = NumpyPadClassifier(npz_path)
+    x = _windows(np.random.default_rng(4), 16)
+    p_keras = np.asarray(model(x, training=False))
+    p_npy, _ = npy.predict_proba_batch(x)
+    np.testing.assert_allclose(p_npy, p_keras, atol=ATOL)
+    for i in range(len(x)):
+        p_tfl, _ = interp.predict_proba_timed(x[i : i + 1])
+        np.testing.assert_allclose(npy.predict_proba(x[i : i + 1]), p_tfl, atol=ATOL)
+    p_tfl_batch, _ = interp.predict_proba_batch(x)
+    np.testing.assert_allclose(p_npy, p_tfl_batch, atol=ATOL)
+
+
+def test_streaming_matches_tflite(exported):
+    from module2.tflite_pad_inference import PadLevelTfliteInterpreter
+
+    _, tflite_path, npz_path = exported
+    interp = PadLevelTfliteInterpreter(tflite_path)
+    stream = StreamingPadClassifier(npz_path)
+    rows = _stream(np.random.default_rng(5), 30)
+    for i in range(31):
+        x = rows[i : i + L][None]
+        p_tfl, _ = interp.predict_proba_timed(x)
+        np.testing.assert_allclose(stream.predict_proba(x), p_tfl, atol=ATOL)
+    assert stream.incremental_steps == 30
@@ -0,0 +1,129 @@
+import threading
+import time
+
+import pytest
+
+from module2.profile_cache import SingleFlightCache
+
+
+def test_lru_eviction_and_stats():
+    c = SingleFlightCache(maxsize=2, ttl_sec=60)
+    c.put("a", 1)
+    c.put("b", 2)
+    assert c.get("a") == 1  # a is now most recently used
+    c.put("c", 3)
+    assert c.get("b") is None
+    assert (c.get("a"), c.get("c")) == (1, 3)
+    assert c.stats()["evicted"] == 1 and c.stats()["size"] == 2
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr(time, "monotonic", lambda: now[0])
+    c = SingleFlightCache(maxsize=4, ttl_sec=5)
+    loads = []
+    loader = lambda: loads.append(1) or len(loads)
+    assert c.get_or_load("k", loader) == 1
+    now[0] += 5.0
+    assert c.get_or_load("k", loader) == 1  # exactly ttl: still fresh
+    now[0] += 0.1
+    assert c.get_or_load("k", loader) == 2
+    s = c.stats()
+    assert (s["hits"], s["misses"]) == (1, 2)
+
+
+def test_zero_ttl_keeps_nothing_and_none_not_cached():
+    c = SingleFlightCache(ttl_sec=0)
+    c.put("a", 1)
+    assert c.get("a") is None and c.stats()["size"] == 0
+    c = SingleFlightCache(ttl_sec=60)
+    calls = []
+    for _ in range(2):
+        assert c.get_or_load("k", lambda: calls.append(1)) is None
+    assert len(calls) == 2
+
+
+def test_invalidate():
+    c = SingleFlightCache(ttl_sec=60)
+    c.put("a", 1)
+    c.put("b", 2)
+    c.invalidate("a")
+    assert c.get("a") is None and c.get("b") == 2
+    c.invalidate()
+    assert c.stats()["size"] == 0
+
+
+def _concurrent(c, key, loader, n):
+    results, errors = [], []
+    start = threading.Barrier(n)
+
+    def call():
+        start.wait()
+        try:
+            results.append(c.get_or_load(key, loader))
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=call) for _ in range(n)]
+    for t in threads:
+        t.start()
+    return threads, results, errors
+
+
+def test_concurrent_misses_share_one_load():
+    c = SingleFlightCache(ttl_sec=60)
+    release = threading.Event()
+    loads = []
+
+    def loader():
+        loads.append(1)
+        assert release.wait(5.0)
+        return {"uid": "u1"}
+
+    threads, results, errors = _concurrent(c, "u1", loader, 8)
+    deadline = time.monotonic() + 5.0
+    while c.stats()["joined"] < 7 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5.0)
+    assert loads == [1] and not errors
+    assert len(results) == 8 and all(r is results[0] for r in results)
+    s = c.stats()
+    assert (s["misses"], s["joined"], s["in_flight"]) == (1, 7, 0)
+    assert c.get_or_load("u1", loader) is results[0]  # cached afterwards
+
+
+def test_concurrent_misses_share_the_error_and_retry_later():
+    c = SingleFlightCache(ttl_sec=60)
+    release = threading.Event()
+    loads = []
+
+    def failing():
+        loads.append(1)
+        assert release.wait(5.0)
+        raise ConnectionError("read failed")
+
+    threads, results, errors = _concurrent(c, "u1", failing, 4)
+    deadline = time.monotonic() + 5.0
+    while c.stats()["joined"] < 3 and time.monotonic() < deadline:
+        time.sleep(0.001)
+    release.set()
+    for t in threads:
+        t.join(5.0)
+    assert loads == [1] and results == []
+    assert len(errors) == 4 and all(isinstance(e, ConnectionError) for e in errors)
+    assert c.get_or_load("u1", lambda: "ok") == "ok"  # the failure was not cached
+
+
+def test_different_keys_load_independently():
+    c = SingleFlightCache(ttl_sec=60)
+    gate = threading.Event()
+    t = threading.Thread(target=c.get_or_load, args=("slow", lambda: gate.wait(5.0) and "s"))
+    t.start()
+    try:
+        assert c.get_or_load("fast", lambda: "f") == "f"  # not blocked behind "slow"
+    finally:
+        gate.set()
+        t.join(5.0)
+    assert c.get("slow") == "s"
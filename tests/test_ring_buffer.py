@@ -0,0 +1,85 @@
+"""The ring backend's fused windows match the deque baseline's ``scaler.transform(window)``."""
+import pytest
+
+np = pytest.importorskip("numpy")
+preprocessing = pytest.importorskip("sklearn.preprocessing")
+
+from module2 import config
+from module2.rolling_buffer import RingFeatureBuffer, RollingFeatureBuffer
+
+L = config.SEQ_LENGTH
+
+
+def _observations(n, seed=0):
+    """(temp, pulse, motion, age, height, weight, gender) with steps that sometimes hit the clips."""
+    rng = np.random.default_rng(seed)
+    temp = 36.0 + np.cumsum(rng.normal(0, 0.4, n))
+    pulse = 80.0 + np.cumsum(rng.normal(0, 6.0, n))
+    motion = rng.random(n)
+    return [(temp[i], pulse[i], motion[i], 30.0, 175.0, 70.0, 1.0) for i in range(n)]
+
+
+@pytest.fixture(scope="module")
+def scaler():
+    buf = RollingFeatureBuffer(seq_len=400)
+    for obs in _observations(400, seed=1):
+        buf.push_observation(*obs)
+    rows = buf.raw_window().copy()
+    rows[:, 4:8] += np.random.default_rng(2).normal(0, 5, (len(rows), 4))  # non-zero profile spread
+    return preprocessing.StandardScaler().fit(rows)
+
+
+def _check(ring, deque_buf, scaler):
+    raw = deque_buf.raw_window()
+    if raw is None:
+        assert ring.raw_window() is None and ring.scaled_window(scaler) is None
+        return False
+    np.testing.assert_allclose(ring.raw_window(), raw, rtol=1e-6, atol=1e-4)
+    expected = scaler.transform(raw).astype(np.float32).reshape(1, L, -1)
+    got = ring.scaled_window(scaler)
+    assert got.shape == expected.shape and got.dtype == np.float32
+    np.testing.assert_allclose(got, expected, atol=1e-5)
+    np.testing.assert_allclose(got, deque_buf.scaled_window(scaler), atol=1e-5)
+    return True
+
+
+def test_windows_match_across_wraparound(scaler):
+    ring = RingFeatureBuffer(scaler=scaler)
+    deque_buf = RollingFeatureBuffer()
+    warm = 0
+    for obs in _observations(3 * L + 7):  # every head position, several wraps
+        ring.push_observation(*obs)
+        deque_buf.push_observation(*obs)
+        warm += _check(ring, deque_buf, scaler)
+    assert warm == 2 * L + 8
+
+
+def test_scaler_attached_after_rows_are_rescaled(scaler):
+    ring = RingFeatureBuffer()
+    deque_buf = RollingFeatureBuffer()
+    for obs in _observations(L + L // 2, seed=3):  # already wrapped, nothing scaled on push yet
+        ring.push_observation(*obs)
+        deque_buf.push_observation(*obs)
+    with pytest.raises(ValueError):
+        ring.scaled_window(None)
+    assert _check(ring, deque_buf, scaler)  # first call attaches and rescales the ring
+    for obs in _observations(L, seed=4):
+        ring.push_observation(*obs)
+        deque_buf.push_observation(*obs)
+        assert _check(ring, deque_buf, scaler)
+
+
+def test_clear_restarts_steps_and_warmup(scaler):
+    ring = RingFeatureBuffer(scaler=scaler)
+    deque_buf = RollingFeatureBuffer()
+    for obs in _observations(L + 3, seed=5):
+        ring.push_observation(*obs)
+        deque_buf.push_observation(*obs)
+    ring.clear()
+    deque_buf.clear()
+    assert len(ring) == 0 and ring.raw_window() is None
+    for obs in _observations(L + 3, seed=6):  # first step after clear is 0 in both backends
+        ring.push_observation(*obs)
+        deque_buf.push_observation(*obs)
+        _check(ring, deque_buf, scaler)
+    assert len(ring) == L
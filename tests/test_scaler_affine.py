@@ -0,0 +1,47 @@
+"""Only a default StandardScaler can be fused into the ring buffer / raw-input graph."""
+import pytest
+
+np = pytest.importorskip("numpy")
+preprocessing = pytest.importorskip("sklearn.preprocessing")
+
+from module2 import config
+from module2.inference_utils import standard_scaler_affine
+from module2.rolling_buffer import RingFeatureBuffer, validate_buffer_scaler
+
+F = config.FEATURE_DIM_SEQ
+
+
+@pytest.fixture
+def x():
+    return np.random.default_rng(0).normal(3.0, 2.0, size=(50, F))
+
+
+def test_default_standard_scaler_matches_transform(x):
+    sc = preprocessing.StandardScaler().fit(x)
+    mean, scale = standard_scaler_affine(sc)
+    np.testing.assert_allclose((x - mean) / scale, sc.transform(x))
+
+
+@pytest.mark.parametrize(
+    "make",
+    [
+        lambda: preprocessing.StandardScaler(with_mean=False),
+        lambda: preprocessing.StandardScaler(with_std=False),
+        lambda: preprocessing.MinMaxScaler(),
+        lambda: preprocessing.RobustScaler(),
+    ],
+)
+def test_other_scalers_rejected(x, make):
+    sc = make().fit(x)
+    with pytest.raises(TypeError):
+        standard_scaler_affine(sc)
+    with pytest.raises(TypeError):
+        RingFeatureBuffer(scaler=sc)
+    with pytest.raises(TypeError):
+        validate_buffer_scaler(sc, "ring")
+    validate_buffer_scaler(sc, "deque")  # deque calls scaler.transform
+
+
+def test_unfitted_scaler_rejected():
+    with pytest.raises(TypeError):
+        standard_scaler_affine(preprocessing.StandardScaler())
@@ -0,0 +1,124 @@
+import threading
+import time
+
+from module2.rtdb import InMemoryRTDB, MemoryEvent
+from module2.sensor_stream import SensorEventStream, apply_stream_event
+
+
+def test_apply_stream_event_put_patch_delete():
+    tree = apply_stream_event(None, "/", {"u1": {"sensor": {"temp": 36}}})
+    tree = apply_stream_event(tree, "/u1/sensor/temp", 37)
+    tree = apply_stream_event(tree, "/u2", {"sensor": {"temp": 35}, "heating": {"pad_level": "LOW"}}, "patch")
+    assert tree["u2"] == {"sensor": {"temp": 35}, "heating": {"pad_level": "LOW"}}
+    tree = apply_stream_event(tree, "/", {"u1/sensor/pulse": 80, "u3/age": 30}, "patch")
+    assert tree["u1"]["sensor"] == {"temp": 37, "pulse": 80}
+    assert tree["u3"] == {"age": 30}
+    tree = apply_stream_event(tree, "/u2/heating", None)
+    assert "heating" not in tree["u2"]
+    assert apply_stream_event(tree, "/", None) is None
+
+
+def _stream(children=("sensor",)):
+    s = SensorEventStream(["users"], db_module=None, children=children)
+    ev = lambda path, data, kind="put": s._on_event("users", MemoryEvent(kind, path, data))
+    return s, ev
+
+
+def test_take_dirty_semantics():
+    s, ev = _stream()
+    assert s.take_dirty("users") == set()
+    ev("/", {"u1": {"sensor": {"temp": 36}}, "u2": {"sensor": {"temp": 35}}})
+    assert s.take_dirty("users") is None  # whole subtree replaced
+    assert s.take_dirty("users") == set()  # drained
+    ev("/u1/sensor", {"temp": 37})
+    ev("/u1/sensor/pulse", 90)
+    ev("/u2/heating", {"pad_level": "LOW"})  # the pipeline's own write echoing back
+    ev("/u3", {"sensor": {"temp": 34}})  # a whole uid node counts
+    assert s.take_dirty("/users/") == {"u1", "u3"}
+    ev("/", {"u2/sensor/temp": 36, "u1/status": "ok"}, "patch")
+    assert s.take_dirty("users") == {"u2"}
+    assert s.take_dirty("unknown") == set()
+
+
+def test_take_dirty_without_children_filter():
+    s, ev = _stream(children=None)
+    ev("/u2/heating", {"pad_level": "LOW"})
+    assert s.take_dirty("users") == {"u2"}
+
+
+def test_snapshot_is_a_copy_of_the_mirror():
+    s, ev = _stream()
+    ev("/", {"u1": {"sensor": {"temp": 36}}})
+    snap = s.snapshot("users", "u1")
+    snap["sensor"]["temp"] = 99
+    assert s.snapshot("users", "u1") == {"sensor": {"temp": 36}}
+    assert s.snapshot("users", "nobody") is None
+    ev("/u1", None)
+    assert s.snapshot("users") == {}
+
+
+def test_take_dirty_contract_no_lost_updates():
+    """
+    Consumer loop: take_dirty, then snapshot each key. Whatever the interleaving with the
+    listener thread, every key's last write is eventually seen (a key written after its
+    snapshot is reported dirty again).
+    """
+    s, ev = _stream()
+    ev("/", {})
+    s.take_dirty("users")
+    uids = ["u%d" % i for i in range(10)]
+    last = {}
+    done = threading.Event()
+
+    def writer():
+        for n in range(2000):
+            uid = uids[n % len(uids)]
+            ev("/%s/sensor" % uid, {"seq": n})
+        done.set()
+
+    seen = {}
+    t = threading.Thread(target=writer)
+    t.start()
+    while True:
+        finished = done.is_set()
+        dirty = s.take_dirty("users")
+        for uid in sorted(dirty if dirty is not None else uids):
+            seen[uid] = s.snapshot("users", uid)["sensor"]["seq"]
+        if finished and dirty == set():
+            break
+    t.join()
+    for n in range(2000):
+        last[uids[n % len(uids)]] = n
+    assert seen == last
+
+
+def test_listens_on_memory_db():
+    db = InMemoryRTDB({"users": {"u1": {"sensor": {"temp": 36}}}})
+    s = SensorEventStream(["users"], db, children=["sensor"])
+    assert s.start() and s.alive()
+    try:
+        assert s.wait(5.0)
+        deadline = time.monotonic() + 5.0
+        while s.events < 1 and time.monotonic() < deadline:
+            time.sleep(0.001)
+        assert s.take_dirty("users") is None
+        db.reference("users/u1/heating").set({"pad_level": "LOW"})
+        db.reference("users/u2/sensor").set({"temp": 35})
+        deadline = time.monotonic() + 5.0
+        while s.events < 3 and time.monotonic() < deadline:
+            s.wait(0.05)
+        assert s.take_dirty("users") == {"u2"}
+        assert s.snapshot("users", "u2") == {"sensor": {"temp": 35}}
+        assert s.snapshot("users", "u1")["heating"] == {"pad_level": "LOW"}
+    finally:
+        s.close()
+    assert not s.alive()
+
+
+def test_start_failure_reports_not_alive():
+    class Broken:
+        def reference(self, path):
+            raise ConnectionError("no network")
+
+    s = SensorEventStream(["users"], Broken())
+    assert not s.start() and not s.alive()
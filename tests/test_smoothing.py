@@ -0,0 +1,126 @@
+import pytest
+
+np = pytest.importorskip("numpy")
+
+from module2 import config
+from module2.inference_utils import PadLevelProbabilitySmoother
+
+C = config.NUM_PAD_CLASSES
+
+
+def _probs(rng, n):
+    return rng.random((n, C)) + 1e-3
+
+
+def _naive_mean(history, window):
+    rows = [p / p.sum() for p in history[-window:]]
+    m = np.mean(rows, axis=0)
+    return m / m.sum()
+
+
+def _naive_ema(history, alpha):
+    acc = history[0] / history[0].sum()
+    for p in history[1:]:
+        acc = alpha * (p / p.sum()) + (1 - alpha) * acc
+    return acc / acc.sum()
+
+
+@pytest.mark.parametrize("window", [1, 3, 7])
+def test_running_sum_matches_naive_mean(window, monkeypatch):
+    monkeypatch.setattr(PadLevelProbabilitySmoother, "RESYNC_EVERY", 50)  # exercise the resync
+    rng = np.random.default_rng(window)
+    sm = PadLevelProbabilitySmoother(window=window, mode="mean")
+    history = []
+    for p in _probs(rng, 200):
+        history.append(p)
+        np.testing.assert_allclose(sm.smooth_proba(p), _naive_mean(history, window), atol=1e-12)
+
+
+def test_ema_matches_recurrence_and_first_value():
+    rng = np.random.default_rng(0)
+    sm = PadLevelProbabilitySmoother(window=4, mode="ema")
+    assert sm.alpha == pytest.approx(2.0 / 5.0)
+    history = []
+    for i, p in enumerate(_probs(rng, 50)):
+        history.append(p)
+        out = sm.smooth_proba(p)
+        if i == 0:
+            np.testing.assert_allclose(out, p / p.sum())
+        np.testing.assert_allclose(out, _naive_ema(history, sm.alpha), atol=1e-12)
+
+
+def test_ema_alpha_one_is_passthrough_and_bad_alpha_rejected():
+    sm = PadLevelProbabilitySmoother(mode="ema", alpha=1.0)
+    p = np.array([0.0] * (C - 1) + [2.0])
+    sm.smooth_proba(np.full(C, 1.0))
+    np.testing.assert_allclose(sm.smooth_proba(p), p / 2.0)
+    with pytest.raises(ValueError):
+        PadLevelProbabilitySmoother(mode="ema", alpha=0.0)
+    with pytest.raises(ValueError):
+        PadLevelProbabilitySmoother(mode="median")
+
+
+@pytest.mark.parametrize("mode", ["mean", "ema"])
+def test_batched_streams_are_isolated(mode):
+    rng = np.random.default_rng(1)
+    n, window = 5, 3
+    batched = PadLevelProbabilitySmoother(window=window, mode=mode, streams=n)
+    single = [PadLevelProbabilitySmoother(window=window, mode=mode) for _ in range(n)]
+    for _ in range(20):
+        # A random subset of streams advances each tick, in random order.
+        rows = rng.permutation(n)[: rng.integers(1, n + 1)]
+        p = _probs(rng, rows.size)
+        out = batched.smooth_proba(p, rows)
+        for i, r in enumerate(rows):
+            np.testing.assert_allclose(out[i], single[r].smooth_proba(p[i]), atol=1e-12)
+        # The single-vector path advances only its own stream too.
+        r = int(rng.integers(n))
+        q = _probs(rng, 1)[0]
+        np.testing.assert_allclose(batched.smooth_proba(q, r), single[r].smooth_proba(q), atol=1e-12)
+
+
+def test_reset_and_ensure_streams_keep_other_histories():
+    rng = np.random.default_rng(2)
+    sm = PadLevelProbabilitySmoother(window=3, streams=2)
+    ref = PadLevelProbabilitySmoother(window=3)
+    for p in _probs(rng, 4):
+        sm.smooth_proba(np.stack([p, p]), [0, 1])
+        ref.smooth_proba(p)
+    sm.ensure_streams(3)
+    assert sm.streams == 4
+    sm.reset([0])
+    p = _probs(rng, 1)[0]
+    out = sm.smooth_proba(np.stack([p, p, p]), [0, 1, 2])
+    np.testing.assert_allclose(out[0], p / p.sum())
+    np.testing.assert_allclose(out[1], ref.smooth_proba(p), atol=1e-12)
+    np.testing.assert_allclose(out[2], p / p.sum())
+    with pytest.raises(IndexError):
+        sm.smooth_proba(p, [4])
+
+
+def test_fleet_smoother_rows_isolated_and_recycled(monkeypatch):
+    pipeline = pytest.importorskip("realtime_firebase_pipeline")
+    monkeypatch.setattr(pipeline, "SMOOTH_WINDOW", 3)
+    monkeypatch.setattr(pipeline, "SMOOTH_MODE", "mean")
+    fleet = pipeline.FleetSmoother(capacity=2)
+    refs = {u: PadLevelProbabilitySmoother(window=3) for u in ("a", "b", "c")}
+    rng = np.random.default_rng(3)
+    for _ in range(5):
+        uids = ["c", "a", "b"]
+        p = _probs(rng, 3)
+        out = fleet.smooth(uids, p)
+        for i, u in enumerate(uids):
+            np.testing.assert_allclose(out[i], refs[u].smooth_proba(p[i]), atol=1e-12)
+    assert fleet.smoother.streams >= 3
+
+    # An evicted uid frees its row; the next uid reuses it with a fresh history.
+    row_b = fleet.row("b")
+    fleet.release("b")
+    assert fleet.row("d") == row_b
+    p = _probs(rng, 2)
+    out = fleet.smooth(["d", "a"], p)
+    np.testing.assert_allclose(out[0], p[0] / p[0].sum())
+    np.testing.assert_allclose(out[1], refs["a"].smooth_proba(p[1]), atol=1e-12)
+    # A returning uid starts over too.
+    q = _probs(rng, 1)
+    np.testing.assert_allclose(fleet.smooth(["b"], q)[0], q[0] / q[0].sum())
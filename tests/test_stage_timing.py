@@ -0,0 +1,55 @@
+"""Stage histograms and the SIGUSR1 dump request."""
+import os
+import signal
+import threading
+import time
+
+import pytest
+
+from module2 import stage_timing
+from module2.stage_timing import StageTimings
+
+
+def test_quantiles_bounded_by_max():
+    t = StageTimings()
+    for ms in (1.0, 2.0, 3.0, 100.0):
+        t.record("stage", ms)
+    s = t.snapshot()["stage"]
+    assert s["n"] == 4
+    assert s["max"] == 100.0
+    assert 1.0 <= s["p50"] <= 3.0 * 2 ** 0.25
+    assert s["p99"] <= 100.0
+
+
+def test_dump_reset_keeps_cumulative():
+    t = StageTimings()
+    t.record("stage", 1.0)
+    assert "stage" in t.dump(reset=True)
+    assert t.dump() == "[timing] no samples"
+    assert t.cumulative()["stage"].n == 1
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="no SIGUSR1")
+def test_signal_during_record_does_not_deadlock():
+    previous = signal.getsignal(signal.SIGUSR1)
+    assert stage_timing.install_dump_signal()
+    stop = threading.Event()
+
+    def send():
+        while not stop.is_set():
+            os.kill(os.getpid(), signal.SIGUSR1)
+            time.sleep(0.001)
+
+    sender = threading.Thread(target=send, daemon=True)
+    sender.start()
+    try:
+        deadline = time.monotonic() + 1.0
+        while time.monotonic() < deadline:
+            stage_timing.record("hot", 0.01)  # handler fires inside record's lock
+    finally:
+        stop.set()
+        sender.join()
+        signal.signal(signal.SIGUSR1, previous)
+    report = stage_timing.requested_dump()
+    assert report is not None and "hot" in report
+    assert stage_timing.requested_dump() is None
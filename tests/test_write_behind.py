@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pytest
+
+from module2.write_behind import WriteBehindQueue
+
+
+class FakeUpdate:
+    """``write_fn`` stand-in: fails the first ``fail_first`` calls per path (-1 = always)."""
+
+    def __init__(self, fail_first=0, gate_path=None):
+        self.fail_first = fail_first
+        self.calls = []  # (monotonic, path, payload)
+        self.written = []
+        self.gate = threading.Event()
+        self.gate_path = gate_path
+        self.entered = threading.Event()
+        self._lock = threading.Lock()
+
+    def __call__(self, path, payload):
+        if path == self.gate_path:
+            self.entered.set()
+            assert self.gate.wait(5.0)
+        with self._lock:
+            self.calls.append((time.monotonic(), path, payload))
+            n = sum(1 for _, p, _ in self.calls if p == path)
+        if self.fail_first < 0 or n <= self.fail_first:
+            raise ConnectionError("down (%s)" % n)
+        with self._lock:
+            self.written.append((path, payload))
+
+
+def _queue(fn, **kw):
+    kw.setdefault("backoff_base_sec", 0.01)
+    kw.setdefault("backoff_max_sec", 0.05)
+    return WriteBehindQueue(fn, **kw)
+
+
+def _blocked(fn, q):
+    """Occupy the single writer with the gated path so submits pile up behind it."""
+    assert q.submit(fn.gate_path, "hold")
+    assert fn.entered.wait(5.0)
+
+
+def test_coalesces_to_latest_payload_per_path():
+    fn = FakeUpdate(gate_path="x")
+    q = _queue(fn)
+    _blocked(fn, q)
+    for i in range(5):
+        assert q.submit("a", i)
+    assert q.submit("b", 0)
+    assert q.depth() == 3  # a, b pending + x in flight
+    fn.gate.set()
+    assert q.flush(5.0)
+    assert fn.written == [("x", "hold"), ("a", 4), ("b", 0)]
+    s = q.stats()
+    assert (s["written"], s["coalesced"], s["depth"]) == (3, 4, 0)
+    q.close()
+
+
+def test_rejects_new_paths_when_full_but_still_coalesces():
+    fn = FakeUpdate(gate_path="x")
+    q = _queue(fn, maxsize=2)
+    _blocked(fn, q)
+    assert q.submit("a", 1) and q.submit("b", 1)
+    assert not q.submit("c", 1)
+    assert q.submit("a", 2)  # already pending: replaced, not rejected
+    fn.gate.set()
+    assert q.flush(5.0)
+    assert ("c", 1) not in fn.written and ("a", 2) in fn.written
+    assert q.stats()["rejected"] == 1
+    assert q.submit("c", 1)  # room again
+    assert q.flush(5.0)
+    q.close()
+
+
+def test_retries_with_exponential_backoff_then_succeeds():
+    fn = FakeUpdate(fail_first=3)
+    given_up = []
+    q = _queue(fn, backoff_base_sec=0.02, backoff_max_sec=1.0, on_give_up=lambda *a: given_up.append(a))
+    assert q.submit("a", "p")
+    assert q.flush(5.0)
+    times = [t for t, _, _ in fn.calls]
+    gaps = [b - a for a, b in zip(times, times[1:])]
+    assert len(gaps) == 3
+    for gap, expected in zip(gaps, (0.02, 0.04, 0.08)):
+        assert gap >= expected * 0.9
+    assert fn.written == [("a", "p")]
+    s = q.stats()
+    assert (s["written"], s["failed"], s["given_up"]) == (1, 3, 0)
+    assert given_up == []
+    q.close()
+
+
+def test_backoff_is_capped():
+    fn = FakeUpdate(fail_first=5)
+    q = _queue(fn, backoff_base_sec=0.01, backoff_max_sec=0.02)
+    assert q.submit("a", "p")
+    assert q.flush(5.0)
+    times = [t for t, _, _ in fn.calls]
+    assert times[-1] - times[0] < 0.5  # 0.01 + 4 x 0.02 plus scheduling, not 0.01 x (2^5 - 1)
+    q.close()
+
+
+def test_permanent_failure_given_up_after_max_attempts():
+    fn = FakeUpdate(fail_first=-1)
+    given_up = []
+    q = _queue(fn, max_attempts=3, max_age_sec=0, on_give_up=lambda *a: given_up.append(a))
+    assert q.submit("a", "p")
+    assert q.flush(5.0)
+    assert len(fn.calls) == 3
+    assert given_up == [("a", "p")]
+    s = q.stats()
+    assert (s["written"], s["failed"], s["given_up"], s["depth"]) == (0, 3, 1, 0)
+    q.close()
+
+
+def test_permanent_failure_given_up_after_max_age():
+    fn = FakeUpdate(fail_first=-1)
+    given_up = []
+    q = _queue(fn, max_attempts=0, max_age_sec=0.15, backoff_max_sec=0.02,
+               on_give_up=lambda *a: given_up.append(a))
+    t0 = time.monotonic()
+    assert q.submit("a", "p")
+    assert q.flush(5.0)
+    assert 0.15 <= time.monotonic() - t0 < 2.0
+    assert len(fn.calls) >= 3
+    assert given_up == [("a", "p")]
+    q.close()
+
+
+def test_newer_payload_inherits_failure_streak():
+    fn = FakeUpdate(fail_first=-1)
+    given_up = []
+    q = _queue(fn, max_attempts=3, max_age_sec=0, backoff_base_sec=0.05,
+               on_give_up=lambda *a: given_up.append(a))
+    assert q.submit("a", 1)
+    deadline = time.monotonic() + 5.0
+    while not fn.calls and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert q.submit("a", 2)  # replaces the payload waiting out its backoff
+    assert q.flush(5.0)
+    assert len(fn.calls) == 3  # not 3 more for the new payload
+    assert [p for _, _, p in fn.calls][-1] == 2
+    assert given_up == [("a", 2)]
+    q.close()
+
+
+def test_failing_path_does_not_block_others():
+    fn = FakeUpdate(fail_first=-1)
+    ok = []
+    q = _queue(
+        lambda path, payload: fn(path, payload) if path == "bad" else ok.append((path, payload)),
+        backoff_base_sec=10.0, backoff_max_sec=10.0,
+    )
+    assert q.submit("bad", 0)
+    for i in range(3):
+        assert q.submit("good%d" % i, i)
+    assert not q.flush(0.3)  # "bad" waits out its backoff
+    assert sorted(ok) == [("good0", 0), ("good1", 1), ("good2", 2)]
+    assert q.depth() == 1
+    q.close(timeout=0)
+
+
+def test_on_give_up_errors_are_contained():
+    fn = FakeUpdate(fail_first=-1)
+
+    def boom(path, payload):
+        raise RuntimeError("callback")
+
+    q = _queue(fn, max_attempts=1, on_give_up=boom)
+    assert q.submit("a", 1)
+    assert q.flush(5.0)
+    assert q.submit("b", 1)  # the writer thread survived
+    assert q.flush(5.0)
+    assert q.stats()["given_up"] == 2
+    q.close()
+
+
+def test_submit_after_close_raises():
+    q = _queue(FakeUpdate())
+    q.close()
+    with pytest.raises(RuntimeError):
+        q.submit("a", 1)
@@ -7,6 +7,23 @@ Uses TFLite BUILTINS only (no SELECT_TF_OPS) — compatible with Conv1D + Dense
 Usage (from Smart-Body-Vest- project root):
   python tflite_convert.py
   python tflite_convert.py --keras path/to/model.keras --out path/to/out.tflite
+  python tflite_convert.py --raw-inputs     # scaler + derived features baked into the graph
+  python tflite_convert.py --int8           # full-integer model + float vs int8 report
+
+``--raw-inputs`` exports a model taking (1, SEQ_LENGTH + 1, 7) raw rows in config.RAW_INPUT_COLS
+order (leading row = previous observation). temp_delta, motion bin, clipped temp/pulse steps and
+the StandardScaler affine from data/scaler_features.pkl run inside the graph, so the serving
+process needs neither sklearn nor the pickle (MODULE2_RAW_INPUT_MODEL=1).
+
+``--int8`` calibrates activation ranges on windows from the training split (same stratified
+split as pad_classifier) and exports int8 weights, activations, input and output. The split
+comes from data/X_seq_pad.npy / y_pad_class_seq.npy (MODULE2_BALANCE_MODE=materialize, the
+default) or, with MODULE2_BALANCE_MODE=index, from the unbalanced windows of
+X_scaled_timeseries.npy / y_pad_class_ordered.npy / seq_end_idx.npy (load_sequence_dataset).
+The float (default) and int8 models are then compared on the held-out test split — accuracy,
+per-invoke latency, size — in data/tflite_int8_report.txt.
+Serve it by pointing ``--out`` at models/pad_level_classifier.tflite; PadLevelTfliteInterpreter
+quantizes inputs / dequantizes outputs itself.
 
 Requires: tensorflow
 """
@@ -16,12 +33,221 @@ import argparse
 import os
 import sys
 
+import numpy as np
+
 ROOT = os.path.dirname(os.path.abspath(__file__))
 sys.path.insert(0, ROOT)
 
 os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
 
 
+def _raw_input_model(model, scaler):
+    """Keras model: raw (N, SEQ_LENGTH + 1, 7) → engineered features → scaler affine → ``model``."""
+    from module2.inference_utils import standard_scaler_affine
+
+    # Same check as the ring buffer's fused scaling: only a StandardScaler's affine can be baked in.
+    try:
+        mean, scale = standard_scaler_affine(scaler)
+    except TypeError as exc:
+        raise ValueError("--raw-inputs cannot fold this scaler into the graph: %s" % exc) from exc
+    mean = mean.astype(np.float32)
+    scale = scale.astype(np.float32)
+
+    import tensorflow as tf
+
+    from module2 import config
+    from module2.rolling_buffer import (
+        MOTION_BIN_THRESHOLD,
+        PULSE_STEP_CLIP,
+        TEMP_DELTA_REF_C,
+        TEMP_STEP_CLIP,
+    )
+
+    class RawFeaturePreprocessing(tf.keras.layers.Layer):
+        """Same features as RollingFeatureBuffer.push_observation, then StandardScaler.transform."""
+
+        def call(self, raw):
+            prev = raw[:, :-1, :]
+            cur = raw[:, 1:, :]
+            temp = cur[:, :, 0]
+            pulse = cur[:, :, 1]
+            t_step = tf.clip_by_value(temp - prev[:, :, 0], *TEMP_STEP_CLIP)
+            p_step = tf.clip_by_value(pulse - prev[:, :, 1], *PULSE_STEP_CLIP)
+            motion_b = tf.cast(cur[:, :, 2] >= MOTION_BIN_THRESHOLD, tf.float32)
+            # FEATURE_COLS_SEQ order
+            feats = tf.stack(
+                [
+                    temp,
+                    temp - TEMP_DELTA_REF_C,
+                    pulse,
+                    motion_b,
+                    cur[:, :, 3],
+                    cur[:, :, 4],
+                    cur[:, :, 5],
+                    cur[:, :, 6],
+                    t_step,
+                    p_step,
+                ],
+                axis=-1,
+            )
+            return (feats - mean) / scale
+
+    raw = tf.keras.Input((config.RAW_INPUT_SEQ_LENGTH, config.RAW_INPUT_DIM), name="raw")
+    return tf.keras.Model(raw, model(RawFeaturePreprocessing()(raw)))
+
+
+def _parity_observations(n: int):
+    """
+    ``n`` raw (temp, pulse, motion, age, height, weight, gender) rows from the training CSV
+    (config.DATASET_PATH) in file order; a seeded random stream when it cannot be read.
+    """
+    import csv
+
+    from module2 import config
+
+    cols = (
+        "body_temperature_C",
+        "pulse_bpm",
+        "motion_level_0_1",
+        "age_years",
+        "height_cm",
+        "weight_kg",
+        "gender_0_1",
+    )
+    rows = []
+    try:
+        with open(config.DATASET_PATH, newline="") as f:
+            for rec in csv.DictReader(f):
+                try:
+                    rows.append(tuple(float(rec[c]) for c in cols))
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if len(rows) >= n:
+                    return rows
+    except (OSError, UnicodeDecodeError, csv.Error):
+        pass
+    rng = np.random.default_rng(config.SHUFFLE_SEED)
+    return [
+        (
+            float(rng.uniform(33.0, 39.0)),
+            float(rng.uniform(50.0, 130.0)),
+            float(rng.random()),
+            float(rng.uniform(16.0, 70.0)),
+            float(rng.uniform(150.0, 195.0)),
+            float(rng.uniform(45.0, 110.0)),
+            float(rng.integers(0, 2)),
+        )
+        for _ in range(n)
+    ]
+
+
+def _verify_raw_input_model(model, scaler, tflite_path: str, steps: int = 64) -> float:
+    """
+    Max |p_raw_tflite - p_keras| over dataset rows fed through the raw buffer and the reference
+    deque buffer, whose window goes through ``scaler.transform`` — not the affine baked into
+    the graph, so a wrong affine shows up here.
+    """
+    from module2 import config
+    from module2.rolling_buffer import RawObservationBuffer, RollingFeatureBuffer
+    from module2.tflite_pad_inference import PadLevelTfliteInterpreter
+
+    interp = PadLevelTfliteInterpreter(tflite_path)
+    raw_buf = RawObservationBuffer()
+    feat_buf = RollingFeatureBuffer()
+    worst = 0.0
+    for obs in _parity_observations(config.SEQ_LENGTH + steps):
+        raw_buf.push_observation(*obs)
+        feat_buf.push_observation(*obs)
+        x_raw = raw_buf.model_input()
+        if x_raw is None:
+            continue
+        p_raw, _ = interp.predict_proba_timed(x_raw)
+        p_ref = np.asarray(model(feat_buf.scaled_window(scaler), training=False))[0]
+        worst = max(worst, float(np.max(np.abs(p_raw - p_ref))))
+    return worst
+
+
+def _load_split(data_dir: str):
+    """
+    (X_train, X_test, y_test) with the same split as pad_classifier for config.BALANCE_MODE:
+    materialize — X_seq_pad.npy / y_pad_class_seq.npy; index — load_sequence_dataset() over
+    X_scaled_timeseries.npy / y_pad_class_ordered.npy / seq_end_idx.npy, with X_train a lazy
+    SequenceWindowDataset (calibration reads a few windows) and only the test windows gathered.
+    """
+    from module2 import config
+    from module2.pad_classifier import _split_stratified_holdout
+
+    if config.BALANCE_MODE == "index":
+        from module2.data_prep import load_sequence_dataset
+
+        ds = load_sequence_dataset(data_dir)
+        pos_train, _, _, _, pos_test, y_test = _split_stratified_holdout(
+            np.arange(len(ds)), ds.labels
+        )
+        return ds.subset(pos_train), ds.windows(pos_test), y_test
+
+    X = np.load(os.path.join(data_dir, "X_seq_pad.npy")).astype(np.float32)
+    y = np.load(os.path.join(data_dir, "y_pad_class_seq.npy"))
+    X_train, _, _, _, X_test, y_test = _split_stratified_holdout(X, y)
+    return X_train, X_test, y_test
+
+
+def _representative_dataset(X_train: np.ndarray, n: int):
+    from module2 import config
+
+    rng = np.random.default_rng(config.SHUFFLE_SEED)
+    idx = rng.choice(len(X_train), size=min(n, len(X_train)), replace=False)
+
+    def gen():
+        for i in idx:
+            yield [X_train[i : i + 1]]
+
+    return gen
+
+
+def _evaluate_tflite(path: str, X_test: np.ndarray, y_test: np.ndarray, reps: int = 500) -> dict:
+    """Test accuracy (batched invoke), mean single-window latency and file size."""
+    from module2.tflite_pad_inference import PadLevelTfliteInterpreter
+
+    interp = PadLevelTfliteInterpreter(path)
+    probs, _ = interp.predict_proba_batch(X_test)
+    acc = float(np.mean(np.argmax(probs, axis=1) == np.asarray(y_test).reshape(-1)))
+    x1 = X_test[:1]
+    interp.predict_proba_timed(x1)
+    latency = [interp.predict_proba_timed(X_test[i % len(X_test)][None])[1] for i in range(reps)]
+    return {
+        "accuracy": acc,
+        "latency_ms": float(np.mean(latency)),
+        "latency_p95_ms": float(np.percentile(latency, 95)),
+        "size_bytes": os.path.getsize(path),
+        "argmax": np.argmax(probs, axis=1),
+    }
+
+
+def _write_int8_report(path: str, float_path: str, int8_path: str, X_test, y_test, n_calib: int) -> None:
+    f_res = _evaluate_tflite(float_path, X_test, y_test)
+    q_res = _evaluate_tflite(int8_path, X_test, y_test)
+    agree = float(np.mean(f_res["argmax"] == q_res["argmax"]))
+    lines = [
+        "TFLite float (Optimize.DEFAULT) vs full-integer int8 — held-out test split (n=%d)"
+        % len(y_test),
+        "calibration windows: %d (training split)" % n_calib,
+        "%-6s %10s %14s %14s %12s" % ("model", "accuracy", "latency_ms", "p95_ms", "size_bytes"),
+    ]
+    for name, r in (("float", f_res), ("int8", q_res)):
+        lines.append(
+            "%-6s %10.4f %14.4f %14.4f %12d"
+            % (name, r["accuracy"], r["latency_ms"], r["latency_p95_ms"], r["size_bytes"])
+        )
+    lines.append("argmax agreement float vs int8: %.4f" % agree)
+    text = "\n".join(lines) + "\n"
+    print("\n" + text)
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(text)
+    print("Saved:", path)
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(description="Keras → TFLite for pad_level classifier")
     parser.add_argument(
@@ -32,14 +258,50 @@ def main() -> None:
     parser.add_argument(
         "--out",
         default=None,
-        help="Output .tflite path (default: module2 config TFLITE_MODEL_PATH)",
+        help="Output .tflite path (default: TFLITE_MODEL_PATH, or TFLITE_RAW_MODEL_PATH with --raw-inputs)",
+    )
+    parser.add_argument(
+        "--raw-inputs",
+        action="store_true",
+        help="Bake derived features + StandardScaler into the graph (input: raw 7-field rows)",
+    )
+    parser.add_argument(
+        "--scaler",
+        default=None,
+        help="scaler_features.pkl for --raw-inputs (default: module2 config SCALER_FEATURES_PATH)",
+    )
+    parser.add_argument(
+        "--int8",
+        action="store_true",
+        help="Full-integer quantization calibrated on the training split, plus float vs int8 report",
+    )
+    parser.add_argument(
+        "--data-dir",
+        default=None,
+        help="Directory with the --int8 split data (default: DATA_DIR): X_seq_pad.npy / "
+        "y_pad_class_seq.npy, or with MODULE2_BALANCE_MODE=index X_scaled_timeseries.npy / "
+        "y_pad_class_ordered.npy / seq_end_idx.npy",
+    )
+    parser.add_argument(
+        "--calibration-samples",
+        type=int,
+        default=None,
+        help="Representative windows for --int8 (default: TFLITE_INT8_CALIBRATION_SAMPLES)",
     )
     args = parser.parse_args()
+    if args.int8 and args.raw_inputs:
+        raise SystemExit("--int8 and --raw-inputs cannot be combined")
 
     from module2 import config
 
     keras_path = os.path.abspath(args.keras or config.CLASSIFIER_MODEL_PATH)
-    out_path = os.path.abspath(args.out or config.TFLITE_MODEL_PATH)
+    if args.int8:
+        default_out = config.TFLITE_INT8_MODEL_PATH
+    elif args.raw_inputs:
+        default_out = config.TFLITE_RAW_MODEL_PATH
+    else:
+        default_out = config.TFLITE_MODEL_PATH
+    out_path = os.path.abspath(args.out or default_out)
 
     if not os.path.isfile(keras_path):
         raise SystemExit("Keras model not found: %s" % keras_path)
@@ -51,8 +313,24 @@ def main() -> None:
     except TypeError:
         model = tf.keras.models.load_model(keras_path, compile=False)
 
-    converter = tf.lite.TFLiteConverter.from_keras_model(model)
+    scaler = None
+    if args.raw_inputs:
+        from module2.inference_utils import load_scaler_features_only
+
+        scaler = load_scaler_features_only(args.scaler)
+        converter = tf.lite.TFLiteConverter.from_keras_model(_raw_input_model(model, scaler))
+    else:
+        converter = tf.lite.TFLiteConverter.from_keras_model(model)
     converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    if args.int8:
+        data_dir = args.data_dir or config.DATA_DIR
+        X_train, X_test, y_test = _load_split(data_dir)
+        n_calib = min(args.calibration_samples or config.TFLITE_INT8_CALIBRATION_SAMPLES, len(X_train))
+        float_model = converter.convert()
+        converter.representative_dataset = _representative_dataset(X_train, n_calib)
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.int8
+        converter.inference_output_type = tf.int8
     tflite_model = converter.convert()
 
     os.makedirs(os.path.dirname(out_path) or ".", exist_ok=True)
@@ -61,6 +339,30 @@ def main() -> None:
 
     print("Wrote:", out_path, "(%d bytes)" % len(tflite_model))
 
+    if args.int8:
+        import tempfile
+
+        with tempfile.NamedTemporaryFile(suffix=".tflite", delete=False) as tmp:
+            tmp.write(float_model)
+        try:
+            _write_int8_report(
+                os.path.join(data_dir, "tflite_int8_report.txt"),
+                tmp.name,
+                out_path,
+                X_test,
+                y_test,
+                n_calib,
+            )
+        finally:
+            os.unlink(tmp.name)
+
+    if scaler is not None:
+        err = _verify_raw_input_model(model, scaler, out_path)
+        print(
+            "Raw-input parity vs Keras + scaler.transform: max |dp| = %.2e "
+            "(includes Optimize.DEFAULT weight quantization)" % err
+        )
+
 
 if __name__ == "__main__":
     main()
@@ -5,6 +5,7 @@ Smoke-test TFLite pad_level classifier: load .tflite and run one random forward
 Usage (from project root):
   python tflite_inference.py
   python tflite_inference.py --model models/pad_level_classifier.tflite
+  python tflite_inference.py --batch 64      # one batched invoke via predict_proba_batch
 """
 from __future__ import annotations
 
@@ -21,6 +22,12 @@ os.environ.setdefault("TF_CPP_MIN_LOG_LEVEL", "2")
 def main() -> None:
     parser = argparse.ArgumentParser()
     parser.add_argument("--model", default=None, help="Path to .tflite file")
+    parser.add_argument(
+        "--batch",
+        type=int,
+        default=0,
+        help="Also score N random windows in one batched invoke (default: off)",
+    )
     args = parser.parse_args()
 
     import numpy as np
@@ -43,6 +50,12 @@ def main() -> None:
     print("Argmax class index:", idx, "->", config.PAD_LEVEL_CLASSES[idx])
     print("Probs:", dict(zip(config.PAD_LEVEL_CLASSES, probs.tolist())))
 
+    if args.batch > 0:
+        xb = np.random.randn(args.batch, sl, fd).astype(np.float32) * 0.1
+        pb, ms = interp.predict_proba_batch(xb)
+        print("Batch input shape:", xb.shape, "-> probs", pb.shape)
+        print("Batch latency: %.3f ms (%.4f ms/window)" % (ms, ms / args.batch))
+
 
 if __name__ == "__main__":
     main()